@@ -0,0 +1,190 @@
+import multiprocessing
+import operator
+import pickle
+import pytest
+from algebra.field import bn128_FR, FieldVector
+from algebra.cyclic_group import bn128_group
+from algebra.pairing import bn128_pairing, to_affine
+from algebra.algorithms import (
+    multi_scalar_multiplication,
+    pippenger_msm,
+    FixedBaseTable,
+    batch_inverse,
+    fold_vec,
+    fold_int_vec,
+    ParallelMSM,
+)
+
+
+class TestMSM:
+    def test_msm(self):
+        for n in [1, 5, 40]:
+            scalars = [bn128_FR(-(i * 7919 + 3)) for i in range(n)]
+            group_elts = [bn128_group(i * i + 11) for i in range(n)]
+
+            expected = bn128_group.identity()
+            for g, s in zip(group_elts, scalars):
+                expected += g * s
+            assert (
+                multi_scalar_multiplication(scalars=scalars, groupElts=group_elts)
+                == expected
+            )
+
+    def test_pippenger_window_sizes(self):
+        scalars = [1234567, 0, 89, 2**70 + 5]
+        points = [bn128_group(3), bn128_group(5), bn128_group(7), bn128_group(11)]
+
+        expected = bn128_group.identity()
+        for g, s in zip(points, scalars):
+            expected += g * s
+        for c in [1, 2, 5, 8]:
+            assert (
+                pippenger_msm(
+                    scalars=scalars,
+                    points=points,
+                    add=lambda a, b: a + b,
+                    identity=bn128_group.identity(),
+                    window_size=c,
+                )
+                == expected
+            )
+
+    def test_msm_G_1(self):
+        pairing = bn128_pairing
+        scalars = [bn128_FR(3), bn128_FR(0), bn128_FR(-1), bn128_FR(2**40 + 7)]
+        points = [pairing.multiply_G_1(pairing.g_1, bn128_FR(i + 2)) for i in range(4)]
+
+        expected = pairing.identity()
+        for p, s in zip(points, scalars):
+            expected = pairing.add_G_1(expected, pairing.multiply_G_1(p, s))
+        assert to_affine(
+            pairing.multi_scalar_multiply_G_1(points, scalars)
+        ) == to_affine(expected)
+
+
+class TestParallelMSM:
+    points = [bn128_group(i * i + 11) for i in range(20)]
+    scalars = [i * 7919 + 3 for i in range(17)]
+    expected = pippenger_msm(
+        scalars=scalars,
+        points=points[:17],
+        add=operator.add,
+        identity=bn128_group.identity(),
+    )
+
+    def test_parallel_msm(self):
+        msm = ParallelMSM(
+            points=self.points,
+            add=operator.add,
+            identity=bn128_group.identity(),
+            num_workers=2,
+            chunk_size=3,
+            serial_threshold=0,
+        )
+        try:
+            assert len(msm.executors) == 2
+            assert msm(self.scalars) == self.expected
+            # Fewer scalars than workers leaves the other workers idle
+            assert msm(self.scalars[:2]) == self.points[0] * 3 + self.points[1] * 7922
+            # Copies run serially rather than submitting to the original workers
+            copy = pickle.loads(pickle.dumps(msm))
+            assert copy.executors == [] and copy(self.scalars) == self.expected
+        finally:
+            msm.close()
+        # Closed pools fall back to a serial MSM
+        assert msm(self.scalars) == self.expected
+
+    def test_spawn(self):
+        points = [
+            bn128_pairing.multiply_G_1(bn128_pairing.g_1, bn128_FR(i + 2))
+            for i in range(6)
+        ]
+        msm = ParallelMSM(
+            points=points,
+            add=bn128_pairing.add_G_1,
+            identity=bn128_pairing.identity(),
+            num_workers=2,
+            chunk_size=2,
+            serial_threshold=0,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        try:
+            res = msm([3, 5, 7, 11, 13, 17])
+        finally:
+            msm.close()
+        expected = bn128_pairing.multiply_G_1(
+            bn128_pairing.g_1,
+            bn128_FR(sum(s * (i + 2) for i, s in enumerate([3, 5, 7, 11, 13, 17]))),
+        )
+        assert to_affine(res) == to_affine(expected)
+
+    def test_rejects_unpicklable_add(self):
+        with pytest.raises(ValueError):
+            ParallelMSM(
+                points=self.points,
+                add=lambda a, b: a + b,
+                identity=bn128_group.identity(),
+                num_workers=1,
+            )
+
+    def test_serial_threshold(self):
+        msm = ParallelMSM(
+            points=self.points,
+            add=operator.add,
+            identity=bn128_group.identity(),
+            num_workers=2,
+            serial_threshold=100,
+        )
+        try:
+            assert msm(self.scalars) == self.expected
+        finally:
+            msm.close()
+
+
+class TestFixedBaseTable:
+    def test_multiply(self):
+        base = bn128_group(987654321)
+        table = FixedBaseTable(
+            base=base,
+            add=lambda a, b: a + b,
+            identity=bn128_group.identity(),
+            num_bits=bn128_FR.field_modulus.bit_length(),
+        )
+
+        for n in [0, 1, 15, 16, 2**100 + 3, bn128_FR.field_modulus - 1]:
+            assert table.multiply(n) == base * n
+
+    def test_multiply_G_1(self):
+        pairing = bn128_pairing
+        table = pairing.fixed_base_table_G_1(pairing.g_1)
+
+        n = bn128_FR(-12345)
+        assert to_affine(table.multiply(n.n)) == to_affine(
+            pairing.multiply_G_1(pairing.g_1, n)
+        )
+
+
+class TestBatchInverse:
+    def test_batch_inverse(self):
+        elements = [bn128_FR(i * 13 - 5) for i in range(10)] + [bn128_FR(0)]
+
+        inverses = batch_inverse(elements)
+        assert inverses[:-1] == [bn128_FR(1) / x for x in elements[:-1]]
+        assert inverses[-1] == bn128_FR(0)
+        assert batch_inverse([]) == []
+        assert batch_inverse(FieldVector.from_elts(bn128_FR, elements)) == inverses
+
+
+class TestFold:
+    def test_fold_vec(self):
+        vec = [bn128_FR(i + 1) for i in range(8)]
+        lo = bn128_FR(3)
+        hi = bn128_FR(11)
+        expected = [vec[i] * lo + vec[i + 4] * hi for i in range(4)]
+
+        fold_vec(vec, 4, lo, hi)
+        assert vec[:4] == expected
+
+        int_vec = [(i + 1) for i in range(8)]
+        fold_int_vec(int_vec, 4, lo.n, hi.n, bn128_FR.field_modulus)
+        assert int_vec[:4] == [x.n for x in expected]
@@ -0,0 +1,62 @@
+from algebra.field import bn128_FR, bls12_381_FR
+from algebra.pairing import bn128_pairing, bls12_381_pairing, to_affine, points_equal
+import pytest
+from algebra.encoding import (
+    encode_ints,
+    decode_ints,
+    encode_G_1,
+    decode_G_1,
+    encode_G_1_compressed,
+    decode_G_1_compressed,
+)
+
+
+class TestEncoding:
+    def test_ints(self):
+        xs = [0, 1, 2**255 + 7]
+
+        assert len(encode_ints(xs, 32)) == 96
+        assert decode_ints(encode_ints(xs, 32), 32) == xs
+
+    def test_G_1(self):
+        for pairing, field_class in [
+            (bn128_pairing(), bn128_FR),
+            (bls12_381_pairing(), bls12_381_FR),
+        ]:
+            base_field_class = type(pairing.g_1[0])
+            p = pairing.multiply_G_1(pairing.g_1, field_class(12345))
+
+            assert to_affine(
+                decode_G_1(encode_G_1(p, base_field_class), base_field_class)
+            ) == to_affine(p)
+            identity = decode_G_1(
+                encode_G_1(pairing.identity(), base_field_class), base_field_class
+            )
+            assert to_affine(identity) is None
+
+    def test_rejects_points_outside_subgroup(self):
+        base_field_class = type(bls12_381_pairing.g_1[0])
+        modulus = base_field_class.field_modulus
+        # Smallest x on the curve, which is not in G1 since the cofactor is large
+        x = 0
+        while True:
+            y_squared = (x**3 + 4) % modulus
+            y = pow(y_squared, (modulus + 1) // 4, modulus)
+            if y * y % modulus == y_squared:
+                break
+            x += 1
+        p = (base_field_class(x), base_field_class(y), base_field_class.one())
+
+        with pytest.raises(ValueError):
+            decode_G_1(encode_G_1(p, base_field_class), base_field_class)
+        with pytest.raises(ValueError):
+            decode_G_1_compressed(
+                encode_G_1_compressed(p, base_field_class), base_field_class
+            )
+        # Trusted data may skip the subgroup check, but not the curve check
+        assert points_equal(
+            decode_G_1(
+                encode_G_1(p, base_field_class), base_field_class, check_subgroup=False
+            ),
+            p,
+        )
@@ -0,0 +1,37 @@
+from algebra.field import bn128_FR
+from algebra.ntt import get_ntt_domain, get_coset_shift
+from algebra.polynomial import Polynomial
+from algebra.evaluation_polynomial import EvaluationPolynomial
+
+
+class TestEvaluationPolynomial:
+    domain = get_ntt_domain(bn128_FR, 8)
+    shift = get_coset_shift(bn128_FR)
+    f = Polynomial(coeffs=[bn128_FR(6), bn128_FR(10), bn128_FR(1)])
+    g = Polynomial(coeffs=[bn128_FR(2), bn128_FR(5)])
+
+    def test_from_poly(self):
+        f_evals = EvaluationPolynomial.from_poly(self.f, self.domain)
+        assert f_evals.values == [self.f(x) for x in self.domain]
+
+    def test_from_poly_on_coset(self):
+        f_evals = EvaluationPolynomial.from_poly(self.f, self.domain, self.shift)
+        assert f_evals.values == [self.f(x) for x in f_evals.points()]
+
+    def test_round_trip(self):
+        f_evals = EvaluationPolynomial.from_poly(self.f, self.domain, self.shift)
+        assert f_evals.to_poly() == self.f
+
+    def test_mul(self):
+        f_evals = EvaluationPolynomial.from_poly(self.f, self.domain, self.shift)
+        g_evals = EvaluationPolynomial.from_poly(self.g, self.domain, self.shift)
+        assert (f_evals * g_evals).to_poly() == self.f * self.g
+
+    def test_add_sub_scale(self):
+        f_evals = EvaluationPolynomial.from_poly(self.f, self.domain)
+        g_evals = EvaluationPolynomial.from_poly(self.g, self.domain)
+        c = bn128_FR(7)
+
+        assert (f_evals + g_evals).to_poly() == self.f + self.g
+        assert (f_evals - g_evals * c).to_poly() == self.f - self.g * c
+        assert (f_evals - c).to_poly() == self.f - c
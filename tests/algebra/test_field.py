@@ -0,0 +1,53 @@
+from algebra.field import bn128_FR, FieldVector
+from algebra.polynomial import Polynomial
+
+
+class TestFieldVector:
+    a = [bn128_FR(i * 3 + 1) for i in range(6)]
+    b = [bn128_FR(5 - i * i) for i in range(6)]
+
+    def test_pointwise_arithmetic(self):
+        u = FieldVector.from_elts(bn128_FR, self.a)
+        v = FieldVector.from_elts(bn128_FR, self.b)
+        c = bn128_FR(9)
+
+        assert u + v == [x + y for x, y in zip(self.a, self.b)]
+        assert u - v == [x - y for x, y in zip(self.a, self.b)]
+        assert u * v == [x * y for x, y in zip(self.a, self.b)]
+        assert u * c == [x * c for x in self.a]
+        assert -u == [-x for x in self.a]
+
+    def test_dot(self):
+        u = FieldVector.from_elts(bn128_FR, self.a)
+        v = FieldVector.from_elts(bn128_FR, self.b)
+
+        expected = bn128_FR(0)
+        for x, y in zip(self.a, self.b):
+            expected += x * y
+        assert u.dot(v) == expected
+
+    def test_inverse_skips_zeros(self):
+        u = FieldVector.from_elts(bn128_FR, self.a + [bn128_FR(0)])
+
+        inverses = u.inverse()
+        assert inverses[len(self.a)] == bn128_FR(0)
+        assert inverses[: len(self.a)] == [bn128_FR(1) / x for x in self.a]
+
+
+class TestFieldVectorPolynomial:
+    f = Polynomial(coeffs=[bn128_FR(i + 2) for i in range(5)])
+    g = Polynomial(coeffs=[bn128_FR(7 - 2 * i) for i in range(3)])
+
+    def test_matches_list_backed(self):
+        f_vec = Polynomial(coeffs=FieldVector.from_elts(bn128_FR, self.f.coeffs))
+        g_vec = Polynomial(coeffs=FieldVector.from_elts(bn128_FR, self.g.coeffs))
+        c = bn128_FR(4)
+        x = bn128_FR(11)
+
+        assert f_vec + g_vec == self.f + self.g
+        assert f_vec - g_vec == self.f - self.g
+        assert f_vec * g_vec == self.f * self.g
+        assert f_vec * self.g == self.f * self.g
+        assert f_vec * c == self.f * c
+        assert f_vec - c == self.f - c
+        assert f_vec(x) == self.f(x)
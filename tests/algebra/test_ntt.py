@@ -0,0 +1,54 @@
+from algebra.field import bn128_FR, bls12_381_FR
+from algebra.ntt import ntt, inverse_ntt, get_ntt_domain, is_ntt_domain
+from algebra.polynomial import Polynomial
+
+
+class TestNTT:
+    fields = [bn128_FR, bls12_381_FR]
+
+    def test_ntt_matches_evaluation(self):
+        for field_class in self.fields:
+            domain = get_ntt_domain(field_class, 8)
+            f = Polynomial(coeffs=[field_class(i * i + 3) for i in range(8)])
+
+            assert ntt(f.coeffs, domain) == [f(x) for x in domain]
+
+    def test_ntt_wraps_long_polynomial(self):
+        domain = get_ntt_domain(bn128_FR, 4)
+        f = Polynomial(coeffs=[bn128_FR(i + 1) for i in range(11)])
+
+        assert ntt(f.coeffs, domain) == [f(x) for x in domain]
+
+    def test_inverse_ntt(self):
+        for field_class in self.fields:
+            domain = get_ntt_domain(field_class, 16)
+            coeffs = [field_class(7 * i - 20) for i in range(16)]
+
+            assert inverse_ntt(ntt(coeffs, domain), domain) == coeffs
+
+    def test_is_ntt_domain(self):
+        assert is_ntt_domain(bn128_FR.get_roots_of_unity(8))
+        assert not is_ntt_domain(bn128_FR.get_roots_of_unity(8)[:4])
+        assert not is_ntt_domain([bn128_FR(1), bn128_FR(2), bn128_FR(3)])
+
+
+class TestNTTPolynomial:
+    def test_mul_above_threshold(self):
+        f = Polynomial(coeffs=[bn128_FR(3 * i + 1) for i in range(40)])
+        g = Polynomial(coeffs=[bn128_FR(5 - i) for i in range(50)])
+
+        expected = [bn128_FR(0)] * 89
+        for i, a in enumerate(f.coeffs):
+            for j, b in enumerate(g.coeffs):
+                expected[i + j] += a * b
+        assert f * g == Polynomial(coeffs=expected)
+
+    def test_interpolate_on_mult_subgroup(self):
+        domain = bn128_FR.get_roots_of_unity(8)
+        values = [bn128_FR(i * 11 + 2) for i in range(8)]
+
+        f = Polynomial.interpolate_poly(
+            domain=domain, values=values, field_class=bn128_FR
+        )
+        assert [f(x) for x in domain] == values
+        assert f.eval_on_mult_subgroup(domain) == values
@@ -0,0 +1,44 @@
+from py_ecc import bn128, bls12_381
+from algebra.field import bn128_FR, bls12_381_FR
+from algebra.pairing import bn128_pairing, bls12_381_pairing, to_affine
+
+
+class TestPairing:
+    pairing = bn128_pairing
+
+    def test_to_affine(self):
+        p = self.pairing.multiply_G_1(self.pairing.g_1, bn128_FR(1234))
+        expected = bn128.multiply(bn128.G1, 1234)
+
+        assert tuple(x.n for x in to_affine(p)) == tuple(x.n for x in expected)
+        assert to_affine(self.pairing.identity()) is None
+
+        p = bls12_381_pairing.multiply_G_1(bls12_381_pairing.g_1, bls12_381_FR(1234))
+        expected = bls12_381.multiply(bls12_381.G1, 1234)
+        assert tuple(x.n for x in to_affine(p)) == tuple(x.n for x in expected)
+
+    def test_bilinearity(self):
+        a = bn128_FR(6)
+        b = bn128_FR(7)
+        lhs = self.pairing.pairing(
+            self.pairing.multiply_G_1(self.pairing.g_1, a),
+            self.pairing.multiply_G_2(self.pairing.g_2, b),
+        )
+        rhs = self.pairing.pairing(
+            self.pairing.multiply_G_1(self.pairing.g_1, a * b), self.pairing.g_2
+        )
+
+        assert lhs == rhs
+
+    def test_pairing_check(self):
+        a = bn128_FR(6)
+        b = bn128_FR(7)
+        p = self.pairing.multiply_G_1(self.pairing.g_1, a)
+        q = self.pairing.multiply_G_2(self.pairing.g_2, b)
+        r = self.pairing.multiply_G_1(self.pairing.g_1, a * b)
+
+        assert self.pairing.multi_pairing([(p, q)]) == self.pairing.pairing(p, q)
+        assert self.pairing.pairing_check(
+            [(p, q), (self.pairing.neg_G_1(r), self.pairing.g_2)]
+        )
+        assert not self.pairing.pairing_check([(p, q), (r, self.pairing.g_2)])
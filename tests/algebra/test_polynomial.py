@@ -137,6 +137,28 @@ class TestLagrange:
             == expected
         )
 
+    def test_eval_lagrange_polys_on_mult_subgroup(self):
+        domain = bn128_FR.get_roots_of_unity(8)
+        x = bn128_FR(12345)
+
+        expected = [
+            Polynomial.lagrange_poly(domain=domain, index=i, field_class=bn128_FR)(x)
+            for i in [0, 3, 5]
+        ]
+        assert (
+            Polynomial.eval_lagrange_polys_on_mult_subgroup(
+                mult_subgroup=domain, indices=[0, 3, 5], x=x
+            )
+            == expected
+        )
+
+    def test_eval_lagrange_polys_in_mult_subgroup(self):
+        domain = bn128_FR.get_roots_of_unity(8)
+
+        assert Polynomial.eval_lagrange_polys_on_mult_subgroup(
+            mult_subgroup=domain, indices=[0, 3, 5], x=domain[3]
+        ) == [bn128_FR(0), bn128_FR(1), bn128_FR(0)]
+
 
 class TestInterpolation:
     def test_interpolate_poly(self):
@@ -0,0 +1,44 @@
+import pytest
+from algebra.field import bn128_FR
+from constraints import PlonkConstraints
+from preprocessor import Preprocessor
+
+
+# ---------- 4-gate circuit over bn128 with public inputs 10 and 20 ----------
+@pytest.fixture
+def constraints():
+    return PlonkConstraints(
+        l=2,
+        m=9,
+        n=4,
+        a=[bn128_FR(1), bn128_FR(3), bn128_FR(5), bn128_FR(8)],
+        b=[bn128_FR(2), bn128_FR(4), bn128_FR(6), bn128_FR(7)],
+        c=[bn128_FR(5), bn128_FR(7), bn128_FR(8), bn128_FR(9)],
+        qL=[bn128_FR(1), bn128_FR(1), bn128_FR(1), bn128_FR(0)],
+        qR=[bn128_FR(0), bn128_FR(0), bn128_FR(1), bn128_FR(0)],
+        qO=[bn128_FR(0), bn128_FR(0), bn128_FR(-1), bn128_FR(-1)],
+        qM=[bn128_FR(0), bn128_FR(0), bn128_FR(0), bn128_FR(1)],
+        qC=[bn128_FR(0), bn128_FR(0), bn128_FR(0), bn128_FR(0)],
+    )
+
+
+@pytest.fixture
+def witness():
+    return [bn128_FR(x) for x in [10, 0, 20, 0, 10, 5, 20, 15, 300]]
+
+
+@pytest.fixture
+def public_inputs():
+    return [bn128_FR(10), bn128_FR(20)]
+
+
+@pytest.fixture
+def mult_subgroup():
+    return bn128_FR.get_roots_of_unity(4)
+
+
+@pytest.fixture
+def preprocessed_input(constraints, mult_subgroup):
+    return Preprocessor.preprocess_plonk_constraints(
+        constraints=constraints, mult_subgroup=mult_subgroup, field_class=bn128_FR
+    )
@@ -1,7 +1,9 @@
+import pickle
 from polynomial_commitment_schemes.bulletproofs import (
     BulletproofsProver,
     BulletproofsVerifier,
     BulletproofsCRS,
+    BulletproofsOpening,
 )
 from algebra.field import bn128_FR
 from algebra.polynomial import Polynomial
@@ -36,3 +38,66 @@ class TestBulletproofsPCS:
         assert not self.verifier.verify_opening(
             op=self.op, cm=self.cm, z=self.z, s=s_prime, op_info=None
         )
+
+    def test_pool(self):
+        prover = BulletproofsProver(self.crs, self.field_class, self.cyclic_group_class)
+        prover.start_pool(num_workers=2, chunk_size=2, serial_threshold=0)
+        try:
+            assert prover.commit(f=self.f) == self.cm
+        finally:
+            prover.close_pool()
+
+    def test_pickle(self):
+        # The CRS holds fixed-base tables after the first commit
+        assert len(self.crs.tables) > 0
+        prover = pickle.loads(pickle.dumps(self.prover))
+        assert prover.crs.tables == {}
+        assert prover.commit(f=self.f) == self.cm
+
+    def test_legacy_transcript(self):
+        prover = BulletproofsProver(
+            self.crs, self.field_class, self.cyclic_group_class, legacy_transcript=True
+        )
+        verifier = BulletproofsVerifier(
+            self.crs, self.field_class, self.cyclic_group_class, legacy_transcript=True
+        )
+        f = Polynomial(coeffs=[bn128_FR(1), bn128_FR(2), bn128_FR(3)])
+        cm = prover.commit(f=f)
+        op = prover.open(f=f, cm=cm, z=self.z, s=self.s, op_info=None)
+
+        assert verifier.verify_opening(op=op, cm=cm, z=self.z, s=self.s, op_info=None)
+        assert not self.verifier.verify_opening(
+            op=op, cm=cm, z=self.z, s=self.s, op_info=None
+        )
+
+    def test_batch_open_at_point(self):
+        fs = [
+            Polynomial(coeffs=[bn128_FR(1), bn128_FR(2), bn128_FR(3)]),
+            Polynomial(coeffs=[bn128_FR(7)] * 5),
+            Polynomial(coeffs=[bn128_FR(0), bn128_FR(9)]),
+        ]
+        ss = [f(self.z) for f in fs]
+        cms = [self.prover.commit(f=f) for f in fs]
+        op_info = bn128_FR(31)
+        op = self.prover.batch_open_at_point(
+            fs=fs, cms=cms, z=self.z, ss=ss, op_info=op_info
+        )
+
+        assert isinstance(op, BulletproofsOpening)
+        assert self.verifier.verify_batch_at_point(
+            op=op, cms=cms, z=self.z, ss=ss, op_info=op_info
+        )
+        bad_ss = ss[:2] + [ss[2] + bn128_FR(1)]
+        assert not self.verifier.verify_batch_at_point(
+            op=op, cms=cms, z=self.z, ss=bad_ss, op_info=op_info
+        )
+
+    def test_does_not_modify_polynomial(self):
+        f = Polynomial(coeffs=[bn128_FR(1), bn128_FR(2), bn128_FR(3)])
+        cm = self.prover.commit(f=f)
+        op = self.prover.open(f=f, cm=cm, z=self.z, s=f(self.z), op_info=None)
+
+        assert f == Polynomial(coeffs=[bn128_FR(1), bn128_FR(2), bn128_FR(3)])
+        assert self.verifier.verify_opening(
+            op=op, cm=cm, z=self.z, s=f(self.z), op_info=None
+        )
@@ -1,7 +1,15 @@
-from polynomial_commitment_schemes.kzg import KZGProver, KZGVerifier, KZGSRS
+import multiprocessing
+import pickle
+import pytest
+from polynomial_commitment_schemes.kzg import (
+    KZGCommitment,
+    KZGProver,
+    KZGVerifier,
+    KZGSRS,
+)
 from algebra.field import bn128_FR
 from algebra.polynomial import Polynomial
-from algebra.pairing import bn128_pairing
+from algebra.pairing import bn128_pairing, points_equal
 
 
 class TestKZGPCS:
@@ -32,3 +40,88 @@ class TestKZGPCS:
         assert not self.verifier.verify_opening(
             op=self.op, cm=self.cm, z=self.z, s=s_prime, op_info=None
         )
+
+    @pytest.mark.parametrize("method", [None, "spawn"])
+    def test_pool(self, method):
+        prover = KZGProver(self.srs, self.pairing, self.field_class)
+        prover.start_pool(
+            num_workers=2,
+            chunk_size=2,
+            serial_threshold=0,
+            mp_context=None if method is None else multiprocessing.get_context(method),
+        )
+        try:
+            cm = prover.commit(f=self.f)
+            op = prover.open(f=self.f, cm=cm, z=self.z, s=self.s, op_info=None)
+        finally:
+            prover.close_pool()
+        assert cm == self.cm
+        assert op == self.op
+
+    def test_equality(self):
+        # Same point with every projective coordinate scaled
+        x, y, z = self.cm.value
+        assert KZGCommitment(value=(x * 2, y * 2, z * 2)) == self.cm
+        assert KZGCommitment(value=self.op.value) != self.cm
+
+    def test_pickle(self):
+        # The SRS holds a fixed-base table once set up, which is not sent along
+        assert "G_1" in self.srs.tables
+        prover = pickle.loads(pickle.dumps(self.prover))
+        assert prover.srs.tables == {}
+        assert prover.commit(f=self.f) == self.cm
+
+
+class TestKZGSRSFile:
+    pairing = bn128_pairing
+    srs = KZGSRS.trusted_setup(8, pairing, bn128_FR)
+    f = Polynomial(coeffs=[bn128_FR(5), bn128_FR(0), bn128_FR(7), bn128_FR(1)])
+
+    def test_round_trip(self, tmp_path):
+        for compressed in [False, True]:
+            path = str(tmp_path / "srs.bin")
+            self.srs.save(path, self.pairing, compressed=compressed)
+            loaded = KZGSRS.load(path, self.pairing)
+
+            assert loaded == self.srs
+            loaded.close()
+
+    def test_pickle_loaded(self, tmp_path):
+        path = str(tmp_path / "srs.bin")
+        self.srs.save(path, self.pairing, compressed=True)
+        with KZGSRS.load(path, self.pairing, trusted=True) as loaded:
+            loaded.G_1_elts[0]
+            # The copy maps the file again rather than carrying the map
+            with pickle.loads(pickle.dumps(loaded)) as copy:
+                assert copy == self.srs
+
+    def test_lazy_prefix(self, tmp_path):
+        path = str(tmp_path / "srs.bin")
+        self.srs.save(path, self.pairing, compressed=True)
+        loaded = KZGSRS.load(path, self.pairing, d=4)
+        prover = KZGProver(loaded, self.pairing, bn128_FR)
+        verifier = KZGVerifier(loaded, self.pairing, bn128_FR)
+
+        cm = prover.commit(f=self.f)
+        expected = KZGProver(self.srs, self.pairing, bn128_FR).commit(f=self.f)
+        assert cm == expected
+        assert len(loaded.G_1_elts) == 4
+        z = bn128_FR(3)
+        op = prover.open(f=self.f, cm=cm, z=z, s=self.f(z), op_info=None)
+        assert verifier.verify_opening(op=op, cm=cm, z=z, s=self.f(z), op_info=None)
+
+    def test_close(self, tmp_path):
+        path = str(tmp_path / "srs.bin")
+        self.srs.save(path, self.pairing, compressed=True)
+        with KZGSRS.load(path, self.pairing) as loaded:
+            first = loaded.G_1_elts[0]
+        assert points_equal(first, self.srs.G_1_elts[0])
+        # Decoded points stay readable, the rest of the map is gone
+        assert loaded.G_1_elts[0] == first
+        with pytest.raises(ValueError):
+            loaded.G_1_elts[1]
+
+        with open(path, "r+b") as f:
+            f.write(b"XXXXX")
+        with pytest.raises(ValueError):
+            KZGSRS.load(path, self.pairing)
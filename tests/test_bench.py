@@ -0,0 +1,67 @@
+import json
+from bench import make_constraints, run_bench, compare_results, main
+from algebra.field import bn128_FR
+
+
+class TestBench:
+    def test_make_constraints(self):
+        constraints, witness, public_inputs = make_constraints(3, bn128_FR)
+        assert constraints.n == 8
+        assert constraints.is_valid_constraint()
+        assert len(witness) == constraints.m
+        assert witness[:2] == public_inputs
+        for i in range(2, constraints.n):
+            a = witness[constraints.a[i].n - 1]
+            b = witness[constraints.b[i].n - 1]
+            c = witness[constraints.c[i].n - 1]
+            assert (
+                constraints.qL[i] * a
+                + constraints.qR[i] * b
+                + constraints.qO[i] * c
+                + constraints.qM[i] * a * b
+                + constraints.qC[i]
+                == bn128_FR.zero()
+            )
+
+    def test_run_bench(self):
+        results = run_bench(sizes=[2, 3], field_names=["bn128_FR"], schemes=["trivial"])
+        assert [r["gates"] for r in results["results"]] == [4, 8]
+        for result in results["results"]:
+            assert result["prove_s"] > 0
+            assert result["peak_memory_bytes"] > 0
+            assert result["proof_bytes"] > 0
+            assert len(result["prove_counts"]) > 0
+        # Results round trip through JSON
+        assert json.loads(json.dumps(results)) == results
+
+    def test_compare_results(self):
+        baseline = run_bench(
+            sizes=[2],
+            field_names=["bn128_FR"],
+            schemes=["trivial"],
+            measure_memory=False,
+        )
+        assert compare_results(baseline, baseline) == []
+
+        baseline["results"][0]["prove_s"] = 0.05
+        current = json.loads(json.dumps(baseline))
+        result = current["results"][0]
+        result["prove_s"] = 0.1
+        name = next(iter(result["prove_counts"]))
+        result["prove_counts"][name] *= 2
+        regressions = compare_results(baseline, current, threshold=0.1)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("bn128_FR/trivial/k=2 prove_s")
+        # Within the threshold
+        assert compare_results(baseline, current, threshold=2) == []
+
+    def test_main(self, tmp_path):
+        output = str(tmp_path / "results.json")
+        args = ["--sizes", "2", "--fields", "bn128_FR", "--schemes", "trivial"]
+        assert main(args + ["--output", output]) == 0
+        with open(output) as f:
+            baseline = json.load(f)
+        baseline["results"][0]["proof_bytes"] //= 2
+        with open(output, "w") as f:
+            json.dump(baseline, f)
+        assert main(args + ["--baseline", output]) == 1
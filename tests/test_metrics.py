@@ -0,0 +1,106 @@
+import json
+import threading
+import pytest
+from metrics import Counter, Profiler, span, traced
+from plonk import PlonkProver, PlonkVerifier
+from polynomial_commitment_schemes.trivial import TrivialProver, TrivialVerifier
+from algebra.field import bn128_FR
+
+
+class Adder:
+    @Counter
+    def add(self, x, y):
+        return x + y
+
+
+@traced("outer")
+def outer():
+    with span("inner"):
+        return Adder().add(1, 2)
+
+
+class TestProfiler:
+    def test_counter_binds_methods(self):
+        Counter.reset()
+        adder = Adder()
+        assert adder.add(1, 2) == 3
+        assert adder.add(3, 4) == 7
+        assert Counter.call_count["Adder.add"] == 2
+
+    def test_counter_threads(self):
+        Counter.reset()
+        adder = Adder()
+        threads = [
+            threading.Thread(target=lambda: [adder.add(i, 1) for i in range(2000)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert Counter.call_count["Adder.add"] == 8000
+
+    def test_disabled_spans_record_nothing(self):
+        profiler = Profiler()
+        assert outer() == 3
+        assert profiler.records == []
+
+    def test_nested_spans(self):
+        with Profiler(trace_allocations=True) as profiler:
+            outer()
+            outer()
+
+        summary = profiler.summary()
+        assert list(summary.keys()) == ["outer", "outer/inner"]
+        assert summary["outer"]["calls"] == 2
+        assert summary["outer/inner"]["counts"] == {"Adder.add": 2}
+        # Calls in a nested span count towards the enclosing spans too
+        assert summary["outer"]["counts"] == {"Adder.add": 2}
+        assert Counter.span_counts == ()
+        assert summary["outer"]["alloc_bytes"] is not None
+        assert json.loads(profiler.to_json())["outer"]["calls"] == 2
+        events = json.loads(profiler.to_chrome_trace())["traceEvents"]
+        assert sorted(event["name"] for event in events) == [
+            "inner",
+            "inner",
+            "outer",
+            "outer",
+        ]
+
+    def test_only_one_active_profiler(self):
+        with Profiler():
+            with pytest.raises(ValueError):
+                with Profiler():
+                    pass
+
+    def test_prover_rounds(
+        self, constraints, witness, public_inputs, mult_subgroup, preprocessed_input
+    ):
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=TrivialProver[bn128_FR](),
+            constraints=constraints,
+            preprocessed_input=preprocessed_input,
+            mult_subgroup=mult_subgroup,
+            field_class=bn128_FR,
+        )
+        plonk_verifier = PlonkVerifier[bn128_FR](
+            pcs_verifier=TrivialVerifier[bn128_FR](),
+            preprocessed_input=preprocessed_input,
+            mult_subgroup=mult_subgroup,
+            field_class=bn128_FR,
+        )
+
+        with Profiler() as profiler:
+            proof = plonk_prover.prove(witness=witness, public_inputs=public_inputs)
+            assert plonk_verifier.verify(proof=proof, public_inputs=public_inputs)
+
+        summary = profiler.summary()
+        for name in [
+            "commit_wires",
+            "grand_product",
+            "quotient",
+            "evaluations",
+            "openings",
+        ]:
+            assert "plonk.prove/" + name in summary
+        assert "plonk.verify/quotient_identity" in summary
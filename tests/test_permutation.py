@@ -0,0 +1,67 @@
+import pytest
+from algebra.field import bn128_FR
+from permutation import PermutationArgument
+
+
+class TestPermutationArgument:
+    beta = bn128_FR(123456789)
+    gamma = bn128_FR(987654321)
+
+    def get_wire_values(self, constraints, witness):
+        return [
+            [witness[wire.n - 1] for wire in wires]
+            for wires in [constraints.a, constraints.b, constraints.c]
+        ]
+
+    def test_grand_product(self, constraints, witness):
+        wire_values = self.get_wire_values(constraints, witness)
+        s_id_values, s_sigma_values = PermutationArgument.get_permutation_values(
+            constraints=constraints, field_class=bn128_FR
+        )
+        Z_values = PermutationArgument.compute_grand_product(
+            wire_values=wire_values,
+            s_id_values=s_id_values,
+            s_sigma_values=s_sigma_values,
+            beta=self.beta,
+            gamma=self.gamma,
+        )
+
+        expected = [bn128_FR(1)]
+        for i in range(constraints.n):
+            num = bn128_FR(1)
+            den = bn128_FR(1)
+            for j in range(3):
+                num *= wire_values[j][i] + self.beta * s_id_values[j][i] + self.gamma
+                den *= wire_values[j][i] + self.beta * s_sigma_values[j][i] + self.gamma
+            expected.append(expected[-1] * num / den)
+
+        assert Z_values == expected[:-1]
+        # Copy constraints hold, so the product wraps back around to one
+        assert expected[-1] == bn128_FR(1)
+
+    def test_grand_product_rejects_zero_denominator(self, constraints, witness):
+        wire_values = self.get_wire_values(constraints, witness)
+        s_id_values, s_sigma_values = PermutationArgument.get_permutation_values(
+            constraints=constraints, field_class=bn128_FR
+        )
+        # gamma cancels the first factor of g'(1)
+        gamma = -(wire_values[0][0] + self.beta * s_sigma_values[0][0])
+
+        with pytest.raises(ValueError):
+            PermutationArgument.compute_grand_product(
+                wire_values=wire_values,
+                s_id_values=s_id_values,
+                s_sigma_values=s_sigma_values,
+                beta=self.beta,
+                gamma=gamma,
+            )
+
+    def test_shift_values(self):
+        Z_values = [bn128_FR(i) for i in range(4)]
+
+        assert PermutationArgument.shift_values(Z_values) == [
+            bn128_FR(1),
+            bn128_FR(2),
+            bn128_FR(3),
+            bn128_FR(0),
+        ]
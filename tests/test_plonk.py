@@ -1,6 +1,9 @@
+import multiprocessing
+import pytest
+from dataclasses import replace
 from plonk import PlonkProver, PlonkVerifier
 from polynomial_commitment_schemes.trivial import TrivialProver, TrivialVerifier
-from polynomial_commitment_schemes.kzg import KZGProver, KZGVerifier, KZGSRS
+from polynomial_commitment_schemes.kzg import KZGProver, KZGVerifier, KZGSRS, KZGOpening
 from polynomial_commitment_schemes.bulletproofs import (
     BulletproofsCRS,
     BulletproofsProver,
@@ -14,41 +17,21 @@ from algebra.pairing import (
     bn128_FQ12_base,
 )
 from algebra.cyclic_group import bn128_group
-from constraints import PlonkConstraints
 from preprocessor import Preprocessor
 
 
 class TestPlonk:
-    constraints = PlonkConstraints(
-        l=2,
-        m=9,
-        n=4,
-        a=[bn128_FR(1), bn128_FR(3), bn128_FR(5), bn128_FR(8)],
-        b=[bn128_FR(2), bn128_FR(4), bn128_FR(6), bn128_FR(7)],
-        c=[bn128_FR(5), bn128_FR(7), bn128_FR(8), bn128_FR(9)],
-        qL=[bn128_FR(1), bn128_FR(1), bn128_FR(1), bn128_FR(0)],
-        qR=[bn128_FR(0), bn128_FR(0), bn128_FR(1), bn128_FR(0)],
-        qO=[bn128_FR(0), bn128_FR(0), bn128_FR(-1), bn128_FR(-1)],
-        qM=[bn128_FR(0), bn128_FR(0), bn128_FR(0), bn128_FR(1)],
-        qC=[bn128_FR(0), bn128_FR(0), bn128_FR(0), bn128_FR(0)],
-    )
-    mult_subgroup = bn128_FR.get_roots_of_unity(4)
     field_class = bn128_FR
-    preprocessed_input = Preprocessor.preprocess_plonk_constraints(
-        constraints=constraints, mult_subgroup=mult_subgroup, field_class=field_class
-    )
-    witness = [
-        bn128_FR(10),
-        bn128_FR(0),
-        bn128_FR(20),
-        bn128_FR(0),
-        bn128_FR(10),
-        bn128_FR(5),
-        bn128_FR(20),
-        bn128_FR(15),
-        bn128_FR(300),
-    ]
-    public_inputs = [bn128_FR(10), bn128_FR(20)]
+
+    @pytest.fixture(autouse=True)
+    def circuit(
+        self, constraints, witness, public_inputs, mult_subgroup, preprocessed_input
+    ):
+        self.constraints = constraints
+        self.witness = witness
+        self.public_inputs = public_inputs
+        self.mult_subgroup = mult_subgroup
+        self.preprocessed_input = preprocessed_input
 
     def test_plonk_trivial_pcs(self):
         pcs_prover = TrivialProver[bn128_FR]()
@@ -139,3 +122,241 @@ class TestPlonk:
             proof=proof, public_inputs=self.public_inputs
         )
         assert valid_proof
+
+    def test_plonk_quotient_debug_checks(self):
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=TrivialProver[bn128_FR](),
+            constraints=self.constraints,
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+            debug_checks=True,
+        )
+        plonk_verifier = PlonkVerifier[bn128_FR](
+            pcs_verifier=TrivialVerifier[bn128_FR](),
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+
+        proof = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+        assert plonk_verifier.verify(proof=proof, public_inputs=self.public_inputs)
+
+        bad_witness = self.witness[:-1] + [bn128_FR(301)]
+        with pytest.raises(AssertionError):
+            plonk_prover.prove(witness=bad_witness, public_inputs=self.public_inputs)
+
+    def test_plonk_preprocessed_evals(self):
+        preprocessed_input = Preprocessor.preprocess_plonk_constraints(
+            constraints=self.constraints,
+            mult_subgroup=self.mult_subgroup,
+            field_class=bn128_FR,
+            precompute_coset_evals=True,
+        )
+        # Same polynomials without any cached evaluations, filled on first use
+        bare_input = replace(preprocessed_input)
+        assert bare_input.domain_evals == {} and bare_input.coset_evals == {}
+
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=TrivialProver[bn128_FR](),
+            constraints=self.constraints,
+            preprocessed_input=preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+        plonk_verifier = PlonkVerifier[bn128_FR](
+            pcs_verifier=TrivialVerifier[bn128_FR](),
+            preprocessed_input=bare_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+
+        proof = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+        assert plonk_verifier.verify(proof=proof, public_inputs=self.public_inputs)
+        # The verifier evaluates the preprocessed polynomials from coefficients
+        assert bare_input.domain_evals == {}
+        assert bare_input.get_domain_evals(
+            "S2", self.mult_subgroup
+        ) == preprocessed_input.get_domain_evals("S2", self.mult_subgroup)
+        assert len(preprocessed_input.coset_evals["PqM"].values) == 16
+
+        # Same subgroup with another generator must not reuse the cached values
+        other_subgroup = [self.mult_subgroup[0]] + self.mult_subgroup[:0:-1]
+        assert list(preprocessed_input.get_domain_evals("S2", other_subgroup)) == [
+            preprocessed_input.S2(x) for x in other_subgroup
+        ]
+
+    def test_plonk_non_subgroup_domain(self):
+        domain = [bn128_FR(1), bn128_FR(2), bn128_FR(3), bn128_FR(4)]
+        preprocessed_input = Preprocessor.preprocess_plonk_constraints(
+            constraints=self.constraints, mult_subgroup=domain, field_class=bn128_FR
+        )
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=TrivialProver[bn128_FR](),
+            constraints=self.constraints,
+            preprocessed_input=preprocessed_input,
+            mult_subgroup=domain,
+            field_class=self.field_class,
+        )
+        plonk_verifier = PlonkVerifier[bn128_FR](
+            pcs_verifier=TrivialVerifier[bn128_FR](),
+            preprocessed_input=preprocessed_input,
+            mult_subgroup=domain,
+            field_class=self.field_class,
+        )
+
+        proof = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+        assert plonk_verifier.verify(proof=proof, public_inputs=self.public_inputs)
+
+    def test_plonk_kzg_verify_batch(self):
+        pairing = bn128_pairing()
+        srs = KZGSRS.trusted_setup(d=10, pairing=pairing, field_class=self.field_class)
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=KZGProver(
+                srs=srs, pairing=pairing, field_class=self.field_class
+            ),
+            constraints=self.constraints,
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+        plonk_verifier = PlonkVerifier[bn128_FR](
+            pcs_verifier=KZGVerifier(
+                srs=srs, pairing=pairing, field_class=self.field_class
+            ),
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+
+        proof = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+        bad_public_inputs = [bn128_FR(10), bn128_FR(21)]
+        bad_opening_proof = replace(proof, batch_op=KZGOpening(value=pairing.g_1))
+
+        assert plonk_verifier.verify_batch(
+            proofs=[proof, proof], public_inputs_list=[self.public_inputs] * 2
+        ) == [True, True]
+        assert plonk_verifier.verify_batch(
+            proofs=[proof, proof, bad_opening_proof],
+            public_inputs_list=[self.public_inputs, bad_public_inputs]
+            + [self.public_inputs],
+        ) == [True, False, False]
+
+    def test_plonk_prove_many(self):
+        cyclic_group_class = bn128_group
+        crs = BulletproofsCRS.common_setup(d=16, cyclic_group_class=cyclic_group_class)
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=BulletproofsProver[bn128_FR, bn128_group](
+                crs=crs, field_class=bn128_FR, cyclic_group_class=cyclic_group_class
+            ),
+            constraints=self.constraints,
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+        plonk_verifier = PlonkVerifier[bn128_FR](
+            pcs_verifier=BulletproofsVerifier[bn128_FR, bn128_group](
+                crs=crs, field_class=bn128_FR, cyclic_group_class=cyclic_group_class
+            ),
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+
+        results = list(
+            plonk_prover.prove_many(
+                witnesses=[self.witness] * 5,
+                public_inputs=[self.public_inputs] * 5,
+                max_workers=2,
+                chunksize=2,
+            )
+        )
+        assert sorted(index for index, _ in results) == [0, 1, 2, 3, 4]
+        expected = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+        for _, proof in results:
+            assert proof == expected
+            assert plonk_verifier.verify(proof=proof, public_inputs=self.public_inputs)
+
+        with pytest.raises(ValueError):
+            list(plonk_prover.prove_many(witnesses=[self.witness], public_inputs=[]))
+
+    @pytest.mark.parametrize("scheme", ["trivial", "kzg", "bulletproofs"])
+    def test_plonk_prove_many_spawn(self, scheme):
+        if scheme == "trivial":
+            pcs_prover = TrivialProver[bn128_FR]()
+        elif scheme == "kzg":
+            pairing = bn128_pairing()
+            srs = KZGSRS.trusted_setup(d=10, pairing=pairing, field_class=bn128_FR)
+            pcs_prover = KZGProver(srs=srs, pairing=pairing, field_class=bn128_FR)
+        else:
+            crs = BulletproofsCRS.common_setup(d=16, cyclic_group_class=bn128_group)
+            pcs_prover = BulletproofsProver(
+                crs=crs, field_class=bn128_FR, cyclic_group_class=bn128_group
+            )
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=pcs_prover,
+            constraints=self.constraints,
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+        # Proving first builds the fixed-base tables cached on the SRS or CRS
+        expected = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+        results = dict(
+            plonk_prover.prove_many(
+                witnesses=[self.witness] * 2,
+                public_inputs=[self.public_inputs] * 2,
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        )
+        assert results == {0: expected, 1: expected}
+
+    def test_plonk_prover_pool(self):
+        cyclic_group_class = bn128_group
+        crs = BulletproofsCRS.common_setup(d=16, cyclic_group_class=cyclic_group_class)
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=BulletproofsProver[bn128_FR, bn128_group](
+                crs=crs, field_class=bn128_FR, cyclic_group_class=cyclic_group_class
+            ),
+            constraints=self.constraints,
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=self.field_class,
+        )
+        expected = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+
+        plonk_prover.start_pool(max_workers=2)
+        try:
+            with pytest.raises(ValueError):
+                plonk_prover.start_pool()
+            proof = plonk_prover.prove(
+                witness=self.witness, public_inputs=self.public_inputs
+            )
+            # Workers for batch proving receive the prover without its pool
+            [(_, batch_proof)] = list(
+                plonk_prover.prove_many(
+                    witnesses=[self.witness],
+                    public_inputs=[self.public_inputs],
+                    max_workers=1,
+                )
+            )
+        finally:
+            plonk_prover.close_pool()
+        assert plonk_prover.pool is None
+        assert proof == expected
+        assert batch_proof == expected
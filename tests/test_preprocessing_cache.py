@@ -0,0 +1,69 @@
+import os
+from algebra.field import bn128_FR
+from algebra.pairing import bn128_pairing
+from constraints import PlonkConstraints
+from preprocessor import Preprocessor, PlonkPreprocessedInput
+from preprocessing_cache import PreprocessingCache
+from polynomial_commitment_schemes.kzg import KZGProver, KZGSRS
+
+
+class TestPreprocessingCache:
+    def test_round_trip(self, tmp_path, constraints, mult_subgroup):
+        cache = PreprocessingCache[bn128_FR](cache_dir=str(tmp_path))
+        expected = Preprocessor.preprocess_plonk_constraints(
+            constraints=constraints,
+            mult_subgroup=mult_subgroup,
+            field_class=bn128_FR,
+        )
+
+        first = cache.load_or_preprocess(
+            constraints=constraints,
+            mult_subgroup=mult_subgroup,
+            field_class=bn128_FR,
+        )
+        assert len(os.listdir(tmp_path)) == 1
+        second = cache.load_or_preprocess(
+            constraints=constraints,
+            mult_subgroup=mult_subgroup,
+            field_class=bn128_FR,
+        )
+        assert first == expected
+        assert second == expected
+
+    def test_key_depends_on_constraints(self, constraints, mult_subgroup):
+        other = PlonkConstraints(**{**vars(constraints), "qC": [bn128_FR(1)] * 4})
+
+        assert PreprocessingCache.get_key(
+            constraints, mult_subgroup, bn128_FR
+        ) != PreprocessingCache.get_key(other, mult_subgroup, bn128_FR)
+
+    def test_commitments(self, tmp_path, constraints, mult_subgroup):
+        pairing = bn128_pairing()
+        srs = KZGSRS.trusted_setup(d=8, pairing=pairing, field_class=bn128_FR)
+        pcs_prover = KZGProver(srs=srs, pairing=pairing, field_class=bn128_FR)
+        cache = PreprocessingCache[bn128_FR](cache_dir=str(tmp_path))
+
+        for _ in range(2):
+            preprocessed_input, cms = cache.load_or_commit(
+                constraints=constraints,
+                mult_subgroup=mult_subgroup,
+                field_class=bn128_FR,
+                pcs_prover=pcs_prover,
+            )
+            assert cms == [
+                pcs_prover.commit(getattr(preprocessed_input, name))
+                for name in PlonkPreprocessedInput.poly_names()
+            ]
+
+    def test_lru_eviction(self, tmp_path):
+        cache = PreprocessingCache[bn128_FR](cache_dir=str(tmp_path))
+        cache._write(cache._get_path("a"), bytes(100))
+        cache._write(cache._get_path("b"), bytes(100))
+        cache._write(cache._get_path("c"), bytes(100))
+        os.utime(cache._get_path("a"), (1, 1))
+        os.utime(cache._get_path("b"), (3, 3))
+        os.utime(cache._get_path("c"), (2, 2))
+
+        cache.max_bytes = 250
+        cache._write(cache._get_path("d"), bytes(100))
+        assert sorted(os.listdir(tmp_path)) == ["b.bin", "d.bin"]
@@ -0,0 +1,141 @@
+import io
+import pytest
+from plonk import PlonkProver, PlonkVerifier
+from proof_codec import PlonkProofCodec
+from polynomial_commitment_schemes.trivial import TrivialProver, TrivialVerifier
+from polynomial_commitment_schemes.kzg import KZGProver, KZGVerifier, KZGSRS
+from polynomial_commitment_schemes.bulletproofs import (
+    BulletproofsCRS,
+    BulletproofsProver,
+    BulletproofsVerifier,
+)
+from algebra.field import bn128_FR
+from algebra.pairing import bn128_pairing, bn128_FQ_base
+from algebra.cyclic_group import bn128_group
+
+
+class TestPlonkProofCodec:
+    @pytest.fixture(autouse=True)
+    def circuit(
+        self, constraints, witness, public_inputs, mult_subgroup, preprocessed_input
+    ):
+        self.constraints = constraints
+        self.witness = witness
+        self.public_inputs = public_inputs
+        self.mult_subgroup = mult_subgroup
+        self.preprocessed_input = preprocessed_input
+
+    def prove_and_verify(self, pcs_prover, pcs_verifier, codec):
+        plonk_prover = PlonkProver[bn128_FR](
+            pcs_prover=pcs_prover,
+            constraints=self.constraints,
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=bn128_FR,
+        )
+        plonk_verifier = PlonkVerifier[bn128_FR](
+            pcs_verifier=pcs_verifier,
+            preprocessed_input=self.preprocessed_input,
+            mult_subgroup=self.mult_subgroup,
+            field_class=bn128_FR,
+        )
+        proof = plonk_prover.prove(
+            witness=self.witness, public_inputs=self.public_inputs
+        )
+
+        data = codec.encode(proof)
+        decoded = codec.decode(memoryview(data))
+        assert decoded == proof
+        assert codec.encode(decoded) == data
+        assert plonk_verifier.verify(proof=decoded, public_inputs=self.public_inputs)
+        return data
+
+    def test_trivial(self):
+        codec = PlonkProofCodec[bn128_FR](field_class=bn128_FR)
+        data = self.prove_and_verify(
+            TrivialProver[bn128_FR](), TrivialVerifier[bn128_FR](), codec
+        )
+
+        # Trivial proofs have no points to compress, so only flag 0 is valid
+        for flag in [1, 7]:
+            with pytest.raises(ValueError):
+                codec.decode(data[:2] + bytes([flag]) + data[3:])
+        compressed_codec = PlonkProofCodec[bn128_FR](
+            field_class=bn128_FR, compressed=True
+        )
+        assert compressed_codec.encode(codec.decode(data)) == data
+
+        # T_eval is last, and T_eval + p would decode to the same proof
+        T_eval = int.from_bytes(data[-32:], "big")
+        with pytest.raises(ValueError):
+            codec.decode(
+                data[:-32] + (T_eval + bn128_FR.field_modulus).to_bytes(32, "big")
+            )
+
+    def test_kzg(self):
+        pairing = bn128_pairing()
+        srs = KZGSRS.trusted_setup(d=10, pairing=pairing, field_class=bn128_FR)
+        pcs_prover = KZGProver(srs=srs, pairing=pairing, field_class=bn128_FR)
+        pcs_verifier = KZGVerifier(srs=srs, pairing=pairing, field_class=bn128_FR)
+
+        data = self.prove_and_verify(
+            pcs_prover,
+            pcs_verifier,
+            PlonkProofCodec[bn128_FR](field_class=bn128_FR, pairing=pairing),
+        )
+        compressed_data = self.prove_and_verify(
+            pcs_prover,
+            pcs_verifier,
+            PlonkProofCodec[bn128_FR](
+                field_class=bn128_FR, pairing=pairing, compressed=True
+            ),
+        )
+        # 7 points of 64 bytes, 6 evaluations of 32 bytes and a 3 byte header
+        assert len(data) == 3 + 7 * 64 + 6 * 32
+        assert len(compressed_data) == 3 + 7 * 32 + 6 * 32
+
+        codec = PlonkProofCodec[bn128_FR](field_class=bn128_FR, pairing=pairing)
+        with pytest.raises(ValueError):
+            codec.decode(data[:2] + bytes([2]) + data[3:])
+
+        # Flipping a bit of the y coordinate of f_L_cm moves it off the curve
+        codec = PlonkProofCodec[bn128_FR](field_class=bn128_FR, pairing=pairing)
+        corrupted = bytearray(data)
+        corrupted[3 + 63] ^= 1
+        with pytest.raises(ValueError):
+            codec.decode(bytes(corrupted))
+
+        # x = p would decode to the same point as x = 0
+        codec = PlonkProofCodec[bn128_FR](
+            field_class=bn128_FR, pairing=pairing, compressed=True
+        )
+        corrupted = bytearray(compressed_data)
+        corrupted[3 : 3 + 32] = bn128_FQ_base.field_modulus.to_bytes(32, "big")
+        with pytest.raises(ValueError):
+            codec.decode(bytes(corrupted))
+
+    def test_bulletproofs_stream(self):
+        crs = BulletproofsCRS.common_setup(d=16, cyclic_group_class=bn128_group)
+        pcs_prover = BulletproofsProver(
+            crs=crs, field_class=bn128_FR, cyclic_group_class=bn128_group
+        )
+        pcs_verifier = BulletproofsVerifier(
+            crs=crs, field_class=bn128_FR, cyclic_group_class=bn128_group
+        )
+        codec = PlonkProofCodec[bn128_FR](
+            field_class=bn128_FR, cyclic_group_class=bn128_group
+        )
+        data = self.prove_and_verify(pcs_prover, pcs_verifier, codec)
+        proof = codec.decode(data)
+
+        stream = io.BytesIO()
+        codec.write_proofs(stream, [proof, proof])
+        stream.seek(0)
+        assert [codec.encode(p) for p in codec.read_proofs(stream)] == [data, data]
+
+    def test_rejects_bad_data(self):
+        codec = PlonkProofCodec[bn128_FR](field_class=bn128_FR)
+        with pytest.raises(ValueError):
+            codec.decode(bytes([2, 0, 0]))
+        with pytest.raises(ValueError):
+            codec.decode(bytes([1, 0, 0, 0, 0]))
@@ -0,0 +1,34 @@
+import hashlib
+from Crypto.Hash import keccak
+from algebra.field import bn128_FR
+from transcript import Transcript
+
+
+class TestTranscript:
+    entries = [bn128_FR(12), bn128_FR(3456), bn128_FR(-1)]
+
+    def test_incremental_hash(self):
+        transcript = Transcript(field_class=bn128_FR)
+        record = bytearray()
+        for entry in self.entries:
+            transcript.append(entry)
+            record.extend(entry.to_bytes())
+
+        expected = hashlib.sha3_256(bytes(record) + bytes(2)).digest()
+        assert transcript.get_hash(salt=bytes(2)) == bn128_FR(
+            int.from_bytes(expected, "big")
+        )
+        # Salts must not be absorbed into the running state
+        expected = hashlib.sha3_256(bytes(record)).digest()
+        assert transcript.get_hash() == bn128_FR(int.from_bytes(expected, "big"))
+
+    def test_legacy_hash(self):
+        transcript = Transcript(field_class=bn128_FR, legacy=True)
+        record = bytearray()
+        for entry in self.entries:
+            transcript.append(entry)
+            record.extend(entry.to_bytes())
+
+        k = keccak.new(digest_bits=256)
+        k.update(bytes(record) + bytes(1))
+        assert transcript.get_hash(salt=bytes(1)) == bn128_FR(int(k.hexdigest(), 16))
@@ -1,10 +1,71 @@
-from typing import List, Tuple, Any, Union, overload
-from algebra.field import FElt
+import operator
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Any, Union, overload
+from algebra.field import FElt, FieldVector
 from algebra.cyclic_group import CyclicGroupElt
 from metrics import Counter
 
 
-# TODO: Better algorithms for MSM
+# Bucket window size in bits, grows with ln(n) for larger inputs
+def msm_window_size(n: int) -> int:
+    if n < 32:
+        return 3
+    return (n.bit_length() - 1) * 69 // 100 + 2
+
+
+# Pippenger's bucket method over any group given by its addition and identity
+# Points are grouped into buckets per window of c scalar bits, so an MSM of
+# size n costs roughly (b / c) * (n + 2^c) additions for b-bit scalars
+def pippenger_msm(
+    scalars: List[int],
+    points: List[Any],
+    add: Callable[[Any, Any], Any],
+    identity: Any,
+    window_size: int = 0,
+) -> Any:
+    if len(scalars) != len(points):
+        raise ValueError(
+            "Length of scalars must be the same as those of group elements!"
+        )
+    c = window_size if window_size > 0 else msm_window_size(len(scalars))
+    mask = (1 << c) - 1
+    num_bits = max([scalar.bit_length() for scalar in scalars], default=0)
+    num_windows = (num_bits + c - 1) // c
+
+    res = identity
+    for w in reversed(range(num_windows)):
+        for _ in range(c):
+            res = add(res, res)
+
+        # An empty bucket is None, which saves an addition with the identity
+        buckets: List[Any] = [None] * mask
+        for scalar, point in zip(scalars, points):
+            index = (scalar >> (w * c)) & mask
+            if index != 0:
+                bucket = buckets[index - 1]
+                buckets[index - 1] = point if bucket is None else add(bucket, point)
+
+        # Sum of i * bucket_i computed with running sums from the top bucket down
+        running_sum = None
+        window_sum = None
+        for bucket in reversed(buckets):
+            if bucket is not None:
+                running_sum = (
+                    bucket if running_sum is None else add(running_sum, bucket)
+                )
+            if running_sum is not None:
+                window_sum = (
+                    running_sum if window_sum is None else add(window_sum, running_sum)
+                )
+        if window_sum is not None:
+            res = add(res, window_sum)
+
+    return res
+
+
 @Counter
 def multi_scalar_multiplication(
     scalars: List[FElt], groupElts: List[CyclicGroupElt]
@@ -13,7 +74,12 @@ def multi_scalar_multiplication(
         raise ValueError(
             "Length of scalars must be the same as those of group elements!"
         )
-    return sum([g * s for g, s in zip(groupElts, scalars)], groupElts[0].identity())
+    return pippenger_msm(
+        scalars=[s.n for s in scalars],
+        points=groupElts,
+        add=operator.add,
+        identity=groupElts[0].identity(),
+    )
 
 
 @Counter
@@ -23,48 +89,214 @@ def scalar_dot_product(aa: List[FElt], bb: List[FElt]) -> FElt:
     return sum([a * b for a, b in zip(aa, bb)], aa[0].zero())
 
 
-@Counter
-def split_vec(vec: List[Any]) -> Tuple[List[Any], List[Any]]:
-    if len(vec) % 2 != 0:
-        raise ValueError("Cannot split vector of odd length!")
-    return (vec[: len(vec) // 2], vec[len(vec) // 2 :])
-
-
 @overload
-def scale_vec(vec: List[FElt], scalar: FElt) -> List[FElt]:
+def batch_inverse(elements: List[FElt]) -> List[FElt]:
     ...
 
 
 @overload
-def scale_vec(vec: List[CyclicGroupElt], scalar: FElt) -> List[CyclicGroupElt]:
+def batch_inverse(elements: FieldVector[FElt]) -> FieldVector[FElt]:
     ...
 
 
+# Inverts every element with one field inversion and 3(n-1) multiplications
+# using Montgomery's trick. Zero elements have no inverse and are left as zero
 @Counter
-def scale_vec(
-    vec: Union[List[FElt], List[CyclicGroupElt]], scalar: FElt
-) -> Union[List[FElt], List[CyclicGroupElt]]:
-    return [val * scalar for val in vec]
+def batch_inverse(
+    elements: Union[List[FElt], FieldVector[FElt]]
+) -> Union[List[FElt], FieldVector[FElt]]:
+    if isinstance(elements, FieldVector):
+        return elements.inverse()
+    if len(elements) == 0:
+        return []
+    return FieldVector.from_elts(type(elements[0]), elements).inverse().to_elts()
 
 
-@overload
-def add_vec(self, a: List[FElt], b: List[FElt]) -> List[FElt]:
-    ...
+# Folds the first 2 * half entries of vec into its low half in place, setting
+# vec[i] = vec[i] * lo + vec[i + half] * hi for field or group elements
+@Counter
+def fold_vec(vec: List[Any], half: int, lo: FElt, hi: FElt) -> None:
+    for i in range(half):
+        vec[i] = vec[i] * lo + vec[i + half] * hi
 
 
-@overload
-def add_vec(
-    self, a: List[CyclicGroupElt], b: List[CyclicGroupElt]
-) -> List[CyclicGroupElt]:
-    ...
+# Same as fold_vec for field elements given as canonical ints modulo p
+@Counter
+def fold_int_vec(vec: List[int], half: int, lo: int, hi: int, p: int) -> None:
+    for i in range(half):
+        vec[i] = (vec[i] * lo + vec[i + half] * hi) % p
 
 
-# TODO: Can have better type annotations for return value
-@Counter
-def add_vec(
-    aa: Union[List[FElt], List[CyclicGroupElt]],
-    bb: Union[List[FElt], List[CyclicGroupElt]],
-) -> List[Any]:
-    if len(aa) != len(bb):
-        raise ValueError("Length of both vectors must be the same!")
-    return [a + b for a, b in zip(aa, bb)]
+# Sum of aa[aa_start + i] * bb[bb_start + i] for i < length, modulo p
+def int_dot_product(
+    aa: List[int], aa_start: int, bb: List[int], bb_start: int, length: int, p: int
+) -> int:
+    res = 0
+    for i in range(length):
+        res += aa[aa_start + i] * bb[bb_start + i]
+    return res % p
+
+
+# Precomputed multiples of a fixed base: row i holds j * 2^(w * i) * base for
+# 1 <= j < 2^w, so a multiplication is one lookup and addition per w-bit window
+class FixedBaseTable:
+    def __init__(
+        self,
+        base: Any,
+        add: Callable[[Any, Any], Any],
+        identity: Any,
+        num_bits: int,
+        window_size: int = 4,
+    ) -> None:
+        self.add: Callable[[Any, Any], Any] = add
+        self.identity: Any = identity
+        self.num_bits: int = num_bits
+        self.window_size: int = window_size
+
+        self.rows: List[List[Any]] = []
+        window_base = base
+        for _ in range((num_bits + window_size - 1) // window_size):
+            row = [window_base]
+            for _ in range((1 << window_size) - 2):
+                row.append(add(row[-1], window_base))
+            self.rows.append(row)
+            window_base = add(row[-1], window_base)
+
+    @Counter
+    def multiply(self, scalar: int) -> Any:
+        if scalar < 0 or scalar.bit_length() > self.num_bits:
+            raise ValueError("Scalar is out of range of fixed base table!")
+
+        mask = (1 << self.window_size) - 1
+        res = None
+        for i, row in enumerate(self.rows):
+            digit = (scalar >> (i * self.window_size)) & mask
+            if digit != 0:
+                res = row[digit - 1] if res is None else self.add(res, row[digit - 1])
+
+        return self.identity if res is None else res
+
+
+# MSM against a fixed vector of points, such as an SRS or CRS, with the points
+# split into chunks of chunk_size that are dealt out round-robin to num_workers
+# processes. Each worker receives its own chunks once when it starts, so a call
+# only sends scalars and receives one partial sum per worker
+# Calls with fewer than serial_threshold scalars run in this process, as do
+# calls from any other process, such as a forked or unpickled copy
+# add is sent to the workers, so must be picklable under spawn and forkserver,
+# such as operator.add or a pairing's add_G_1
+class ParallelMSM:
+    def __init__(
+        self,
+        points: Sequence[Any],
+        add: Callable[[Any, Any], Any],
+        identity: Any,
+        num_workers: int = 0,
+        chunk_size: int = 1 << 10,
+        serial_threshold: int = 1 << 12,
+        mp_context: Optional[BaseContext] = None,
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive!")
+        self.points: Sequence[Any] = points
+        self.add: Callable[[Any, Any], Any] = add
+        self.identity: Any = identity
+        self.num_workers: int = num_workers if num_workers > 0 else os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        self.serial_threshold: int = serial_threshold
+        self.pid: Optional[int] = os.getpid()
+
+        # One single-process executor per worker, so each task reaches the worker
+        # holding its chunks
+        self.executors: List[ProcessPoolExecutor] = []
+        try:
+            pickle.dumps(add)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            raise ValueError("Add function of a parallel MSM must be picklable!")
+        num_chunks = (len(points) + chunk_size - 1) // chunk_size
+        for w in range(min(self.num_workers, num_chunks)):
+            chunks = {
+                i: list(points[i * chunk_size : (i + 1) * chunk_size])
+                for i in range(w, num_chunks, self.num_workers)
+            }
+            self.executors.append(
+                ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=mp_context,
+                    initializer=_init_msm_worker,
+                    initargs=(chunks, add, identity),
+                )
+            )
+
+    # Copies never own the workers
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["executors"] = []
+        state["pid"] = None
+        return state
+
+    # MSM of the scalars with the first len(scalars) points
+    def __call__(self, scalars: List[int]) -> Any:
+        if len(scalars) > len(self.points):
+            raise ValueError("More scalars than points to multiply!")
+        if (
+            len(scalars) < self.serial_threshold
+            or len(self.executors) == 0
+            or self.pid != os.getpid()
+        ):
+            return pippenger_msm(
+                scalars=scalars,
+                points=list(self.points[: len(scalars)]),
+                add=self.add,
+                identity=self.identity,
+            )
+
+        tasks: List[List[Tuple[int, List[int]]]] = [[] for _ in self.executors]
+        for i in range(0, len(scalars), self.chunk_size):
+            chunk_index = i // self.chunk_size
+            tasks[chunk_index % self.num_workers].append(
+                (chunk_index, scalars[i : i + self.chunk_size])
+            )
+        futures = [
+            executor.submit(_msm_on_worker, chunks)
+            for executor, chunks in zip(self.executors, tasks)
+            if len(chunks) > 0
+        ]
+        res = self.identity
+        for future in futures:
+            res = self.add(res, future.result())
+        return res
+
+    def close(self) -> None:
+        for executor in self.executors:
+            executor.shutdown(wait=True)
+        self.executors = []
+
+
+# ---------- Worker processes of ParallelMSM ----------
+_worker_chunks: Dict[int, List[Any]] = {}
+_worker_add: Optional[Callable[[Any, Any], Any]] = None
+_worker_identity: Any = None
+
+
+def _init_msm_worker(
+    chunks: Dict[int, List[Any]], add: Callable[[Any, Any], Any], identity: Any
+) -> None:
+    global _worker_chunks, _worker_add, _worker_identity
+    _worker_chunks = chunks
+    _worker_add = add
+    _worker_identity = identity
+
+
+# One MSM over all of this worker's chunks in the call, rather than one per chunk
+def _msm_on_worker(chunks: List[Tuple[int, List[int]]]) -> Any:
+    if _worker_add is None:
+        raise ValueError("Worker has not been initialized with points!")
+    scalars: List[int] = []
+    points: List[Any] = []
+    for chunk_index, chunk_scalars in chunks:
+        scalars.extend(chunk_scalars)
+        points.extend(_worker_chunks[chunk_index][: len(chunk_scalars)])
+    return pippenger_msm(
+        scalars=scalars, points=points, add=_worker_add, identity=_worker_identity
+    )
@@ -0,0 +1,223 @@
+import mmap
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type, Union, overload
+from py_ecc.fields.optimized_field_elements import FQ, FQ2
+from algebra.pairing import (
+    Point3D,
+    to_affine,
+    bn128_base,
+    bls12_381_base,
+    bn128_FQ_base,
+    bls12_381_FQ_base,
+    bn128_FQ2_base,
+    bls12_381_FQ2_base,
+)
+
+# Fixed-width big-endian encodings of field elements and curve points
+# The point at infinity is encoded as all zero coordinates, which is never on
+# the curves used here since b != 0
+
+# Curve module of py_ecc for each base field and each G_2 field
+_curves: Dict[Any, Any] = {
+    bn128_FQ_base: bn128_base,
+    bls12_381_FQ_base: bls12_381_base,
+}
+_curves_G_2: Dict[Any, Any] = {
+    bn128_FQ2_base: bn128_base,
+    bls12_381_FQ2_base: bls12_381_base,
+}
+
+
+# Decoded points come from untrusted proofs or shared SRS files, so they must
+# have canonical coordinates, lie on the curve and lie in the prime order
+# subgroup. bn128 G_1 has cofactor 1, the other groups need the order check,
+# which costs a scalar multiplication and may be skipped for trusted data
+def _check_point(p: Point3D[Any], curve: Any, b: Any, check_subgroup: bool) -> None:
+    if not curve.is_on_curve(p, b):
+        raise ValueError("Point is not on the curve!")
+    if check_subgroup and not curve.is_inf(curve.multiply(p, curve.curve_order)):
+        raise ValueError("Point is not in the prime order subgroup!")
+
+
+def _get_curve(base_field_class: Type[FQ]) -> Any:
+    if base_field_class not in _curves:
+        raise ValueError("Unsupported curve for point decoding!")
+    return _curves[base_field_class]
+
+
+def _check_canonical(xs: List[int], modulus: int) -> None:
+    if any(x >= modulus for x in xs):
+        raise ValueError("Encoded coordinate is not reduced mod the field modulus!")
+
+
+def get_width(field_modulus: int) -> int:
+    return (field_modulus.bit_length() + 7) // 8
+
+
+def encode_ints(xs: List[int], width: int) -> bytes:
+    res = bytearray()
+    for x in xs:
+        res.extend(x.to_bytes(width, "big"))
+    return bytes(res)
+
+
+def decode_ints(data: Union[bytes, memoryview], width: int) -> List[int]:
+    if len(data) % width != 0:
+        raise ValueError("Length of data must be a multiple of the width!")
+    return [
+        int.from_bytes(data[i : i + width], "big") for i in range(0, len(data), width)
+    ]
+
+
+def encode_G_1(p: Point3D[FQ], base_field_class: Type[FQ]) -> bytes:
+    width = get_width(base_field_class.field_modulus)
+    affine = to_affine(p)
+    if affine is None:
+        return bytes(2 * width)
+    return encode_ints([affine[0].n, affine[1].n], width)
+
+
+def decode_G_1(
+    data: Union[bytes, memoryview],
+    base_field_class: Type[FQ],
+    check_subgroup: bool = True,
+) -> Point3D[FQ]:
+    curve = _get_curve(base_field_class)
+    x, y = decode_ints(data, get_width(base_field_class.field_modulus))
+    if x == 0 and y == 0:
+        return (base_field_class.one(), base_field_class.one(), base_field_class.zero())
+    _check_canonical([x, y], base_field_class.field_modulus)
+    p = (base_field_class(x), base_field_class(y), base_field_class.one())
+    _check_point(p, curve, curve.b, check_subgroup and curve is not bn128_base)
+    return p
+
+
+def encode_G_2(p: Point3D[FQ2], g2_field_class: Type[FQ2]) -> bytes:
+    width = get_width(g2_field_class.field_modulus)
+    affine = to_affine(p)
+    if affine is None:
+        return bytes(4 * width)
+    return encode_ints(list(affine[0].coeffs) + list(affine[1].coeffs), width)
+
+
+def decode_G_2(
+    data: Union[bytes, memoryview], g2_field_class: Type[FQ2]
+) -> Point3D[FQ2]:
+    if g2_field_class not in _curves_G_2:
+        raise ValueError("Unsupported curve for point decoding!")
+    curve = _curves_G_2[g2_field_class]
+    x_0, x_1, y_0, y_1 = decode_ints(data, get_width(g2_field_class.field_modulus))
+    if x_0 == 0 and x_1 == 0 and y_0 == 0 and y_1 == 0:
+        return (g2_field_class.one(), g2_field_class.one(), g2_field_class.zero())
+    _check_canonical([x_0, x_1, y_0, y_1], g2_field_class.field_modulus)
+    p = (
+        g2_field_class([x_0, x_1]),
+        g2_field_class([y_0, y_1]),
+        g2_field_class.one(),
+    )
+    _check_point(p, curve, curve.b2, True)
+    return p
+
+
+# Compressed points keep only x, with the top bit of the first byte flagging the
+# point at infinity and the next bit flagging whether y is the larger square root
+def encode_G_1_compressed(p: Point3D[FQ], base_field_class: Type[FQ]) -> bytes:
+    modulus = base_field_class.field_modulus
+    res = bytearray(get_width(modulus))
+    affine = to_affine(p)
+    if affine is None:
+        res[0] = 0x80
+        return bytes(res)
+    res[:] = affine[0].n.to_bytes(len(res), "big")
+    if affine[1].n > (modulus - 1) // 2:
+        res[0] |= 0x40
+    return bytes(res)
+
+
+# Recovers y from y^2 = x^3 + b, using that both base fields have p = 3 mod 4
+def decode_G_1_compressed(
+    data: Union[bytes, memoryview],
+    base_field_class: Type[FQ],
+    check_subgroup: bool = True,
+) -> Point3D[FQ]:
+    curve = _get_curve(base_field_class)
+    modulus = base_field_class.field_modulus
+    # Masks off the two flag bits
+    x = int.from_bytes(data, "big") & ((1 << (8 * len(data) - 2)) - 1)
+    if data[0] & 0x80:
+        if x != 0 or data[0] & 0x40:
+            raise ValueError("Point at infinity must have no other bits set!")
+        return (base_field_class.one(), base_field_class.one(), base_field_class.zero())
+
+    _check_canonical([x], modulus)
+    y_squared = (x * x * x + curve.b.n) % modulus
+    y = pow(y_squared, (modulus + 1) // 4, modulus)
+    if y * y % modulus != y_squared:
+        raise ValueError("Point is not on the curve!")
+    if (y > (modulus - 1) // 2) != bool(data[0] & 0x40):
+        y = modulus - y
+    p = (base_field_class(x), base_field_class(y), base_field_class.one())
+    _check_point(p, curve, curve.b, check_subgroup and curve is not bn128_base)
+    return p
+
+
+# Read-only sequence of points stored at a fixed width in a buffer, such as a
+# memory-mapped file. Points are decoded on first access and then kept
+# Points mapped from path are pickled without the map, which copies reopen
+class LazyPoints(Sequence):
+    def __init__(
+        self,
+        buffer: Any,
+        offset: int,
+        count: int,
+        width: int,
+        decode: Callable[[bytes], Point3D],
+        path: Optional[str] = None,
+    ) -> None:
+        self.buffer: Any = buffer
+        self.offset: int = offset
+        self._count: int = count
+        self.width: int = width
+        self.decode: Callable[[bytes], Point3D] = decode
+        self.path: Optional[str] = path
+        self.points: Dict[int, Point3D] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if self.path is None:
+            raise ValueError("Only points mapped from a file can be pickled!")
+        state = self.__dict__.copy()
+        state["buffer"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        with open(state["path"], "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> Point3D:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Point3D]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Point3D, List[Point3D]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError("Point index out of range!")
+        if index not in self.points:
+            start = self.offset + index * self.width
+            self.points[index] = self.decode(self.buffer[start : start + self.width])
+        return self.points[index]
+
+    # Closes the buffer if it is a memory map, after which undecoded points
+    # can no longer be read
+    def close(self) -> None:
+        if hasattr(self.buffer, "close"):
+            self.buffer.close()
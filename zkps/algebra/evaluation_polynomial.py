@@ -0,0 +1,101 @@
+from typing import Generic, List, Optional, Union
+from dataclasses import dataclass
+from algebra.field import FElt, FieldVector
+from algebra.ntt import coset_ntt, inverse_coset_ntt
+from algebra.polynomial import Polynomial
+from metrics import Counter
+
+
+# Polynomial in Lagrange basis: values[i] is its evaluation at shift * domain[i]
+# The domain must be a power-of-2 subgroup of roots of unity, and shift is one
+# for the subgroup itself or a non-residue for an extended coset domain
+# Values are kept in a FieldVector so pointwise arithmetic runs on plain ints
+@dataclass
+class EvaluationPolynomial(Generic[FElt]):
+    values: FieldVector[FElt]
+    domain: List[FElt]
+    shift: FElt
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.values, FieldVector):
+            self.values = FieldVector.from_elts(type(self.shift), self.values)
+
+    @staticmethod
+    @Counter
+    def from_poly(
+        f: Polynomial[FElt], domain: List[FElt], shift: Optional[FElt] = None
+    ) -> "EvaluationPolynomial":
+        if len(f.coeffs) > len(domain):
+            raise ValueError("Polynomial degree must be less than size of domain!")
+        if shift is None:
+            shift = domain[0].one()
+
+        coeffs = FieldVector.from_elts(type(shift), f.coeffs)
+        return EvaluationPolynomial[FElt](
+            values=coset_ntt(coeffs, domain, shift), domain=domain, shift=shift
+        )
+
+    @Counter
+    def to_poly(self) -> Polynomial[FElt]:
+        new_coeffs = inverse_coset_ntt(self.values, self.domain, self.shift).values
+
+        # Truncate leading zeros
+        while len(new_coeffs) > 1 and new_coeffs[-1] == 0:
+            new_coeffs.pop()
+
+        return Polynomial[FElt](FieldVector(type(self.shift), new_coeffs).to_elts())
+
+    def points(self) -> List[FElt]:
+        return [self.shift * x for x in self.domain]
+
+    def _other_values(
+        self, other: Union[FElt, "EvaluationPolynomial"]
+    ) -> Union[FElt, FieldVector[FElt]]:
+        if isinstance(other, EvaluationPolynomial):
+            if len(other.values) != len(self.values) or other.shift != self.shift:
+                raise ValueError(
+                    "Evaluation polynomials must be defined over the same domain!"
+                )
+            return other.values
+        else:
+            return other
+
+    @Counter
+    def __add__(
+        self, other: Union[FElt, "EvaluationPolynomial"]
+    ) -> "EvaluationPolynomial":
+        return EvaluationPolynomial[FElt](
+            values=self.values + self._other_values(other),
+            domain=self.domain,
+            shift=self.shift,
+        )
+
+    @Counter
+    def __sub__(
+        self, other: Union[FElt, "EvaluationPolynomial"]
+    ) -> "EvaluationPolynomial":
+        return EvaluationPolynomial[FElt](
+            values=self.values - self._other_values(other),
+            domain=self.domain,
+            shift=self.shift,
+        )
+
+    # Multiplying by a field element scales every value
+    @Counter
+    def __mul__(
+        self, other: Union[FElt, "EvaluationPolynomial"]
+    ) -> "EvaluationPolynomial":
+        return EvaluationPolynomial[FElt](
+            values=self.values * self._other_values(other),
+            domain=self.domain,
+            shift=self.shift,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EvaluationPolynomial):
+            return False
+        return (
+            self.shift == other.shift
+            and self.domain == other.domain
+            and self.values == other.values
+        )
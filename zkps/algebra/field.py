@@ -1,4 +1,4 @@
-from typing import List, TypeVar
+from typing import Generic, Iterator, List, Sequence, Type, TypeVar, Union, overload
 from py_ecc import (
     bn128 as bn128_base,
     bls12_381 as bls12_381_base,
@@ -68,3 +68,131 @@ class bls12_381_FR(FQ, Byteable):
 
 
 FElt = TypeVar("FElt", bn128_FR, bls12_381_FR)
+
+
+# Vector of field elements stored as canonical ints in [0, field_modulus), so bulk
+# operations reduce plain ints instead of allocating a field element per result
+class FieldVector(Generic[FElt]):
+    def __init__(self, field_class: Type[FElt], values: List[int]) -> None:
+        self.field_class: Type[FElt] = field_class
+        self.values: List[int] = values
+
+    @staticmethod
+    def from_elts(
+        field_class: Type[FElt], elts: Union[Sequence[FElt], "FieldVector"]
+    ) -> "FieldVector":
+        if isinstance(elts, FieldVector):
+            return FieldVector(field_class, elts.values[:])
+        return FieldVector(field_class, [x.n for x in elts])
+
+    @staticmethod
+    def zeros(field_class: Type[FElt], length: int) -> "FieldVector":
+        return FieldVector(field_class, [0] * length)
+
+    def to_elts(self) -> List[FElt]:
+        return [self.field_class(x) for x in self.values]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @overload
+    def __getitem__(self, index: int) -> FElt:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "FieldVector":
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[FElt, "FieldVector"]:
+        if isinstance(index, slice):
+            return FieldVector(self.field_class, self.values[index])
+        return self.field_class(self.values[index])
+
+    def __setitem__(self, index: int, value: FElt) -> None:
+        self.values[index] = value.n
+
+    def __iter__(self) -> Iterator[FElt]:
+        return (self.field_class(x) for x in self.values)
+
+    def append(self, value: FElt) -> None:
+        self.values.append(value.n)
+
+    def pop(self) -> FElt:
+        return self.field_class(self.values.pop())
+
+    def _other_values(self, other: Union[FElt, "FieldVector"]) -> List[int]:
+        if isinstance(other, FieldVector):
+            if len(other) != len(self):
+                raise ValueError("Length of both vectors must be the same!")
+            return other.values
+        return [other.n] * len(self)
+
+    def __add__(self, other: Union[FElt, "FieldVector"]) -> "FieldVector":
+        p = self.field_class.field_modulus
+        return FieldVector(
+            self.field_class,
+            [(a + b) % p for a, b in zip(self.values, self._other_values(other))],
+        )
+
+    def __sub__(self, other: Union[FElt, "FieldVector"]) -> "FieldVector":
+        p = self.field_class.field_modulus
+        return FieldVector(
+            self.field_class,
+            [(a - b) % p for a, b in zip(self.values, self._other_values(other))],
+        )
+
+    # Pointwise product with another vector, or scaling by a field element
+    def __mul__(self, other: Union[FElt, "FieldVector"]) -> "FieldVector":
+        p = self.field_class.field_modulus
+        if isinstance(other, FieldVector):
+            return FieldVector(
+                self.field_class,
+                [a * b % p for a, b in zip(self.values, self._other_values(other))],
+            )
+        return self.scale(other)
+
+    def __neg__(self) -> "FieldVector":
+        p = self.field_class.field_modulus
+        return FieldVector(self.field_class, [-a % p for a in self.values])
+
+    def scale(self, scalar: FElt) -> "FieldVector":
+        p = self.field_class.field_modulus
+        c = scalar.n
+        return FieldVector(self.field_class, [a * c % p for a in self.values])
+
+    def dot(self, other: "FieldVector") -> FElt:
+        return self.field_class(
+            sum(a * b for a, b in zip(self.values, self._other_values(other)))
+        )
+
+    # Inverts every element with Montgomery's trick: one exponentiation and
+    # 3(n-1) multiplications. Zero elements are left as zero
+    def inverse(self) -> "FieldVector":
+        p = self.field_class.field_modulus
+        prefix_prods = []
+        prod = 1
+        for a in self.values:
+            prefix_prods.append(prod)
+            if a != 0:
+                prod = prod * a % p
+        prod_inv = pow(prod, p - 2, p)
+
+        res = [0] * len(self.values)
+        for i in reversed(range(len(self.values))):
+            a = self.values[i]
+            if a != 0:
+                res[i] = prod_inv * prefix_prods[i] % p
+                prod_inv = prod_inv * a % p
+        return FieldVector(self.field_class, res)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FieldVector):
+            return self.values == other.values
+        if isinstance(other, list):
+            return len(other) == len(self.values) and all(
+                a == b.n for a, b in zip(self.values, other)
+            )
+        return False
+
+    def __repr__(self) -> str:
+        return f"FieldVector({self.field_class.__name__}, {self.values})"
@@ -0,0 +1,164 @@
+from typing import Dict, List, Tuple, Type, Union
+from algebra.field import FElt, FieldVector
+from metrics import Counter
+from utils import get_power_of_2
+
+# Cache of subgroups of roots of unity keyed by (field class, order)
+_domain_cache: Dict[Tuple[type, int], List] = {}
+
+
+def get_ntt_domain(field_class: Type[FElt], order: int) -> List[FElt]:
+    if get_power_of_2(order) < 0:
+        raise ValueError("Order of NTT domain must be a power of 2!")
+    key = (field_class, order)
+    if key not in _domain_cache:
+        _domain_cache[key] = field_class.get_roots_of_unity(order)
+    return _domain_cache[key]
+
+
+# Checks that domain is [1, w, w^2, ..., w^(n-1)] for a primitive n-th root w, n = 2^k
+def is_ntt_domain(domain: List[FElt]) -> bool:
+    n = len(domain)
+    if n == 0 or get_power_of_2(n) < 0:
+        return False
+    one = domain[0].one()
+    if domain[0] != one:
+        return False
+    if n == 1:
+        return True
+    w = domain[1]
+    for i in range(1, n):
+        if domain[i] != domain[i - 1] * w:
+            return False
+    return domain[-1] * w == one and domain[n // 2] != one
+
+
+def _bit_reverse_permute(a: List[int]) -> List[int]:
+    n = len(a)
+    res = a[:]
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            res[i], res[j] = res[j], res[i]
+    return res
+
+
+# Iterative radix-2 Cooley-Tukey transform over ints, roots[i] = w^i
+def _ntt_ints(a: List[int], roots: List[int], modulus: int) -> List[int]:
+    n = len(a)
+    a = _bit_reverse_permute(a)
+    size = 2
+    while size <= n:
+        half = size // 2
+        step = n // size
+        twiddles = roots[: n // 2 : step]
+        for start in range(0, n, size):
+            for j in range(half):
+                u = a[start + j]
+                v = a[start + j + half] * twiddles[j] % modulus
+                a[start + j] = (u + v) % modulus
+                a[start + j + half] = (u - v) % modulus
+        size *= 2
+    return a
+
+
+def _to_ints(values: Union[List[FElt], FieldVector]) -> List[int]:
+    if isinstance(values, FieldVector):
+        return values.values
+    return [x.n for x in values]
+
+
+# Results come back in the same representation as the input values
+def _from_ints(
+    res: List[int],
+    field_class: Type[FElt],
+    values: Union[List[FElt], FieldVector],
+) -> Union[List[FElt], FieldVector]:
+    if isinstance(values, FieldVector):
+        return FieldVector(field_class, res)
+    return [field_class(x) for x in res]
+
+
+# Returns the evaluations of the polynomial with coefficients values on domain
+# Coefficients beyond the size of the domain wrap around since X^n = 1 on the domain
+@Counter
+def ntt(
+    values: Union[List[FElt], FieldVector], domain: List[FElt]
+) -> Union[List[FElt], FieldVector]:
+    n = len(domain)
+    if get_power_of_2(n) < 0:
+        raise ValueError("Size of NTT domain must be a power of 2!")
+    field_class = type(domain[0])
+    modulus = field_class.field_modulus
+
+    a = [0] * n
+    for i, value in enumerate(_to_ints(values)):
+        a[i % n] = (a[i % n] + value) % modulus
+    res = _ntt_ints(a, [x.n for x in domain], modulus)
+
+    return _from_ints(res, field_class, values)
+
+
+# Returns the n coefficients of the polynomial taking on values over domain
+@Counter
+def inverse_ntt(
+    values: Union[List[FElt], FieldVector], domain: List[FElt]
+) -> Union[List[FElt], FieldVector]:
+    n = len(domain)
+    if get_power_of_2(n) < 0:
+        raise ValueError("Size of NTT domain must be a power of 2!")
+    if len(values) != n:
+        raise ValueError("Must provide number of values equal to size of domain!")
+    field_class = type(domain[0])
+    modulus = field_class.field_modulus
+
+    # Inverse transform uses w^-1, whose powers are the domain in reverse order
+    inv_roots = [domain[0].n] + [x.n for x in reversed(domain[1:])]
+    res = _ntt_ints(_to_ints(values), inv_roots, modulus)
+    n_inv = pow(n, -1, modulus)
+
+    return _from_ints([x * n_inv % modulus for x in res], field_class, values)
+
+
+# Non-residue outside every 2-power subgroup, so shift * domain is a disjoint coset
+def get_coset_shift(field_class: Type[FElt]) -> FElt:
+    return field_class(field_class.primitive_root)
+
+
+# Returns the evaluations of the polynomial with coefficients values on shift * domain
+@Counter
+def coset_ntt(
+    values: Union[List[FElt], FieldVector], domain: List[FElt], shift: FElt
+) -> Union[List[FElt], FieldVector]:
+    field_class = type(domain[0])
+    modulus = field_class.field_modulus
+    scaled_values = []
+    shift_pow = 1
+    for value in _to_ints(values):
+        scaled_values.append(value * shift_pow % modulus)
+        shift_pow = shift_pow * shift.n % modulus
+
+    res = ntt(FieldVector(field_class, scaled_values), domain)
+    return _from_ints(res.values, field_class, values)
+
+
+# Returns the n coefficients of the polynomial taking on values over shift * domain
+@Counter
+def inverse_coset_ntt(
+    values: Union[List[FElt], FieldVector], domain: List[FElt], shift: FElt
+) -> Union[List[FElt], FieldVector]:
+    field_class = type(domain[0])
+    modulus = field_class.field_modulus
+    coeffs = inverse_ntt(FieldVector.from_elts(field_class, values), domain).values
+    shift_inv = pow(shift.n, -1, modulus)
+    shift_inv_pow = 1
+    for i in range(len(coeffs)):
+        coeffs[i] = coeffs[i] * shift_inv_pow % modulus
+        shift_inv_pow = shift_inv_pow * shift_inv % modulus
+
+    return _from_ints(coeffs, field_class, values)
@@ -1,140 +1,273 @@
-from typing import TypeVar, Generic
+from typing import Any, TypeVar, Generic, List, Optional, Tuple, Union
 from abc import ABC, abstractmethod
 from py_ecc import (
-    bn128 as bn128_base,
-    bls12_381 as bls12_381_base,
+    optimized_bn128 as bn128_base,
+    optimized_bls12_381 as bls12_381_base,
 )
 from py_ecc.fields import (
-    bn128_FQ as bn128_FQ_base,
-    bn128_FQ2 as bn128_FQ2_base,
-    bn128_FQ12 as bn128_FQ12_base,
-    bls12_381_FQ as bls12_381_FQ_base,
-    bls12_381_FQ2 as bls12_381_FQ2_base,
-    bls12_381_FQ12 as bls12_381_FQ12_base,
+    optimized_bn128_FQ as bn128_FQ_base,
+    optimized_bn128_FQ2 as bn128_FQ2_base,
+    optimized_bn128_FQ12 as bn128_FQ12_base,
+    optimized_bls12_381_FQ as bls12_381_FQ_base,
+    optimized_bls12_381_FQ2 as bls12_381_FQ2_base,
+    optimized_bls12_381_FQ12 as bls12_381_FQ12_base,
 )
-from py_ecc.typing import Point2D
+from py_ecc.fields.optimized_field_elements import FQ, FQP
 from algebra.field import FElt
+from algebra.algorithms import pippenger_msm, FixedBaseTable
 from metrics import Counter
 
 BaseField = TypeVar("BaseField", bn128_FQ_base, bls12_381_FQ_base)
 G2Field = TypeVar("G2Field", bn128_FQ2_base, bls12_381_FQ2_base)
 GtField = TypeVar("GtField", bn128_FQ12_base, bls12_381_FQ12_base)
 
+PointField = TypeVar("PointField", bound=Union[FQ, FQP])
+
+# Points are kept in projective coordinates (X, Y, Z) standing for (X/Z, Y/Z), so
+# additions and multiplications never pay for a field inversion
+Point3D = Tuple[PointField, PointField, PointField]
+Point2D = Tuple[PointField, PointField]
+
+
+# Normalizes a projective point to affine coordinates, or None for the identity
+# Same for both curves, so no curve-specific normalize is needed
+def to_affine(p: Point3D[Any]) -> Optional[Point2D[Any]]:
+    x, y, z = p
+    if z == z.zero():
+        return None
+    return (x / z, y / z)
+
+
+# Compares projective points, which have many coordinates for the same point, by
+# cross-multiplying rather than normalizing
+def points_equal(p: Point3D[Any], q: Point3D[Any]) -> bool:
+    x_1, y_1, z_1 = p
+    x_2, y_2, z_2 = q
+    return x_1 * z_2 == x_2 * z_1 and y_1 * z_2 == y_2 * z_1
+
 
 class Pairing(ABC, Generic[FElt, BaseField, G2Field, GtField]):
-    g_1: Point2D[BaseField]
-    g_2: Point2D[G2Field]
+    g_1: Point3D[BaseField]
+    g_2: Point3D[G2Field]
+    curve_order: int
 
     @staticmethod
     @abstractmethod
-    def add_G_1(p1: Point2D[BaseField], p2: Point2D[BaseField]) -> Point2D[BaseField]:
+    def add_G_1(p1: Point3D[BaseField], p2: Point3D[BaseField]) -> Point3D[BaseField]:
         pass
 
     @staticmethod
     @abstractmethod
-    def add_G_2(p1: Point2D[G2Field], p2: Point2D[G2Field]) -> Point2D[G2Field]:
+    def add_G_2(p1: Point3D[G2Field], p2: Point3D[G2Field]) -> Point3D[G2Field]:
         pass
 
     @staticmethod
     @abstractmethod
-    def multiply_G_1(p: Point2D[BaseField], n: FElt) -> Point2D[BaseField]:
+    def multiply_G_1(p: Point3D[BaseField], n: FElt) -> Point3D[BaseField]:
         pass
 
     @staticmethod
     @abstractmethod
-    def multiply_G_2(p: Point2D[G2Field], n: FElt) -> Point2D[G2Field]:
+    def multiply_G_2(p: Point3D[G2Field], n: FElt) -> Point3D[G2Field]:
         pass
 
     @staticmethod
     @abstractmethod
-    def identity() -> Point2D[BaseField]:
+    def identity() -> Point3D[BaseField]:
         pass
 
     @staticmethod
     @abstractmethod
-    def pairing(p: Point2D[BaseField], q: Point2D[G2Field]) -> GtField:
+    def identity_G_2() -> Point3D[G2Field]:
         pass
 
+    @staticmethod
+    @abstractmethod
+    def neg_G_1(p: Point3D[BaseField]) -> Point3D[BaseField]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def pairing(p: Point3D[BaseField], q: Point3D[G2Field]) -> GtField:
+        pass
+
+    # Pairing without the final exponentiation
+    @staticmethod
+    @abstractmethod
+    def miller_loop(p: Point3D[BaseField], q: Point3D[G2Field]) -> GtField:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def final_exponentiate(x: GtField) -> GtField:
+        pass
+
+    # Product of e(p, q) over all pairs, sharing one final exponentiation
+    @classmethod
+    @Counter
+    def multi_pairing(
+        cls, pairs: List[Tuple[Point3D[BaseField], Point3D[G2Field]]]
+    ) -> GtField:
+        prod = None
+        for p, q in pairs:
+            res = cls.miller_loop(p, q)
+            prod = res if prod is None else prod * res
+        if prod is None:
+            raise ValueError("Must provide at least one pair to multi pairing!")
+
+        return cls.final_exponentiate(prod)
+
+    # Checks that the product of e(p, q) over all pairs is the identity of GT
+    @classmethod
+    def pairing_check(
+        cls, pairs: List[Tuple[Point3D[BaseField], Point3D[G2Field]]]
+    ) -> bool:
+        res = cls.multi_pairing(pairs)
+        return res == res.one()
+
+    @classmethod
+    @Counter
+    def multi_scalar_multiply_G_1(
+        cls, ps: List[Point3D[BaseField]], ns: List[FElt]
+    ) -> Point3D[BaseField]:
+        return pippenger_msm(
+            scalars=[n.n for n in ns],
+            points=ps,
+            add=cls.add_G_1,
+            identity=cls.identity(),
+        )
+
+    @classmethod
+    def fixed_base_table_G_1(cls, p: Point3D[BaseField]) -> FixedBaseTable:
+        return FixedBaseTable(
+            base=p,
+            add=cls.add_G_1,
+            identity=cls.identity(),
+            num_bits=cls.curve_order.bit_length(),
+        )
+
 
 class bn128_pairing(Pairing):
-    g_1: Point2D[bn128_FQ_base] = bn128_base.G1
-    g_2: Point2D[bn128_FQ2_base] = bn128_base.G2
+    g_1: Point3D[bn128_FQ_base] = bn128_base.G1
+    g_2: Point3D[bn128_FQ2_base] = bn128_base.G2
+    curve_order: int = bn128_base.curve_order
 
     @staticmethod
     @Counter
     def add_G_1(
-        p1: Point2D[bn128_FQ_base], p2: Point2D[bn128_FQ_base]
-    ) -> Point2D[bn128_FQ_base]:
+        p1: Point3D[bn128_FQ_base], p2: Point3D[bn128_FQ_base]
+    ) -> Point3D[bn128_FQ_base]:
         return bn128_base.add(p1, p2)
 
     @staticmethod
     @Counter
     def add_G_2(
-        p1: Point2D[bn128_FQ2_base], p2: Point2D[bn128_FQ2_base]
-    ) -> Point2D[bn128_FQ2_base]:
+        p1: Point3D[bn128_FQ2_base], p2: Point3D[bn128_FQ2_base]
+    ) -> Point3D[bn128_FQ2_base]:
         return bn128_base.add(p1, p2)
 
     @staticmethod
     @Counter
-    def multiply_G_1(p: Point2D[bn128_FQ_base], n: FElt) -> Point2D[bn128_FQ_base]:
+    def multiply_G_1(p: Point3D[bn128_FQ_base], n: FElt) -> Point3D[bn128_FQ_base]:
         return bn128_base.multiply(p, n.n)
 
     @staticmethod
     @Counter
-    def multiply_G_2(p: Point2D[bn128_FQ2_base], n: FElt) -> Point2D[bn128_FQ2_base]:
+    def multiply_G_2(p: Point3D[bn128_FQ2_base], n: FElt) -> Point3D[bn128_FQ2_base]:
         return bn128_base.multiply(p, n.n)
 
     @staticmethod
-    def identity() -> Point2D[bn128_FQ_base]:
-        return None
+    def identity() -> Point3D[bn128_FQ_base]:
+        return bn128_base.Z1
+
+    @staticmethod
+    def identity_G_2() -> Point3D[bn128_FQ2_base]:
+        return bn128_base.Z2
 
     @staticmethod
     @Counter
     def pairing(
-        p: Point2D[bn128_FQ_base], q: Point2D[bn128_FQ2_base]
+        p: Point3D[bn128_FQ_base], q: Point3D[bn128_FQ2_base]
+    ) -> bn128_FQ12_base:
+        return bn128_base.pairing(q, p)
+
+    @staticmethod
+    def neg_G_1(p: Point3D[bn128_FQ_base]) -> Point3D[bn128_FQ_base]:
+        return bn128_base.neg(p)
+
+    @staticmethod
+    @Counter
+    def miller_loop(
+        p: Point3D[bn128_FQ_base], q: Point3D[bn128_FQ2_base]
     ) -> bn128_FQ12_base:
-        return bn128_base.bn128_pairing.pairing(q, p)
+        return bn128_base.pairing(q, p, final_exponentiate=False)
+
+    @staticmethod
+    @Counter
+    def final_exponentiate(x: bn128_FQ12_base) -> bn128_FQ12_base:
+        return bn128_base.final_exponentiate(x)
 
 
 class bls12_381_pairing(Pairing):
-    g_1: Point2D[bls12_381_FQ_base] = bls12_381_base.G1
-    g_2: Point2D[bls12_381_FQ2_base] = bls12_381_base.G2
+    g_1: Point3D[bls12_381_FQ_base] = bls12_381_base.G1
+    g_2: Point3D[bls12_381_FQ2_base] = bls12_381_base.G2
+    curve_order: int = bls12_381_base.curve_order
 
     @staticmethod
     @Counter
     def add_G_1(
-        p1: Point2D[bls12_381_FQ_base], p2: Point2D[bls12_381_FQ_base]
-    ) -> Point2D[bls12_381_FQ_base]:
+        p1: Point3D[bls12_381_FQ_base], p2: Point3D[bls12_381_FQ_base]
+    ) -> Point3D[bls12_381_FQ_base]:
         return bls12_381_base.add(p1, p2)
 
     @staticmethod
     @Counter
     def add_G_2(
-        p1: Point2D[bls12_381_FQ2_base], p2: Point2D[bls12_381_FQ2_base]
-    ) -> Point2D[bls12_381_FQ2_base]:
+        p1: Point3D[bls12_381_FQ2_base], p2: Point3D[bls12_381_FQ2_base]
+    ) -> Point3D[bls12_381_FQ2_base]:
         return bls12_381_base.add(p1, p2)
 
     @staticmethod
     @Counter
     def multiply_G_1(
-        p: Point2D[bls12_381_FQ_base], n: FElt
-    ) -> Point2D[bls12_381_FQ_base]:
+        p: Point3D[bls12_381_FQ_base], n: FElt
+    ) -> Point3D[bls12_381_FQ_base]:
         return bls12_381_base.multiply(p, n.n)
 
     @staticmethod
     @Counter
     def multiply_G_2(
-        p: Point2D[bls12_381_FQ2_base], n: FElt
-    ) -> Point2D[bls12_381_FQ2_base]:
+        p: Point3D[bls12_381_FQ2_base], n: FElt
+    ) -> Point3D[bls12_381_FQ2_base]:
         return bls12_381_base.multiply(p, n.n)
 
     @staticmethod
-    def identity() -> Point2D[bls12_381_FQ_base]:
-        return None
+    def identity() -> Point3D[bls12_381_FQ_base]:
+        return bls12_381_base.Z1
+
+    @staticmethod
+    def identity_G_2() -> Point3D[bls12_381_FQ2_base]:
+        return bls12_381_base.Z2
 
     @staticmethod
     @Counter
     def pairing(
-        p: Point2D[bls12_381_FQ_base], q: Point2D[bls12_381_FQ2_base]
+        p: Point3D[bls12_381_FQ_base], q: Point3D[bls12_381_FQ2_base]
     ) -> bls12_381_FQ12_base:
-        return bls12_381_base.bls12_381_pairing.pairing(q, p)
+        return bls12_381_base.pairing(q, p)
+
+    @staticmethod
+    def neg_G_1(p: Point3D[bls12_381_FQ_base]) -> Point3D[bls12_381_FQ_base]:
+        return bls12_381_base.neg(p)
+
+    @staticmethod
+    @Counter
+    def miller_loop(
+        p: Point3D[bls12_381_FQ_base], q: Point3D[bls12_381_FQ2_base]
+    ) -> bls12_381_FQ12_base:
+        return bls12_381_base.pairing(q, p, final_exponentiate=False)
+
+    @staticmethod
+    @Counter
+    def final_exponentiate(x: bls12_381_FQ12_base) -> bls12_381_FQ12_base:
+        return bls12_381_base.final_exponentiate(x)
@@ -1,17 +1,26 @@
 from typing import Generic, List, Type, Union, Tuple
-from copy import deepcopy
 from dataclasses import dataclass
 from itertools import zip_longest
-from algebra.field import FElt
+from algebra.field import FElt, FieldVector
+from algebra.algorithms import batch_inverse
+from algebra.ntt import ntt, inverse_ntt, get_ntt_domain, is_ntt_domain
 from metrics import Counter
+from utils import nearest_larger_power_of_2
 
+# Products where both factors have at least this many coefficients use the NTT
+NTT_MUL_THRESHOLD = 32
 
+
+# Coefficients are either a list of field elements or a FieldVector. Arithmetic
+# involving a FieldVector-backed polynomial runs on plain ints and returns one
 @dataclass
 class Polynomial(Generic[FElt]):
-    coeffs: List[FElt]
+    coeffs: Union[List[FElt], FieldVector[FElt]]
 
     @Counter
     def __add__(self, other: "Polynomial") -> "Polynomial":
+        if self._uses_vector(other):
+            return self._vector_add_sub(other, subtract=False)
         new_coeffs = [
             a + b
             for a, b in zip_longest(
@@ -27,6 +36,14 @@ class Polynomial(Generic[FElt]):
 
     @Counter
     def __sub__(self, other: Union[FElt, "Polynomial"]) -> "Polynomial":
+        if self._uses_vector(other):
+            if isinstance(other, Polynomial):
+                return self._vector_add_sub(other, subtract=True)
+            new_vector = self._vector()[:]
+            new_vector.values[0] = (
+                new_vector.values[0] - other.n
+            ) % other.field_modulus
+            return Polynomial[FElt](new_vector)
         if isinstance(other, Polynomial):
             new_coeffs: List[FElt] = []
             for i in range(min(len(self.coeffs), len(other.coeffs))):
@@ -47,15 +64,18 @@ class Polynomial(Generic[FElt]):
 
             return Polynomial[FElt](new_coeffs)
         else:
-            new_coeffs = deepcopy(self.coeffs)
+            new_coeffs = self.to_elts()
             new_coeffs[0] -= other
             return Polynomial[FElt](new_coeffs)
 
-    # TODO: FFT
     @Counter
     def __mul__(self, other: Union[FElt, "Polynomial"]) -> "Polynomial":
         new_coeffs: List[FElt] = []
         if isinstance(other, Polynomial):
+            if min(len(self.coeffs), len(other.coeffs)) >= NTT_MUL_THRESHOLD:
+                return self._ntt_mul(other)
+            if self._uses_vector(other):
+                return self._vector_mul(other)
             for i, self_coeff in enumerate(self.coeffs):
                 for j, other_coeff in enumerate(other.coeffs):
                     index = i + j
@@ -64,20 +84,78 @@ class Polynomial(Generic[FElt]):
                         new_coeffs.append(prod)
                     else:
                         new_coeffs[index] += prod
+        elif self._uses_vector(other):
+            return Polynomial[FElt](self._vector().scale(other))
         else:
             for coeff in self.coeffs:
                 new_coeffs.append(other * coeff)
 
         return Polynomial[FElt](new_coeffs)
 
+    # Copy of the coefficients as a list of field elements
+    def to_elts(self) -> List[FElt]:
+        if isinstance(self.coeffs, FieldVector):
+            return self.coeffs.to_elts()
+        return list(self.coeffs)
+
+    def _uses_vector(self, other: Union[FElt, "Polynomial"]) -> bool:
+        return isinstance(self.coeffs, FieldVector) or (
+            isinstance(other, Polynomial) and isinstance(other.coeffs, FieldVector)
+        )
+
+    def _vector(self) -> FieldVector[FElt]:
+        if isinstance(self.coeffs, FieldVector):
+            return self.coeffs
+        return FieldVector.from_elts(type(self.coeffs[0]), self.coeffs)
+
+    def _vector_add_sub(self, other: "Polynomial", subtract: bool) -> "Polynomial":
+        a = self._vector()
+        b = other._vector()
+        p = a.field_class.field_modulus
+        sign = -1 if subtract else 1
+        new_values = [
+            (x + sign * y) % p for x, y in zip_longest(a.values, b.values, fillvalue=0)
+        ]
+
+        # Truncate leading zeros
+        if not subtract:
+            while len(new_values) > 1 and new_values[-1] == 0:
+                new_values.pop()
+
+        return Polynomial[FElt](FieldVector(a.field_class, new_values))
+
+    # Schoolbook product that only reduces each coefficient once at the end
+    def _vector_mul(self, other: "Polynomial") -> "Polynomial":
+        a = self._vector()
+        b = other._vector()
+        p = a.field_class.field_modulus
+        new_values = [0] * (len(a) + len(b) - 1)
+        for i, x in enumerate(a.values):
+            if x != 0:
+                for j, y in enumerate(b.values):
+                    new_values[i + j] += x * y
+
+        return Polynomial[FElt](FieldVector(a.field_class, [x % p for x in new_values]))
+
+    def _ntt_mul(self, other: "Polynomial") -> "Polynomial":
+        res_len = len(self.coeffs) + len(other.coeffs) - 1
+        a = self._vector()
+        domain = get_ntt_domain(a.field_class, nearest_larger_power_of_2(res_len))
+        prod_evals = ntt(a, domain) * ntt(other._vector(), domain)
+        prod_coeffs = inverse_ntt(prod_evals, domain)[:res_len]
+
+        if self._uses_vector(other):
+            return Polynomial[FElt](prod_coeffs)
+        return Polynomial[FElt](prod_coeffs.to_elts())
+
     # Returns (quotient, remainder) after division by other
     @Counter
     def __truediv__(
         self, other: Union[FElt, "Polynomial"]
     ) -> Tuple["Polynomial", "Polynomial"]:
         if isinstance(other, Polynomial):
-            num_coeffs = deepcopy(self.coeffs)
-            den_coeffs = deepcopy(other.coeffs)
+            num_coeffs = self.to_elts()
+            den_coeffs = other.to_elts()
             if len(num_coeffs) < len(den_coeffs):
                 return (
                     Polynomial[FElt]([self.coeffs[0].zero()]),
@@ -100,9 +178,11 @@ class Polynomial(Generic[FElt]):
                 num_coeffs.pop()
             return (Polynomial[FElt](quo_coeffs), Polynomial[FElt](num_coeffs))
         else:
+            # Invert the divisor once and scale by its inverse
+            other_inv = other.one() / other
             new_coeffs: List[FElt] = []
             for coeff in self.coeffs:
-                new_coeffs.append(coeff / other)
+                new_coeffs.append(coeff * other_inv)
             return (
                 Polynomial[FElt](new_coeffs),
                 Polynomial[FElt]([self.coeffs[0].zero()]),
@@ -111,6 +191,8 @@ class Polynomial(Generic[FElt]):
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Polynomial):
             return False
+        if self._uses_vector(other):
+            return self._vector() == other._vector()
         if len(self.coeffs) != len(other.coeffs):
             return False
         for i, coeff in enumerate(self.coeffs):
@@ -121,6 +203,13 @@ class Polynomial(Generic[FElt]):
 
     @Counter
     def __call__(self, x: FElt) -> FElt:
+        if isinstance(self.coeffs, FieldVector):
+            p = x.field_modulus
+            res_int = 0
+            for value in reversed(self.coeffs.values):
+                res_int = (res_int * x.n + value) % p
+            return self.coeffs.field_class(res_int)
+
         res = x.zero()
         xs = x.one()
         for coeff in self.coeffs:
@@ -129,11 +218,14 @@ class Polynomial(Generic[FElt]):
 
         return res
 
-    # TODO: FFT
-    def eval_on_mult_subgroup(self, mult_subgroup: List[FElt]) -> List[FElt]:
+    # Evaluations come back in the same representation as the coefficients
+    def eval_on_mult_subgroup(
+        self, mult_subgroup: List[FElt]
+    ) -> Union[List[FElt], FieldVector[FElt]]:
+        if is_ntt_domain(mult_subgroup):
+            return ntt(self.coeffs, mult_subgroup)
         return [self(x) for x in mult_subgroup]
 
-    # TODO: IFFT
     @staticmethod
     @Counter
     def interpolate_poly(
@@ -142,6 +234,13 @@ class Polynomial(Generic[FElt]):
         if len(domain) != len(values):
             raise ValueError("Must provide number of values equal to size of domain!")
 
+        if is_ntt_domain(domain):
+            new_coeffs = inverse_ntt(values, domain)
+            # Truncate leading zeros
+            while len(new_coeffs) > 1 and new_coeffs[-1] == field_class.zero():
+                new_coeffs.pop()
+            return Polynomial[FElt](new_coeffs)
+
         res = Polynomial[FElt]([field_class.zero()])
         for i in range(len(domain)):
             lagrange = Polynomial.lagrange_poly(
@@ -172,3 +271,30 @@ class Polynomial(Generic[FElt]):
             raise ValueError("Error computing lagrange polynomial!")
 
         return quo
+
+    # Evaluates L_i(x) for each i in indices via the barycentric formula
+    # L_i(x) = w^i (x^n - 1) / (n (x - w^i)), which holds when the domain is a
+    # subgroup of n-th roots of unity, using a single field inversion
+    @staticmethod
+    @Counter
+    def eval_lagrange_polys_on_mult_subgroup(
+        mult_subgroup: List[FElt], indices: List[int], x: FElt
+    ) -> List[FElt]:
+        n = len(mult_subgroup)
+        for index in indices:
+            if index >= n:
+                raise ValueError("Index must be within the bounds of the domain!")
+
+        Z_S_eval = x**n - x.one()
+        if Z_S_eval == x.zero():
+            return [
+                x.one() if x == mult_subgroup[index] else x.zero() for index in indices
+            ]
+
+        denoms_inv = batch_inverse(
+            [(x - mult_subgroup[index]) * n for index in indices]
+        )
+        return [
+            mult_subgroup[index] * Z_S_eval * denom_inv
+            for index, denom_inv in zip(indices, denoms_inv)
+        ]
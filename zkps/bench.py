@@ -0,0 +1,384 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+from plonk import PlonkProver, PlonkVerifier
+from polynomial_commitment_schemes.pcs import PCSProver, PCSVerifier
+from polynomial_commitment_schemes.trivial import TrivialProver, TrivialVerifier
+from polynomial_commitment_schemes.kzg import KZGProver, KZGVerifier, KZGSRS
+from polynomial_commitment_schemes.bulletproofs import (
+    BulletproofsProver,
+    BulletproofsVerifier,
+    BulletproofsCRS,
+)
+from algebra.field import FElt, bn128_FR, bls12_381_FR
+from algebra.cyclic_group import CyclicGroupElt, bn128_group, bls12_381_group
+from algebra.pairing import Pairing, bn128_pairing, bls12_381_pairing
+from constraints import PlonkConstraints
+from preprocessor import Preprocessor
+from proof_codec import PlonkProofCodec
+from metrics import Counter
+
+# Sweeps synthetic circuits of 2^k gates over every field and commitment scheme,
+# timing preprocessing, proving and verification, as in
+#     python zkps/bench.py --sizes 3 4 5 --output results.json
+#     python zkps/bench.py --sizes 3 4 5 --baseline results.json --threshold 0.1
+# Exits with status 1 when a run regresses against the baseline
+
+BENCH_VERSION = 1
+
+FIELDS: Dict[str, Type[Union[bn128_FR, bls12_381_FR]]] = {
+    "bn128_FR": bn128_FR,
+    "bls12_381_FR": bls12_381_FR,
+}
+
+SCHEMES = ["trivial", "kzg", "bulletproofs"]
+
+# Metrics compared against the baseline, where larger is worse
+TIME_METRICS = ["setup_s", "preprocess_s", "prove_s", "verify_s"]
+SIZE_METRICS = ["peak_memory_bytes", "proof_bytes"]
+
+
+# Circuit of n = 2^k gates on public inputs x, y. The first two gates bind wires
+# 1 and 2 to the public inputs and every later gate i computes wire i + 1 from
+# wires i - 1 and i, alternately adding and multiplying them, so that every wire
+# but the last is copied into the next two gates
+def make_constraints(
+    k: int, field_class: Type[FElt]
+) -> Tuple[PlonkConstraints[FElt], List[FElt], List[FElt]]:
+    if k < 2:
+        raise ValueError("Must have at least 4 gates!")
+    n = 1 << k
+    zero = field_class.zero()
+    one = field_class.one()
+    constraints = PlonkConstraints[FElt](
+        l=2,
+        m=n,
+        n=n,
+        a=[],
+        b=[],
+        c=[],
+        qL=[],
+        qR=[],
+        qO=[],
+        qM=[],
+        qC=[zero] * n,
+    )
+    public_inputs = [field_class(3), field_class(5)]
+    witness = list(public_inputs)
+
+    for i in range(2):
+        wire = field_class(i + 1)
+        constraints.a.append(wire)
+        constraints.b.append(wire)
+        constraints.c.append(wire)
+        constraints.qL.append(one)
+        constraints.qR.append(zero)
+        constraints.qO.append(zero)
+        constraints.qM.append(zero)
+
+    for i in range(2, n):
+        is_add = i % 2 == 0
+        constraints.a.append(field_class(i - 1))
+        constraints.b.append(field_class(i))
+        constraints.c.append(field_class(i + 1))
+        constraints.qL.append(one if is_add else zero)
+        constraints.qR.append(one if is_add else zero)
+        constraints.qO.append(-one)
+        constraints.qM.append(zero if is_add else one)
+        if is_add:
+            witness.append(witness[i - 2] + witness[i - 1])
+        else:
+            witness.append(witness[i - 2] * witness[i - 1])
+
+    return (constraints, witness, public_inputs)
+
+
+# Sets up the commitment scheme for polynomials of up to 4n coefficients
+def make_pcs(
+    scheme: str,
+    field_class: Type[FElt],
+    n: int,
+    pairing: Pairing,
+    cyclic_group_class: Type[CyclicGroupElt],
+) -> Tuple[PCSProver, PCSVerifier, PlonkProofCodec]:
+    if scheme == "trivial":
+        return (
+            TrivialProver(),
+            TrivialVerifier(),
+            PlonkProofCodec[FElt](field_class=field_class),
+        )
+    if scheme == "kzg":
+        srs = KZGSRS.trusted_setup(d=4 * n, pairing=pairing, field_class=field_class)
+        return (
+            KZGProver(srs=srs, pairing=pairing, field_class=field_class),
+            KZGVerifier(srs=srs, pairing=pairing, field_class=field_class),
+            PlonkProofCodec[FElt](field_class=field_class, pairing=pairing),
+        )
+    if scheme == "bulletproofs":
+        crs = BulletproofsCRS.common_setup(
+            d=4 * n, cyclic_group_class=cyclic_group_class
+        )
+        return (
+            BulletproofsProver(
+                crs=crs, field_class=field_class, cyclic_group_class=cyclic_group_class
+            ),
+            BulletproofsVerifier(
+                crs=crs, field_class=field_class, cyclic_group_class=cyclic_group_class
+            ),
+            PlonkProofCodec[FElt](
+                field_class=field_class, cyclic_group_class=cyclic_group_class
+            ),
+        )
+    raise ValueError("Unsupported commitment scheme!")
+
+
+def _time(func: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    res = func()
+    return (res, time.perf_counter() - start)
+
+
+def run_case(
+    field_name: str, scheme: str, k: int, repeat: int = 1, measure_memory: bool = True
+) -> Dict[str, Any]:
+    if repeat < 1:
+        raise ValueError("Must repeat each run at least once!")
+    field_class = FIELDS[field_name]
+    # Narrows the field so that the curve types match it
+    if issubclass(field_class, bn128_FR):
+        return _run_case(
+            field_name,
+            field_class,
+            bn128_pairing(),
+            bn128_group,
+            scheme,
+            k,
+            repeat,
+            measure_memory,
+        )
+    return _run_case(
+        field_name,
+        field_class,
+        bls12_381_pairing(),
+        bls12_381_group,
+        scheme,
+        k,
+        repeat,
+        measure_memory,
+    )
+
+
+def _run_case(
+    field_name: str,
+    field_class: Type[FElt],
+    pairing: Pairing,
+    cyclic_group_class: Type[CyclicGroupElt],
+    scheme: str,
+    k: int,
+    repeat: int,
+    measure_memory: bool,
+) -> Dict[str, Any]:
+    constraints, witness, public_inputs = make_constraints(k, field_class)
+    mult_subgroup = field_class.get_roots_of_unity(constraints.n)
+
+    (pcs_prover, pcs_verifier, codec), setup_s = _time(
+        lambda: make_pcs(
+            scheme, field_class, constraints.n, pairing, cyclic_group_class
+        )
+    )
+    preprocessed_input, preprocess_s = _time(
+        lambda: Preprocessor.preprocess_plonk_constraints(
+            constraints=constraints,
+            mult_subgroup=mult_subgroup,
+            field_class=field_class,
+        )
+    )
+    plonk_prover = PlonkProver(
+        pcs_prover=pcs_prover,
+        constraints=constraints,
+        preprocessed_input=preprocessed_input,
+        mult_subgroup=mult_subgroup,
+        field_class=field_class,
+    )
+    plonk_verifier = PlonkVerifier(
+        pcs_verifier=pcs_verifier,
+        preprocessed_input=preprocessed_input,
+        mult_subgroup=mult_subgroup,
+        field_class=field_class,
+    )
+
+    # Best of repeat runs, with counts taken from a single run
+    prove_s = verify_s = float("inf")
+    prove_counts: Dict[str, int] = {}
+    verify_counts: Dict[str, int] = {}
+    for _ in range(repeat):
+        Counter.reset()
+        proof, elapsed = _time(
+            lambda: plonk_prover.prove(witness=witness, public_inputs=public_inputs)
+        )
+        prove_s = min(prove_s, elapsed)
+        prove_counts = dict(Counter.call_count)
+
+        Counter.reset()
+        valid_proof, elapsed = _time(
+            lambda: plonk_verifier.verify(proof=proof, public_inputs=public_inputs)
+        )
+        verify_s = min(verify_s, elapsed)
+        verify_counts = dict(Counter.call_count)
+        if not valid_proof:
+            raise ValueError("Benchmark produced an invalid proof!")
+    Counter.reset()
+
+    # Tracing allocations slows proving down, so memory is measured in its own run
+    # The peak can only be reset from Python 3.9, so on 3.8 it is measured only
+    # when tracing starts here
+    peak_memory_bytes = None
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if measure_memory and (started_tracemalloc or hasattr(tracemalloc, "reset_peak")):
+        if started_tracemalloc:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        plonk_prover.prove(witness=witness, public_inputs=public_inputs)
+        peak_memory_bytes = tracemalloc.get_traced_memory()[1] - baseline_bytes
+        if started_tracemalloc:
+            tracemalloc.stop()
+        Counter.reset()
+
+    return {
+        "field": field_name,
+        "scheme": scheme,
+        "k": k,
+        "gates": constraints.n,
+        "setup_s": setup_s,
+        "preprocess_s": preprocess_s,
+        "prove_s": prove_s,
+        "verify_s": verify_s,
+        "peak_memory_bytes": peak_memory_bytes,
+        "proof_bytes": len(codec.encode(proof)),
+        "prove_counts": prove_counts,
+        "verify_counts": verify_counts,
+    }
+
+
+def run_bench(
+    sizes: List[int],
+    field_names: List[str],
+    schemes: List[str],
+    repeat: int = 1,
+    measure_memory: bool = True,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    results = []
+    for field_name in field_names:
+        for scheme in schemes:
+            for k in sizes:
+                result = run_case(
+                    field_name, scheme, k, repeat=repeat, measure_memory=measure_memory
+                )
+                if log is not None:
+                    log(
+                        f"{get_case_key(result):<30} prove {result['prove_s']:8.3f}s"
+                        f"  verify {result['verify_s']:8.3f}s"
+                    )
+                results.append(result)
+
+    return {
+        "version": BENCH_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+# ---------- Regressions against a baseline ----------
+def get_case_key(result: Dict[str, Any]) -> str:
+    return f"{result['field']}/{result['scheme']}/k={result['k']}"
+
+
+# Every metric, operation count included, that grew by more than threshold as a
+# fraction of its baseline value. Cases missing from either run are skipped
+# Times below min_seconds in both runs are too noisy to compare
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1,
+    min_seconds: float = 0.01,
+) -> List[str]:
+    if baseline.get("version") != BENCH_VERSION:
+        raise ValueError("Unsupported baseline version!")
+    baseline_results = {get_case_key(r): r for r in baseline["results"]}
+
+    regressions = []
+    for result in current["results"]:
+        key = get_case_key(result)
+        if key not in baseline_results:
+            continue
+        old_result = baseline_results[key]
+
+        metrics: List[Tuple[str, Any, Any]] = []
+        for metric in TIME_METRICS:
+            if max(old_result[metric], result[metric]) >= min_seconds:
+                metrics.append((metric, old_result[metric], result[metric]))
+        for metric in SIZE_METRICS:
+            metrics.append((metric, old_result[metric], result[metric]))
+        for counts in ["prove_counts", "verify_counts"]:
+            for name, count in result[counts].items():
+                metrics.append(
+                    (f"{counts}[{name}]", old_result[counts].get(name, 0), count)
+                )
+
+        for metric, old, new in metrics:
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append(f"{key} {metric}: {old} -> {new}")
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PLONK proving")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[2, 3, 4], help="log2 gate counts"
+    )
+    parser.add_argument(
+        "--fields", nargs="+", choices=list(FIELDS.keys()), default=list(FIELDS.keys())
+    )
+    parser.add_argument("--schemes", nargs="+", choices=SCHEMES, default=SCHEMES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results at this path")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    current = run_bench(
+        sizes=args.sizes,
+        field_names=args.fields,
+        schemes=args.schemes,
+        repeat=args.repeat,
+        measure_memory=not args.no_memory,
+        log=print,
+    )
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_results(baseline, current, threshold=args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,46 @@
 from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, DefaultDict, Dict, Iterator, List, Optional, Tuple
 import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import types
 
 
 class Counter:
-    call_count = defaultdict(int)
+    call_count: DefaultDict[str, int] = defaultdict(int)
+    # Calls made over each open span, counted alongside call_count
+    span_counts: Tuple[DefaultDict[str, int], ...] = ()
+    # Guards the counts, since += on a dict entry is not atomic across threads
+    # Forked children get a fresh lock in case another thread held it
+    lock = threading.Lock()
 
     def __init__(self, func):
         self.func = func
+        self.name = func.__qualname__
         functools.update_wrapper(self, func)
 
     def __call__(self, *args, **kwargs):
-        Counter.call_count[self.func.__qualname__] += 1
+        with Counter.lock:
+            Counter.call_count[self.name] += 1
+            for counts in Counter.span_counts:
+                counts[self.name] += 1
         return self.func(*args, **kwargs)
 
+    # Pickled by reference, like the function it wraps, so that tables and pools
+    # holding counted functions can be sent to worker processes
+    def __reduce__(self):
+        return self.name
+
+    # Bind like a plain function, which is cheaper than building a partial
     def __get__(self, instance, owner):
         if instance is None:
             return self
-        return functools.partial(self, instance)
+        return types.MethodType(self, instance)
 
     @classmethod
     def display(cls):
@@ -25,4 +49,185 @@ class Counter:
 
     @classmethod
     def reset(cls):
-        Counter.call_count.clear()
+        with Counter.lock:
+            Counter.call_count.clear()
+
+
+def _reset_counter_lock() -> None:
+    Counter.lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_counter_lock)
+
+
+# ---------- Profiler ----------
+
+
+@dataclass
+class SpanRecord:
+    path: str  # Names of enclosing spans joined by "/"
+    start_ns: int
+    wall_ns: int
+    cpu_ns: int
+    thread_id: int
+    # Change in traced memory over the span, when tracing allocations
+    alloc_bytes: Optional[int]
+    # Counter calls made over the span, across all threads
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+# Records nested spans of wall and CPU time while active, as in
+#     with Profiler() as profiler:
+#         prover.prove(...)
+#     profiler.to_json()
+# Spans are opened with span or traced, which cost one global lookup when no
+# profiler is active
+class Profiler:
+    def __init__(self, trace_allocations: bool = False) -> None:
+        self.trace_allocations: bool = trace_allocations
+        self.records: List[SpanRecord] = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.start_ns: int = 0
+        self.started_tracemalloc: bool = False
+
+    def __enter__(self) -> "Profiler":
+        global _active_profiler
+        if _active_profiler is not None:
+            raise ValueError("Another profiler is already active!")
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.start_ns = time.perf_counter_ns()
+        _active_profiler = self
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        global _active_profiler
+        _active_profiler = None
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(name)
+        path = "/".join(stack)
+        span_counts: DefaultDict[str, int] = defaultdict(int)
+        with Counter.lock:
+            Counter.span_counts = Counter.span_counts + (span_counts,)
+        alloc_before = (
+            tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        )
+        cpu_before = time.thread_time_ns()
+        wall_before = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            wall_ns = time.perf_counter_ns() - wall_before
+            cpu_ns = time.thread_time_ns() - cpu_before
+            alloc_bytes = (
+                tracemalloc.get_traced_memory()[0] - alloc_before
+                if alloc_before is not None and tracemalloc.is_tracing()
+                else None
+            )
+            with Counter.lock:
+                Counter.span_counts = tuple(
+                    counts
+                    for counts in Counter.span_counts
+                    if counts is not span_counts
+                )
+            stack.pop()
+            record = SpanRecord(
+                path=path,
+                start_ns=wall_before - self.start_ns,
+                wall_ns=wall_ns,
+                cpu_ns=cpu_ns,
+                thread_id=threading.get_ident(),
+                alloc_bytes=alloc_bytes,
+                counts=dict(span_counts),
+            )
+            with self.lock:
+                self.records.append(record)
+
+    # Totals per span path, in the order spans were first opened
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        res: Dict[str, Dict[str, Any]] = {}
+        for record in sorted(self.records, key=lambda r: r.start_ns):
+            if record.path not in res:
+                res[record.path] = {
+                    "calls": 0,
+                    "wall_s": 0.0,
+                    "cpu_s": 0.0,
+                    "alloc_bytes": None,
+                    "counts": defaultdict(int),
+                }
+            entry = res[record.path]
+            entry["calls"] += 1
+            entry["wall_s"] += record.wall_ns / 1e9
+            entry["cpu_s"] += record.cpu_ns / 1e9
+            if record.alloc_bytes is not None:
+                entry["alloc_bytes"] = (entry["alloc_bytes"] or 0) + record.alloc_bytes
+            for name, count in record.counts.items():
+                entry["counts"][name] += count
+        for entry in res.values():
+            entry["counts"] = dict(entry["counts"])
+        return res
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    # Complete events in the Chrome trace event format, viewable in about:tracing
+    # or Perfetto
+    def to_chrome_trace(self) -> str:
+        events = []
+        for record in self.records:
+            args: Dict[str, Any] = {"cpu_us": record.cpu_ns / 1e3}
+            if record.alloc_bytes is not None:
+                args["alloc_bytes"] = record.alloc_bytes
+            args.update(record.counts)
+            events.append(
+                {
+                    "name": record.path.split("/")[-1],
+                    "cat": record.path,
+                    "ph": "X",
+                    "ts": record.start_ns / 1e3,
+                    "dur": record.wall_ns / 1e3,
+                    "pid": os.getpid(),
+                    "tid": record.thread_id,
+                    "args": args,
+                }
+            )
+        return json.dumps({"traceEvents": events})
+
+
+_active_profiler: Optional[Profiler] = None
+
+
+# Shared no-op context, so disabled spans allocate nothing
+_no_span = nullcontext()
+
+
+def span(name: str):
+    if _active_profiler is None:
+        return _no_span
+    return _active_profiler.span(name)
+
+
+# Decorator recording every call of the function as a span with the given name
+def traced(name: str) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_profiler is None:
+                return func(*args, **kwargs)
+            with _active_profiler.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
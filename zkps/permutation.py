@@ -0,0 +1,72 @@
+from typing import Generic, List, Sequence, Tuple, Type
+from algebra.field import FElt, FieldVector
+from algebra.algorithms import batch_inverse
+from constraints import PlonkConstraints
+from metrics import Counter
+
+
+class PermutationArgument(Generic[FElt]):
+    # Values of the identity and permutation polynomials Sid_j, S_j over the domain
+    # We add 1 to each of the below values to match the paper...
+    # Identity and permutation polynomials should be defined on [1..3n]
+    @staticmethod
+    def get_permutation_values(
+        constraints: PlonkConstraints, field_class: Type[FElt]
+    ) -> Tuple[List[List[FElt]], List[List[FElt]]]:
+        permutation = constraints.get_permutation()
+        s_id_values: List[List[FElt]] = []
+        s_sigma_values: List[List[FElt]] = []
+        for j in range(3):  # Follow index notation from paper
+            s_id_values.append([])
+            s_sigma_values.append([])
+            for i in range(constraints.n):
+                index = j * constraints.n + i
+                s_id_values[j].append(field_class(index + 1))
+                s_sigma_values[j].append(field_class(permutation[index] + 1))
+
+        return (s_id_values, s_sigma_values)
+
+    # Returns the values of Z over the domain, where Z(w^0) = 1 and
+    # Z(w^i) = prod_{k < i} f'(w^k) / g'(w^k) with
+    # f'(x) = prod_j (f_j(x) + beta * Sid_j(x) + gamma)
+    # g'(x) = prod_j (f_j(x) + beta * S_j(x) + gamma)
+    @staticmethod
+    @Counter
+    def compute_grand_product(
+        wire_values: List[Sequence[FElt]],
+        s_id_values: List[Sequence[FElt]],
+        s_sigma_values: List[Sequence[FElt]],
+        beta: FElt,
+        gamma: FElt,
+    ) -> List[FElt]:
+        if not len(wire_values) == len(s_id_values) == len(s_sigma_values):
+            raise ValueError("Must provide identity and permutation values per wire!")
+        field_class = type(beta)
+        n = len(wire_values[0])
+
+        f_prime = FieldVector(field_class, [1] * n)
+        g_prime = FieldVector(field_class, [1] * n)
+        for wires, ids, sigmas in zip(wire_values, s_id_values, s_sigma_values):
+            f_j = FieldVector.from_elts(field_class, wires) + gamma
+            f_prime = f_prime * (f_j + FieldVector.from_elts(field_class, ids) * beta)
+            g_prime = g_prime * (
+                f_j + FieldVector.from_elts(field_class, sigmas) * beta
+            )
+
+        # batch_inverse() leaves zeros in place, which would give a wrong Z
+        if 0 in g_prime.values[: n - 1]:
+            raise ValueError("Permutation denominator vanishes on the domain!")
+
+        # Running product over the first n - 1 ratios, with a single inversion
+        ratios = f_prime[: n - 1] * batch_inverse(g_prime[: n - 1])
+        p = field_class.field_modulus
+        Z_values = [1]
+        for ratio in ratios.values:
+            Z_values.append(Z_values[-1] * ratio % p)
+
+        return FieldVector(field_class, Z_values).to_elts()
+
+    # Values of Z(w * x) over the domain, a rotation of the values of Z
+    @staticmethod
+    def shift_values(Z_values: List[FElt]) -> List[FElt]:
+        return Z_values[1:] + Z_values[:1]
@@ -1,10 +1,14 @@
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import List, Generic, Type
-from copy import deepcopy
-from algebra.field import FElt
+from multiprocessing.context import BaseContext
+from typing import Any, Dict, Iterator, List, Generic, Optional, Tuple, Type
+from algebra.field import FElt, FieldVector
 from algebra.polynomial import Polynomial
+from algebra.evaluation_polynomial import EvaluationPolynomial
+from algebra.ntt import get_ntt_domain, get_coset_shift, is_ntt_domain
 from constraints import PlonkConstraints
 from preprocessor import PlonkPreprocessedInput
+from permutation import PermutationArgument
 from polynomial_commitment_schemes.pcs import (
     PCSProver,
     PCSVerifier,
@@ -12,6 +16,7 @@ from polynomial_commitment_schemes.pcs import (
     Opening,
 )
 from transcript import Transcript
+from metrics import span, traced
 
 
 @dataclass
@@ -31,6 +36,18 @@ class PlonkProof(Generic[FElt]):
     batch_op: Opening
 
 
+# Fiat-Shamir challenges derived from the transcript of a proof
+@dataclass
+class PlonkChallenges(Generic[FElt]):
+    beta: FElt
+    gamma: FElt
+    a_1: FElt
+    a_2: FElt
+    a_3: FElt
+    eval_chal: FElt
+    open_chal: FElt
+
+
 class PlonkProver(Generic[FElt]):
     def __init__(
         self,
@@ -39,6 +56,8 @@ class PlonkProver(Generic[FElt]):
         preprocessed_input: PlonkPreprocessedInput[FElt],
         mult_subgroup: List[FElt],
         field_class: Type[FElt],
+        debug_checks: bool = False,
+        legacy_transcript: bool = False,
     ) -> None:
         if not constraints.is_valid_constraint():
             raise ValueError("Constraints must be valid!")
@@ -52,7 +71,64 @@ class PlonkProver(Generic[FElt]):
         self.preprocessed_input: PlonkPreprocessedInput[FElt] = preprocessed_input
         self.mult_subgroup: List[FElt] = mult_subgroup
         self.field_class: Type[FElt] = field_class
+        self.is_subgroup_domain: bool = is_ntt_domain(mult_subgroup)
+        # Re-checks that Z_S divides the quotient numerator when T is built on a coset
+        self.debug_checks: bool = debug_checks
+        self.legacy_transcript: bool = legacy_transcript
+        # Pool of processes for the independent commitments within one proof
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    # Workers hold a copy of this prover without its pool
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["pool"] = None
+        return state
+
+    # ---------- Parallel commitments within a proof ----------
+    # While the pool is running, prove interpolates and commits to f_L, f_R, f_O
+    # and then to Z, Z_shift concurrently, and evaluates all six polynomials at
+    # eval_chal concurrently. Results are appended to the transcript in a fixed
+    # order, so proofs are the same as without the pool
+    # T and the batch opening are single PCS calls and stay in this process
+    def start_pool(
+        self,
+        max_workers: Optional[int] = None,
+        mp_context: Optional[BaseContext] = None,
+    ) -> None:
+        if self.pool is not None:
+            raise ValueError("Pool is already running!")
+        self.pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_prove_worker,
+            initargs=(self,),
+        )
 
+    def close_pool(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def _interpolate_and_commit(
+        self, values_list: List[List[FElt]]
+    ) -> List[Tuple[Polynomial[FElt], Commitment]]:
+        if self.pool is None:
+            return [
+                _interpolate_and_commit_with(self, values) for values in values_list
+            ]
+        futures = [
+            self.pool.submit(_interpolate_and_commit_on_worker, values)
+            for values in values_list
+        ]
+        return [future.result() for future in futures]
+
+    def _evaluate(self, fs: List[Polynomial[FElt]], z: FElt) -> List[FElt]:
+        if self.pool is None:
+            return [f(z) for f in fs]
+        futures = [self.pool.submit(_evaluate, f, z) for f in fs]
+        return [future.result() for future in futures]
+
+    @traced("plonk.prove")
     def prove(self, witness: List[FElt], public_inputs: List[FElt]) -> PlonkProof[FElt]:
         if len(witness) != self.constraints.m:
             raise ValueError(
@@ -63,84 +139,200 @@ class PlonkProver(Generic[FElt]):
                 "Must have public input length equal to number of public inputs in constraints!"
             )
 
-        transcript = Transcript[FElt](field_class=self.field_class)
+        transcript = Transcript[FElt](
+            field_class=self.field_class, legacy=self.legacy_transcript
+        )
 
         # ---------- Commit to f_L, f_R, f_O ----------
-        f_L_values = [
-            witness[self.constraints.a[i].n - 1] for i in range(self.constraints.n)
-        ]
-        f_L = Polynomial.interpolate_poly(
-            domain=self.mult_subgroup, values=f_L_values, field_class=self.field_class
-        )
-        f_L_cm = self.pcs_prover.commit(f_L)
-        f_R_values = [
-            witness[self.constraints.b[i].n - 1] for i in range(self.constraints.n)
-        ]
-        f_R = Polynomial.interpolate_poly(
-            domain=self.mult_subgroup, values=f_R_values, field_class=self.field_class
-        )
-        f_R_cm = self.pcs_prover.commit(f_R)
-        f_O_values = [
-            witness[self.constraints.c[i].n - 1] for i in range(self.constraints.n)
-        ]
-        f_O = Polynomial.interpolate_poly(
-            domain=self.mult_subgroup, values=f_O_values, field_class=self.field_class
-        )
-        f_O_cm = self.pcs_prover.commit(f_O)
-        transcript.append(f_L_cm)
-        transcript.append(f_R_cm)
-        transcript.append(f_O_cm)
+        with span("commit_wires"):
+            f_L_values = [
+                witness[self.constraints.a[i].n - 1] for i in range(self.constraints.n)
+            ]
+            f_R_values = [
+                witness[self.constraints.b[i].n - 1] for i in range(self.constraints.n)
+            ]
+            f_O_values = [
+                witness[self.constraints.c[i].n - 1] for i in range(self.constraints.n)
+            ]
+            (f_L, f_L_cm), (f_R, f_R_cm), (f_O, f_O_cm) = self._interpolate_and_commit(
+                [f_L_values, f_R_values, f_O_values]
+            )
+            transcript.append(f_L_cm)
+            transcript.append(f_R_cm)
+            transcript.append(f_O_cm)
 
         # ---------- Commit to grand product polynomial Z ----------
-        beta = transcript.get_hash(salt=bytes(0))
-        gamma = transcript.get_hash(salt=bytes(1))
-        f_prime_1 = (
-            f_L + self.preprocessed_input.Sid1 * beta + Polynomial[FElt](coeffs=[gamma])
-        )
-        g_prime_1 = (
-            f_L + self.preprocessed_input.S1 * beta + Polynomial[FElt](coeffs=[gamma])
-        )
-        f_prime_2 = (
-            f_R + self.preprocessed_input.Sid2 * beta + Polynomial[FElt](coeffs=[gamma])
-        )
-        g_prime_2 = (
-            f_R + self.preprocessed_input.S2 * beta + Polynomial[FElt](coeffs=[gamma])
+        with span("grand_product"):
+            beta = transcript.get_hash(salt=bytes(0))
+            gamma = transcript.get_hash(salt=bytes(1))
+            Z_values = PermutationArgument.compute_grand_product(
+                wire_values=[f_L_values, f_R_values, f_O_values],
+                s_id_values=[
+                    self.preprocessed_input.get_domain_evals(name, self.mult_subgroup)
+                    for name in ["Sid1", "Sid2", "Sid3"]
+                ],
+                s_sigma_values=[
+                    self.preprocessed_input.get_domain_evals(name, self.mult_subgroup)
+                    for name in ["S1", "S2", "S3"]
+                ],
+                beta=beta,
+                gamma=gamma,
+            )
+            # Represents values of Z(a*g)
+            Z_shift_values = PermutationArgument.shift_values(Z_values)
+            (Z, Z_cm), (Z_shift, Z_shift_cm) = self._interpolate_and_commit(
+                [Z_values, Z_shift_values]
+            )
+            transcript.append(Z_cm)
+            transcript.append(Z_shift_cm)
+
+        # ---------- Commit to quotient polynomial T ----------
+        with span("quotient"):
+            a_1 = transcript.get_hash(salt=bytes(0))
+            a_2 = transcript.get_hash(salt=bytes(1))
+            a_3 = transcript.get_hash(salt=bytes(2))
+            if self.is_subgroup_domain:
+                T = self._compute_T_on_coset(
+                    a_1=a_1,
+                    a_2=a_2,
+                    a_3=a_3,
+                    beta=beta,
+                    gamma=gamma,
+                    f_L=f_L,
+                    f_R=f_R,
+                    f_O=f_O,
+                    Z=Z,
+                    Z_shift=Z_shift,
+                    public_inputs=public_inputs,
+                )
+            else:
+                T = self._compute_T_by_division(
+                    a_1=a_1,
+                    a_2=a_2,
+                    a_3=a_3,
+                    beta=beta,
+                    gamma=gamma,
+                    f_L=f_L,
+                    f_R=f_R,
+                    f_O=f_O,
+                    Z=Z,
+                    Z_shift=Z_shift,
+                    public_inputs=public_inputs,
+                )
+            T_cm = self.pcs_prover.commit(T)
+            transcript.append(T_cm)
+
+        # ---------- Compute evaluations of all polynomials ----------
+        with span("evaluations"):
+            eval_chal = transcript.get_hash()
+            (
+                f_L_eval,
+                f_R_eval,
+                f_O_eval,
+                Z_eval,
+                Z_shift_eval,
+                T_eval,
+            ) = self._evaluate([f_L, f_R, f_O, Z, Z_shift, T], eval_chal)
+            transcript.append(f_L_eval)
+            transcript.append(f_R_eval)
+            transcript.append(f_O_eval)
+            transcript.append(Z_eval)
+            transcript.append(Z_shift_eval)
+            transcript.append(T_eval)
+
+        # ---------- Compute opening proofs of all commitments ----------
+        with span("openings"):
+            open_chal = transcript.get_hash()
+            batch_op = self.pcs_prover.batch_open_at_point(
+                fs=[f_L, f_R, f_O, Z, Z_shift, T],
+                cms=[f_L_cm, f_R_cm, f_O_cm, Z_cm, Z_shift_cm, T_cm],
+                z=eval_chal,
+                ss=[f_L_eval, f_R_eval, f_O_eval, Z_eval, Z_shift_eval, T_eval],
+                op_info=open_chal,
+            )
+
+        return PlonkProof[FElt](
+            f_L_cm=f_L_cm,
+            f_R_cm=f_R_cm,
+            f_O_cm=f_O_cm,
+            Z_cm=Z_cm,
+            Z_shift_cm=Z_shift_cm,
+            T_cm=T_cm,
+            f_L_eval=f_L_eval,
+            f_R_eval=f_R_eval,
+            f_O_eval=f_O_eval,
+            Z_eval=Z_eval,
+            Z_shift_eval=Z_shift_eval,
+            T_eval=T_eval,
+            batch_op=batch_op,
         )
-        f_prime_3 = (
-            f_O + self.preprocessed_input.Sid3 * beta + Polynomial[FElt](coeffs=[gamma])
+
+    # Proves every witness with its public inputs over a pool of processes,
+    # yielding (index, proof) pairs in the order proofs complete
+    # Each worker receives this prover, with its preprocessed input and SRS/CRS,
+    # once when it starts, and proves chunksize witnesses per task
+    def prove_many(
+        self,
+        witnesses: List[List[FElt]],
+        public_inputs: List[List[FElt]],
+        max_workers: Optional[int] = None,
+        chunksize: int = 1,
+        mp_context: Optional[BaseContext] = None,
+    ) -> Iterator[Tuple[int, PlonkProof[FElt]]]:
+        if len(witnesses) != len(public_inputs):
+            raise ValueError("Must provide public inputs for every witness!")
+        if chunksize < 1:
+            raise ValueError("Chunk size must be positive!")
+
+        tasks: List[Tuple[int, Tuple[List[FElt], List[FElt]]]] = list(
+            enumerate(zip(witnesses, public_inputs))
         )
-        g_prime_3 = (
-            f_O + self.preprocessed_input.S3 * beta + Polynomial[FElt](coeffs=[gamma])
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_prove_worker,
+            initargs=(self,),
         )
-        f_prime = f_prime_1 * f_prime_2 * f_prime_3
-        g_prime = g_prime_1 * g_prime_2 * g_prime_3
-        Z_values = [self.field_class.one()]
-        prod = self.field_class.one()
-        for i in range(self.constraints.n - 1):
-            prod *= f_prime(self.mult_subgroup[i]) / g_prime(self.mult_subgroup[i])
-            Z_values.append(
-                self.field_class(prod.n)
-            )  # Copy over product value into new field element
-        Z = Polynomial.interpolate_poly(
-            domain=self.mult_subgroup, values=Z_values, field_class=self.field_class
+        futures: List[Future[List[Tuple[int, PlonkProof[FElt]]]]] = []
+        try:
+            for i in range(0, len(tasks), chunksize):
+                futures.append(executor.submit(_prove_chunk, tasks[i : i + chunksize]))
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            # Drops pending chunks if the caller stops consuming early. Cancels
+            # by hand, as shutdown only takes cancel_futures from Python 3.9
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    # Computes T by long division of the combined constraint polynomial by Z_S
+    # Used when mult_subgroup is not a power-of-2 subgroup of roots of unity
+    def _compute_T_by_division(
+        self,
+        a_1: FElt,
+        a_2: FElt,
+        a_3: FElt,
+        beta: FElt,
+        gamma: FElt,
+        f_L: Polynomial[FElt],
+        f_R: Polynomial[FElt],
+        f_O: Polynomial[FElt],
+        Z: Polynomial[FElt],
+        Z_shift: Polynomial[FElt],
+        public_inputs: List[FElt],
+    ) -> Polynomial[FElt]:
+        gamma_poly = Polynomial[FElt](coeffs=[gamma])
+        f_prime = (
+            (f_L + self.preprocessed_input.Sid1 * beta + gamma_poly)
+            * (f_R + self.preprocessed_input.Sid2 * beta + gamma_poly)
+            * (f_O + self.preprocessed_input.Sid3 * beta + gamma_poly)
         )
-        Z_cm = self.pcs_prover.commit(Z)
-        Z_shift_values = deepcopy(
-            Z_values[1:] + Z_values[:1]
-        )  # Represents values of Z(a*g)
-        Z_shift = Polynomial.interpolate_poly(
-            domain=self.mult_subgroup,
-            values=Z_shift_values,
-            field_class=self.field_class,
+        g_prime = (
+            (f_L + self.preprocessed_input.S1 * beta + gamma_poly)
+            * (f_R + self.preprocessed_input.S2 * beta + gamma_poly)
+            * (f_O + self.preprocessed_input.S3 * beta + gamma_poly)
         )
-        Z_shift_cm = self.pcs_prover.commit(Z_shift)
-        transcript.append(Z_cm)
-        transcript.append(Z_shift_cm)
-
-        # ---------- Commit to quotient polynomial T ----------
-        a_1 = transcript.get_hash(salt=bytes(0))
-        a_2 = transcript.get_hash(salt=bytes(1))
-        a_3 = transcript.get_hash(salt=bytes(2))
         L_1 = Polynomial.lagrange_poly(
             domain=self.mult_subgroup, index=0, field_class=self.field_class
         )
@@ -192,49 +384,100 @@ class PlonkProver(Generic[FElt]):
             raise AssertionError(
                 "Unable to compute T polynomial: Z_S does not divide evenly!"
             )
-        T_cm = self.pcs_prover.commit(T)
-        transcript.append(T_cm)
 
-        # ---------- Compute evaluations of all polynomials ----------
-        eval_chal = transcript.get_hash()
-        f_L_eval = f_L(eval_chal)
-        f_R_eval = f_R(eval_chal)
-        f_O_eval = f_O(eval_chal)
-        Z_eval = Z(eval_chal)
-        Z_shift_eval = Z_shift(eval_chal)
-        T_eval = T(eval_chal)
-        transcript.append(f_L_eval)
-        transcript.append(f_R_eval)
-        transcript.append(f_O_eval)
-        transcript.append(Z_eval)
-        transcript.append(Z_shift_eval)
-        transcript.append(T_eval)
+        return T
 
-        # ---------- Compute opening proofs of all commitments ----------
-        open_chal = transcript.get_hash()
-        batch_op = self.pcs_prover.batch_open_at_point(
-            fs=[f_L, f_R, f_O, Z, Z_shift, T],
-            cms=[f_L_cm, f_R_cm, f_O_cm, Z_cm, Z_shift_cm, T_cm],
-            z=eval_chal,
-            ss=[f_L_eval, f_R_eval, f_O_eval, Z_eval, Z_shift_eval, T_eval],
-            op_info=open_chal,
+    # Computes T pointwise on a coset of a domain of size 4n, where Z_S = X^n - 1
+    # takes only four distinct nonzero values, then interpolates T from its evaluations
+    def _compute_T_on_coset(
+        self,
+        a_1: FElt,
+        a_2: FElt,
+        a_3: FElt,
+        beta: FElt,
+        gamma: FElt,
+        f_L: Polynomial[FElt],
+        f_R: Polynomial[FElt],
+        f_O: Polynomial[FElt],
+        Z: Polynomial[FElt],
+        Z_shift: Polynomial[FElt],
+        public_inputs: List[FElt],
+    ) -> Polynomial[FElt]:
+        n = len(self.mult_subgroup)
+        one = self.field_class.one()
+        zero = self.field_class.zero()
+        ext_domain = get_ntt_domain(self.field_class, 4 * n)
+        shift = get_coset_shift(self.field_class)
+
+        def extend(f: Polynomial[FElt]) -> EvaluationPolynomial[FElt]:
+            return EvaluationPolynomial.from_poly(f, ext_domain, shift)
+
+        L_1 = Polynomial.interpolate_poly(
+            domain=self.mult_subgroup,
+            values=[one] + [zero] * (n - 1),
+            field_class=self.field_class,
         )
+        PI = Polynomial.interpolate_poly(
+            domain=self.mult_subgroup,
+            values=[-x for x in public_inputs] + [zero] * (n - len(public_inputs)),
+            field_class=self.field_class,
+        )
+        f_L_ext = extend(f_L)
+        f_R_ext = extend(f_R)
+        f_O_ext = extend(f_O)
+        Z_ext = extend(Z)
+        Z_shift_ext = extend(Z_shift)
 
-        return PlonkProof[FElt](
-            f_L_cm=f_L_cm,
-            f_R_cm=f_R_cm,
-            f_O_cm=f_O_cm,
-            Z_cm=Z_cm,
-            Z_shift_cm=Z_shift_cm,
-            T_cm=T_cm,
-            f_L_eval=f_L_eval,
-            f_R_eval=f_R_eval,
-            f_O_eval=f_O_eval,
-            Z_eval=Z_eval,
-            Z_shift_eval=Z_shift_eval,
-            T_eval=T_eval,
-            batch_op=batch_op,
+        # Selector and permutation evaluations are cached across proofs
+        def preprocessed(name: str) -> EvaluationPolynomial[FElt]:
+            return self.preprocessed_input.get_coset_evals(name, self.mult_subgroup)
+
+        F_1 = extend(L_1) * (Z_ext - one)
+        f_prime = (
+            (f_L_ext + preprocessed("Sid1") * beta + gamma)
+            * (f_R_ext + preprocessed("Sid2") * beta + gamma)
+            * (f_O_ext + preprocessed("Sid3") * beta + gamma)
+        )
+        g_prime = (
+            (f_L_ext + preprocessed("S1") * beta + gamma)
+            * (f_R_ext + preprocessed("S2") * beta + gamma)
+            * (f_O_ext + preprocessed("S3") * beta + gamma)
         )
+        F_2 = Z_ext * f_prime - g_prime * Z_shift_ext
+        F_3 = (
+            preprocessed("PqL") * f_L_ext
+            + preprocessed("PqR") * f_R_ext
+            + preprocessed("PqO") * f_O_ext
+            + preprocessed("PqM") * f_L_ext * f_R_ext
+            + preprocessed("PqC")
+            + extend(PI)
+        )
+        numerator = F_1 * a_1 + F_2 * a_2 + F_3 * a_3
+
+        # (shift * w^i)^n - 1 only depends on i mod 4 since w^n is a 4th root of unity
+        shift_n = shift**n
+        Z_S_inv = [one / (shift_n * ext_domain[j * n] - one) for j in range(4)]
+        T_ext = numerator * EvaluationPolynomial[FElt](
+            values=FieldVector.from_elts(
+                self.field_class, [Z_S_inv[i % 4] for i in range(4 * n)]
+            ),
+            domain=ext_domain,
+            shift=shift,
+        )
+        T = T_ext.to_poly()
+
+        # If prover is honest Z_S divides cleanly, so T * Z_S = T * X^n - T
+        # equals the numerator exactly
+        if self.debug_checks:
+            T_rem = (
+                Polynomial[FElt](coeffs=[zero] * n + T.coeffs) - T - numerator.to_poly()
+            )
+            if any(coeff != zero for coeff in T_rem.coeffs):
+                raise AssertionError(
+                    "Unable to compute T polynomial: Z_S does not divide evenly!"
+                )
+
+        return T
 
 
 class PlonkVerifier(Generic[FElt]):
@@ -244,15 +487,63 @@ class PlonkVerifier(Generic[FElt]):
         preprocessed_input: PlonkPreprocessedInput[FElt],
         mult_subgroup: List[FElt],
         field_class: Type[FElt],
+        legacy_transcript: bool = False,
     ) -> None:
         self.pcs_verifier: PCSVerifier[FElt] = pcs_verifier
         self.preprocessed_input: PlonkPreprocessedInput[FElt] = preprocessed_input
         self.mult_subgroup: List[FElt] = mult_subgroup
         self.field_class: Type[FElt] = field_class
+        self.is_subgroup_domain: bool = is_ntt_domain(mult_subgroup)
+        # Derive challenges as before the running hash state, to verify older proofs
+        self.legacy_transcript: bool = legacy_transcript
 
+    @traced("plonk.verify")
     def verify(self, proof: PlonkProof[FElt], public_inputs: List[FElt]) -> bool:
-        # ---------- Re-execute transcript based on proof values ----------
-        transcript = Transcript[FElt](field_class=self.field_class)
+        challenges = self._replay_transcript(proof)
+        if not self._verify_openings(proof, challenges):
+            return False
+        return self._verify_quotient_identity(proof, public_inputs, challenges)
+
+    # Verifies many proofs for the same circuit, checking every quotient identity in
+    # the field and folding all opening checks into one call to the PCS verifier
+    # Returns whether each proof is valid
+    @traced("plonk.verify_batch")
+    def verify_batch(
+        self, proofs: List[PlonkProof[FElt]], public_inputs_list: List[List[FElt]]
+    ) -> List[bool]:
+        if len(proofs) != len(public_inputs_list):
+            raise ValueError("Must provide public inputs for every proof!")
+
+        all_challenges = [self._replay_transcript(proof) for proof in proofs]
+        results = [
+            self._verify_quotient_identity(proof, public_inputs, challenges)
+            for proof, public_inputs, challenges in zip(
+                proofs, public_inputs_list, all_challenges
+            )
+        ]
+
+        # ---------- Verify all polynomial commitments at once ----------
+        indices = [i for i in range(len(proofs)) if results[i]]
+        if self.pcs_verifier.verify_many_batches_at_points(
+            ops=[proofs[i].batch_op for i in indices],
+            cms_list=[self._get_commitments(proofs[i]) for i in indices],
+            zs=[all_challenges[i].eval_chal for i in indices],
+            ss_list=[self._get_evaluations(proofs[i]) for i in indices],
+            op_infos=[all_challenges[i].open_chal for i in indices],
+        ):
+            return results
+
+        # Fall back to verifying each opening on its own to find the invalid proofs
+        for i in indices:
+            results[i] = self._verify_openings(proofs[i], all_challenges[i])
+        return results
+
+    # ---------- Re-execute transcript based on proof values ----------
+    @traced("replay_transcript")
+    def _replay_transcript(self, proof: PlonkProof[FElt]) -> PlonkChallenges[FElt]:
+        transcript = Transcript[FElt](
+            field_class=self.field_class, legacy=self.legacy_transcript
+        )
         transcript.append(proof.f_L_cm)
         transcript.append(proof.f_R_cm)
         transcript.append(proof.f_O_cm)
@@ -265,82 +556,179 @@ class PlonkVerifier(Generic[FElt]):
         a_3 = transcript.get_hash(salt=bytes(2))
         transcript.append(proof.T_cm)
         eval_chal = transcript.get_hash()
-        transcript.append(proof.f_L_eval)
-        transcript.append(proof.f_R_eval)
-        transcript.append(proof.f_O_eval)
-        transcript.append(proof.Z_eval)
-        transcript.append(proof.Z_shift_eval)
-        transcript.append(proof.T_eval)
+        for s in self._get_evaluations(proof):
+            transcript.append(s)
         open_chal = transcript.get_hash()
 
-        # ---------- Verify all polynomial commitments ----------
-        if not self.pcs_verifier.verify_batch_at_point(
+        return PlonkChallenges[FElt](
+            beta=beta,
+            gamma=gamma,
+            a_1=a_1,
+            a_2=a_2,
+            a_3=a_3,
+            eval_chal=eval_chal,
+            open_chal=open_chal,
+        )
+
+    @staticmethod
+    def _get_commitments(proof: PlonkProof[FElt]) -> List[Commitment]:
+        return [
+            proof.f_L_cm,
+            proof.f_R_cm,
+            proof.f_O_cm,
+            proof.Z_cm,
+            proof.Z_shift_cm,
+            proof.T_cm,
+        ]
+
+    @staticmethod
+    def _get_evaluations(proof: PlonkProof[FElt]) -> List[FElt]:
+        return [
+            proof.f_L_eval,
+            proof.f_R_eval,
+            proof.f_O_eval,
+            proof.Z_eval,
+            proof.Z_shift_eval,
+            proof.T_eval,
+        ]
+
+    # ---------- Verify all polynomial commitments ----------
+    @traced("verify_openings")
+    def _verify_openings(
+        self, proof: PlonkProof[FElt], challenges: PlonkChallenges[FElt]
+    ) -> bool:
+        return self.pcs_verifier.verify_batch_at_point(
             op=proof.batch_op,
-            cms=[
-                proof.f_L_cm,
-                proof.f_R_cm,
-                proof.f_O_cm,
-                proof.Z_cm,
-                proof.Z_shift_cm,
-                proof.T_cm,
-            ],
-            z=eval_chal,
-            ss=[
-                proof.f_L_eval,
-                proof.f_R_eval,
-                proof.f_O_eval,
-                proof.Z_eval,
-                proof.Z_shift_eval,
-                proof.T_eval,
-            ],
-            op_info=open_chal,
-        ):
-            return False
+            cms=self._get_commitments(proof),
+            z=challenges.eval_chal,
+            ss=self._get_evaluations(proof),
+            op_info=challenges.open_chal,
+        )
+
+    @traced("quotient_identity")
+    def _verify_quotient_identity(
+        self,
+        proof: PlonkProof[FElt],
+        public_inputs: List[FElt],
+        challenges: PlonkChallenges[FElt],
+    ) -> bool:
+        beta = challenges.beta
+        gamma = challenges.gamma
+        a_1 = challenges.a_1
+        a_2 = challenges.a_2
+        a_3 = challenges.a_3
+        eval_chal = challenges.eval_chal
+
+        # ---------- Compute evaluations of L_1, PI and divisor polynomial Z_S ----------
+        if self.is_subgroup_domain:
+            # Z_S = X^n - 1 and Lagrange polynomials have a barycentric closed form,
+            # only needed for L_1 and the public input positions
+            Z_S_eval = eval_chal ** len(self.mult_subgroup) - self.field_class.one()
+            lagrange_evals = Polynomial.eval_lagrange_polys_on_mult_subgroup(
+                mult_subgroup=self.mult_subgroup,
+                indices=list(range(max(1, len(public_inputs)))),
+                x=eval_chal,
+            )
+            L_1_eval = lagrange_evals[0]
+            PI_eval = self.field_class.zero()
+            for i in range(len(public_inputs)):
+                PI_eval -= lagrange_evals[i] * public_inputs[i]
+        else:
+            L_1 = Polynomial.lagrange_poly(
+                domain=self.mult_subgroup, index=0, field_class=self.field_class
+            )
+            L_1_eval = L_1(eval_chal)
+            PI = Polynomial[FElt](coeffs=[self.field_class.zero()])
+            for i in range(len(public_inputs)):
+                lagrange = Polynomial.lagrange_poly(
+                    domain=self.mult_subgroup, index=i, field_class=self.field_class
+                )
+                PI += lagrange * -public_inputs[i]
+            PI_eval = PI(eval_chal)
+            Z_S = Polynomial[FElt](coeffs=[self.field_class.one()])
+            for i in range(len(self.mult_subgroup)):
+                Z_S *= Polynomial[FElt](
+                    coeffs=[-self.mult_subgroup[i], self.field_class.one()]
+                )
+            Z_S_eval = Z_S(eval_chal)
+
+        # ---------- Evaluate preprocessed polynomials from their coefficients ----------
+        preprocessed_evals = {
+            name: getattr(self.preprocessed_input, name)(eval_chal)
+            for name in PlonkPreprocessedInput.poly_names()
+        }
 
         # ---------- Compute evaulation of F_1 ----------
-        L_1 = Polynomial.lagrange_poly(
-            domain=self.mult_subgroup, index=0, field_class=self.field_class
-        )
-        F_1_eval = L_1(eval_chal) * (proof.Z_eval - self.field_class.one())
+        F_1_eval = L_1_eval * (proof.Z_eval - self.field_class.one())
 
         # ---------- Compute evaulation of F_2 ----------
         f_prime_eval = (
-            (proof.f_L_eval + beta * self.preprocessed_input.Sid1(eval_chal) + gamma)
-            * (proof.f_R_eval + beta * self.preprocessed_input.Sid2(eval_chal) + gamma)
-            * (proof.f_O_eval + beta * self.preprocessed_input.Sid3(eval_chal) + gamma)
+            (proof.f_L_eval + beta * preprocessed_evals["Sid1"] + gamma)
+            * (proof.f_R_eval + beta * preprocessed_evals["Sid2"] + gamma)
+            * (proof.f_O_eval + beta * preprocessed_evals["Sid3"] + gamma)
         )
         g_prime_eval = (
-            (proof.f_L_eval + beta * self.preprocessed_input.S1(eval_chal) + gamma)
-            * (proof.f_R_eval + beta * self.preprocessed_input.S2(eval_chal) + gamma)
-            * (proof.f_O_eval + beta * self.preprocessed_input.S3(eval_chal) + gamma)
+            (proof.f_L_eval + beta * preprocessed_evals["S1"] + gamma)
+            * (proof.f_R_eval + beta * preprocessed_evals["S2"] + gamma)
+            * (proof.f_O_eval + beta * preprocessed_evals["S3"] + gamma)
         )
         F_2_eval = proof.Z_eval * f_prime_eval - g_prime_eval * proof.Z_shift_eval
 
         # ---------- Compute evaulation of F_3 ----------
-        PI = Polynomial[FElt](coeffs=[self.field_class.zero()])
-        for i in range(len(public_inputs)):
-            lagrange = Polynomial.lagrange_poly(
-                domain=self.mult_subgroup, index=i, field_class=self.field_class
-            )
-            PI += lagrange * -public_inputs[i]
         F_3_eval = (
-            self.preprocessed_input.PqL(eval_chal) * proof.f_L_eval
-            + self.preprocessed_input.PqR(eval_chal) * proof.f_R_eval
-            + self.preprocessed_input.PqO(eval_chal) * proof.f_O_eval
-            + self.preprocessed_input.PqM(eval_chal) * proof.f_L_eval * proof.f_R_eval
-            + self.preprocessed_input.PqC(eval_chal)
-            + PI(eval_chal)
+            preprocessed_evals["PqL"] * proof.f_L_eval
+            + preprocessed_evals["PqR"] * proof.f_R_eval
+            + preprocessed_evals["PqO"] * proof.f_O_eval
+            + preprocessed_evals["PqM"] * proof.f_L_eval * proof.f_R_eval
+            + preprocessed_evals["PqC"]
+            + PI_eval
         )
 
-        # ---------- Compute evaulation of divisor polynomial Z_S ----------
-        Z_S = Polynomial[FElt](coeffs=[self.field_class.one()])
-        for i in range(len(self.mult_subgroup)):
-            Z_S *= Polynomial[FElt](
-                coeffs=[-self.mult_subgroup[i], self.field_class.one()]
-            )
-        Z_S_eval = Z_S(eval_chal)
-
         # ---------- Verify quotient identity ----------
         return (
             a_1 * F_1_eval + a_2 * F_2_eval + a_3 * F_3_eval - proof.T_eval * Z_S_eval
         ) == self.field_class.zero()
+
+
+# ---------- Worker processes ----------
+_worker_prover: Optional[PlonkProver] = None
+
+
+# Under fork the worker inherits the prover without pickling it, so __getstate__
+# never runs. Drop any pool it holds, which only the parent can submit to
+def _init_prove_worker(prover: PlonkProver) -> None:
+    global _worker_prover
+    prover.pool = None
+    _worker_prover = prover
+
+
+def _evaluate(f: Polynomial, z: FElt) -> FElt:
+    return f(z)
+
+
+def _interpolate_and_commit_with(
+    prover: PlonkProver, values: List[FElt]
+) -> Tuple[Polynomial, Commitment]:
+    f = Polynomial.interpolate_poly(
+        domain=prover.mult_subgroup, values=values, field_class=prover.field_class
+    )
+    return (f, prover.pcs_prover.commit(f))
+
+
+def _interpolate_and_commit_on_worker(
+    values: List[FElt],
+) -> Tuple[Polynomial, Commitment]:
+    if _worker_prover is None:
+        raise ValueError("Worker has not been initialized with a prover!")
+    return _interpolate_and_commit_with(_worker_prover, values)
+
+
+def _prove_chunk(
+    tasks: List[Tuple[int, Tuple[List[FElt], List[FElt]]]]
+) -> List[Tuple[int, PlonkProof[FElt]]]:
+    if _worker_prover is None:
+        raise ValueError("Worker has not been initialized with a prover!")
+    return [
+        (index, _worker_prover.prove(witness=witness, public_inputs=public_inputs))
+        for index, (witness, public_inputs) in tasks
+    ]
@@ -1,14 +1,19 @@
-from typing import Generic, List, Type, Any
-from dataclasses import dataclass
+import operator
+from multiprocessing.context import BaseContext
+from typing import Generic, Dict, List, Optional, Type, Any
+from dataclasses import dataclass, field
 from algebra.field import FElt
 from algebra.cyclic_group import CyclicGroupElt
 from algebra.polynomial import Polynomial
 from algebra.algorithms import (
     multi_scalar_multiplication,
-    scalar_dot_product,
-    split_vec,
-    add_vec,
-    scale_vec,
+    pippenger_msm,
+    ParallelMSM,
+    fold_vec,
+    fold_int_vec,
+    int_dot_product,
+    batch_inverse,
+    FixedBaseTable,
 )
 from polynomial_commitment_schemes.pcs import (
     Commitment,
@@ -18,12 +23,17 @@ from polynomial_commitment_schemes.pcs import (
 )
 from utils import nearest_larger_power_of_2, get_power_of_2
 from transcript import Transcript
+from metrics import traced
 
 
 @dataclass
 class BulletproofsCRS(Generic[FElt, CyclicGroupElt]):
     G_elts: List[CyclicGroupElt]
     H: CyclicGroupElt
+    # Fixed-base tables for H and the group generator, built on first use
+    tables: Dict[str, FixedBaseTable] = field(
+        default_factory=dict, repr=False, compare=False
+    )
 
     @staticmethod
     # This is not secure since we are generating deterministically
@@ -38,6 +48,30 @@ class BulletproofsCRS(Generic[FElt, CyclicGroupElt]):
 
         return BulletproofsCRS(G_elts=G_elts, H=H)
 
+    # Tables are rebuilt on first use rather than sent to other processes
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["tables"] = {}
+        return state
+
+    def _multiply_fixed_base(
+        self, name: str, base: CyclicGroupElt, n: FElt
+    ) -> CyclicGroupElt:
+        if name not in self.tables:
+            self.tables[name] = FixedBaseTable(
+                base=base,
+                add=operator.add,
+                identity=base.identity(),
+                num_bits=base.order.bit_length(),
+            )
+        return self.tables[name].multiply(n.n)
+
+    def multiply_H(self, n: FElt) -> CyclicGroupElt:
+        return self._multiply_fixed_base("H", self.H, n)
+
+    def multiply_generator(self, n: FElt) -> CyclicGroupElt:
+        return self._multiply_fixed_base("generator", self.H.generator(), n)
+
 
 @dataclass
 class BulletproofsCommitment(Commitment, Generic[CyclicGroupElt]):
@@ -61,6 +95,7 @@ class BulletproofsOpening(Opening, Generic[FElt, CyclicGroupElt]):
     value: BulletproofsOpeningProof
 
 
+# One opening per polynomial, as made before batch openings were aggregated
 @dataclass
 class BulletproofsBatchOpening(Opening):
     value: List[BulletproofsOpeningProof]
@@ -72,27 +107,58 @@ class BulletproofsProver(PCSProver, Generic[FElt, CyclicGroupElt]):
         crs: BulletproofsCRS,
         field_class: Type[FElt],
         cyclic_group_class: Type[CyclicGroupElt],
+        legacy_transcript: bool = False,
     ):
         self.crs: BulletproofsCRS = crs
         self.field_class: Type[FElt] = field_class
         self.cyclic_group_class: Type[CyclicGroupElt] = cyclic_group_class
+        self.legacy_transcript: bool = legacy_transcript
         self.r: FElt = self.field_class(1234)  # Fix randomness for consistent testing
+        # Splits large commitment MSMs with the CRS across processes while running
+        self.msm: Optional[ParallelMSM] = None
 
-    def commit(self, f: Polynomial[FElt]) -> Commitment:
-        a_vec: List[FElt] = f.coeffs
+    def start_pool(
+        self,
+        num_workers: int = 0,
+        chunk_size: int = 1 << 10,
+        serial_threshold: int = 1 << 12,
+        mp_context: Optional[BaseContext] = None,
+    ) -> None:
+        if self.msm is not None:
+            raise ValueError("Pool is already running!")
+        self.msm = ParallelMSM(
+            points=self.crs.G_elts,
+            add=operator.add,
+            identity=self.crs.G_elts[0].identity(),
+            num_workers=num_workers,
+            chunk_size=chunk_size,
+            serial_threshold=serial_threshold,
+            mp_context=mp_context,
+        )
 
-        d = nearest_larger_power_of_2(len(a_vec))
-        for _ in range(d - len(a_vec)):
-            a_vec.append(self.field_class.zero())
+    def close_pool(self) -> None:
+        if self.msm is not None:
+            self.msm.close()
+            self.msm = None
 
-        randomness = self.crs.H * self.r
+    # Padding f to a power of 2 only adds zero terms, so f.coeffs is used as is
+    @traced("bulletproofs.commit")
+    def commit(self, f: Polynomial[FElt]) -> Commitment:
+        a_vec: List[FElt] = list(f.coeffs)
+
+        randomness = self.crs.multiply_H(self.r)
+        if self.msm is not None:
+            return BulletproofsCommitment(
+                value=self.msm([a.n for a in a_vec]) + randomness
+            )
         return BulletproofsCommitment(
             value=multi_scalar_multiplication(
-                scalars=a_vec, groupElts=self.crs.G_elts[:d]
+                scalars=a_vec, groupElts=self.crs.G_elts[: len(a_vec)]
             )
             + randomness
         )
 
+    @traced("bulletproofs.open")
     def open(
         self, f: Polynomial[FElt], cm: Commitment, z: FElt, s: FElt, op_info: Any
     ) -> Opening:
@@ -101,46 +167,66 @@ class BulletproofsProver(PCSProver, Generic[FElt, CyclicGroupElt]):
                 "Must provide Bulletproofs commitment to Bulletproofs prover!"
             )
 
-        transcript = Transcript(field_class=self.field_class)
+        return BulletproofsOpening(value=self._open(f=f, cm=cm, z=z, s=s, r=self.r))
+
+    # Inner-product argument that f(z) = s, where cm commits to f with blinding r
+    def _open(
+        self,
+        f: Polynomial[FElt],
+        cm: BulletproofsCommitment,
+        z: FElt,
+        s: FElt,
+        r: FElt,
+    ) -> BulletproofsOpeningProof:
+        transcript = Transcript(
+            field_class=self.field_class, legacy=self.legacy_transcript
+        )
         transcript.append(cm)
         transcript.append(z)
         transcript.append(s)
+        # U = generator * u_randomness, so multiples of U are fixed-base multiplications
         u_randomness = transcript.get_hash()
-        U = self.cyclic_group_class.generator() * u_randomness
 
         # ---------- Compute initial values of a_vec, b_vec, g_vec ----------
 
-        a_vec = f.coeffs
+        # a and b are kept as ints modulo p in buffers copied once, so f is never
+        # modified, and every round folds the buffers in place into their low half
+        p = self.field_class.field_modulus
+        a_vec = [coeff.n for coeff in f.coeffs]
         d = nearest_larger_power_of_2(len(a_vec))
         k = get_power_of_2(d)  # Yeah, could just use a log here
-        for _ in range(d - len(a_vec)):
-            a_vec.append(self.field_class.zero())
+        a_vec.extend([0] * (d - len(a_vec)))
         g_vec = self.crs.G_elts[:d]
-        b_vec = [self.field_class.one()]
-        for _ in range(d - 1):
-            b_vec.append(b_vec[-1] * z)
+        b_vec = [1] * d
+        for i in range(1, d):
+            b_vec[i] = b_vec[i - 1] * z.n % p
 
         # ---------- Run algorithm to transform vectors down to points ----------
 
         L_js = []
         R_js = []
-        r_prime = self.r
+        r_prime = r
+        half = d
         for _ in range(k):
-            a_lo, a_hi = split_vec(a_vec)
-            b_lo, b_hi = split_vec(b_vec)
-            g_lo, g_hi = split_vec(g_vec)
+            half //= 2
 
             l_j = transcript.get_hash(salt=bytes(1))
             r_j = transcript.get_hash(salt=bytes(2))
+            a_lo_b_hi = int_dot_product(a_vec, 0, b_vec, half, half, p)
+            a_hi_b_lo = int_dot_product(a_vec, half, b_vec, 0, half, p)
             L_j = (
-                multi_scalar_multiplication(scalars=a_lo, groupElts=g_hi)
-                + self.crs.H * l_j
-                + U * scalar_dot_product(aa=a_lo, bb=b_hi)
+                self._msm(a_vec[:half], g_vec[half : 2 * half])
+                + self.crs.multiply_H(l_j)
+                + self.crs.multiply_generator(
+                    u_randomness * self.field_class(a_lo_b_hi)
+                )
             )
             R_j = (
-                multi_scalar_multiplication(scalars=a_hi, groupElts=g_lo)
-                + self.crs.H * r_j
-                + U * scalar_dot_product(aa=a_hi, bb=b_lo)
+                self._msm(a_vec[half : 2 * half], g_vec[:half])
+                + self.crs.multiply_H(r_j)
+                + self.crs.multiply_generator(
+                    u_randomness * self.field_class(a_hi_b_lo)
+                )
             )
             L_js.append(L_j)
             R_js.append(R_j)
@@ -149,37 +235,51 @@ class BulletproofsProver(PCSProver, Generic[FElt, CyclicGroupElt]):
 
             u_j = transcript.get_hash()
             u_j_inv = self.field_class.one() / u_j
-            a_vec = add_vec(scale_vec(a_hi, u_j_inv), scale_vec(a_lo, u_j))
-            b_vec = add_vec(scale_vec(b_lo, u_j_inv), scale_vec(b_hi, u_j))
-            g_vec = add_vec(scale_vec(g_lo, u_j_inv), scale_vec(g_hi, u_j))
+            fold_int_vec(a_vec, half, u_j.n, u_j_inv.n, p)
+            fold_int_vec(b_vec, half, u_j_inv.n, u_j.n, p)
+            fold_vec(g_vec, half, u_j_inv, u_j)
             r_prime += l_j * u_j * u_j + r_j * u_j_inv * u_j_inv
 
         # ---------- Run Schnorr protocol ----------
 
-        if len(a_vec) != 1 or len(b_vec) != 1 or len(g_vec) != 1:
+        if half != 1:
             raise AssertionError("Failed to compute final values of a, b, g!")
-        a = a_vec[0]
-        b = b_vec[0]
+        a = self.field_class(a_vec[0])
+        b = self.field_class(b_vec[0])
         g = g_vec[0]
         r_1 = transcript.get_hash(salt=bytes(1))
         r_2 = transcript.get_hash(salt=bytes(2))
-        R = (g + (U * b)) * r_1 + self.crs.H * r_2
+        R = (
+            g * r_1
+            + self.crs.multiply_generator(u_randomness * b * r_1)
+            + self.crs.multiply_H(r_2)
+        )
         transcript.append(R)
 
         c = transcript.get_hash()
         z_1 = a * c + r_1
         z_2 = r_prime * c + r_2
 
-        return BulletproofsOpening(
-            value=BulletproofsOpeningProof(
-                L_js=L_js,
-                R_js=R_js,
-                R=R,
-                z_1=z_1,
-                z_2=z_2,
-            )
+        return BulletproofsOpeningProof(
+            L_js=L_js,
+            R_js=R_js,
+            R=R,
+            z_1=z_1,
+            z_2=z_2,
+        )
+
+    # MSM over the live halves of the folded buffers, with scalars as ints
+    def _msm(
+        self, scalars: List[int], group_elts: List[CyclicGroupElt]
+    ) -> CyclicGroupElt:
+        return pippenger_msm(
+            scalars=scalars,
+            points=group_elts,
+            add=operator.add,
+            identity=group_elts[0].identity(),
         )
 
+    @traced("bulletproofs.batch_open_at_point")
     def batch_open_at_point(
         self,
         fs: List[Polynomial[FElt]],
@@ -192,17 +292,39 @@ class BulletproofsProver(PCSProver, Generic[FElt, CyclicGroupElt]):
         if len(cms) != batch_size or len(ss) != batch_size:
             raise ValueError("All parameters must have length equal to batch size!")
 
-        batch_ops = []
+        if not isinstance(op_info, self.field_class):
+            raise ValueError("op_info must be of type FElt!")
+
+        # Open the combination sum op_info^i * f_i with a single argument
+        # Its commitment is blinded by r * sum op_info^i since every cm_i uses r
+        f = Polynomial[FElt](coeffs=[self.field_class.zero()])
+        s = self.field_class.zero()
+        r = self.field_class.zero()
+        scalar = self.field_class.one()
         for i in range(batch_size):
             if not isinstance(cms[i], BulletproofsCommitment):
                 raise ValueError(
                     "Wrong commitment used. Must provide a Bulletproofs commitment."
                 )
-
-            op = self.open(f=fs[i], cm=cms[i], z=z, s=ss[i], op_info=op_info)
-            batch_ops.append(op.value)
-
-        return BulletproofsBatchOpening(value=batch_ops)
+            f += fs[i] * scalar
+            s += ss[i] * scalar
+            r += self.r * scalar
+            scalar *= op_info
+        cm = combine_commitments(cms=cms, op_info=op_info)
+
+        return BulletproofsOpening(value=self._open(f=f, cm=cm, z=z, s=s, r=r))
+
+
+# Commitment to sum op_info^i * f_i from commitments cms to each f_i
+def combine_commitments(cms: List[Commitment], op_info: FElt) -> BulletproofsCommitment:
+    scalars = [op_info.one()]
+    for _ in range(len(cms) - 1):
+        scalars.append(scalars[-1] * op_info)
+    return BulletproofsCommitment(
+        value=multi_scalar_multiplication(
+            scalars=scalars, groupElts=[cm.value for cm in cms]
+        )
+    )
 
 
 class BulletproofsVerifier(PCSVerifier, Generic[FElt, CyclicGroupElt]):
@@ -211,11 +333,14 @@ class BulletproofsVerifier(PCSVerifier, Generic[FElt, CyclicGroupElt]):
         crs: BulletproofsCRS,
         field_class: Type[FElt],
         cyclic_group_class: Type[CyclicGroupElt],
+        legacy_transcript: bool = False,
     ):
         self.crs: BulletproofsCRS = crs
         self.field_class: Type[FElt] = field_class
         self.cyclic_group_class: Type[CyclicGroupElt] = cyclic_group_class
+        self.legacy_transcript: bool = legacy_transcript
 
+    @traced("bulletproofs.verify_opening")
     def verify_opening(
         self, op: Opening, cm: Commitment, z: FElt, s: FElt, op_info: Any
     ) -> bool:
@@ -230,68 +355,74 @@ class BulletproofsVerifier(PCSVerifier, Generic[FElt, CyclicGroupElt]):
 
         # ---------- Re-execute transcript based on proof values ----------
 
-        transcript = Transcript(field_class=self.field_class)
+        transcript = Transcript(
+            field_class=self.field_class, legacy=self.legacy_transcript
+        )
         transcript.append(cm)
         transcript.append(z)
         transcript.append(s)
+        # U = generator * u_randomness, so multiples of U are fixed-base multiplications
         u_randomness = transcript.get_hash()
-        U = self.cyclic_group_class.generator() * u_randomness
-        P_prime = cm.value + (U * s)
 
         L_js = op.value.L_js
         R_js = op.value.R_js
         k = len(L_js)
         u_js: List[FElt] = []
-        u_js_inv: List[FElt] = []
-        Q = P_prime
         for i in range(k):
             transcript.append(L_js[i])
             transcript.append(R_js[i])
-            u_j = transcript.get_hash()
-            u_j_inv = self.field_class.one() / u_j
-            # u_js are computed in reverse order
-            u_js.insert(0, u_j)
-            u_js_inv.insert(0, u_j_inv)
-            Q += L_js[i] * (u_j * u_j) + R_js[i] * (u_j_inv * u_j_inv)
+            u_js.append(transcript.get_hash())
+        u_js_inv = batch_inverse(u_js)
         R = op.value.R
         transcript.append(R)
+        c = transcript.get_hash()
+        z_1 = op.value.z_1
+        z_2 = op.value.z_2
 
         # ---------- Compute derived G and b values ----------
 
+        # Bit j of i, counting from the most significant of k bits, picks u_j or
+        # u_j^-1 in s_vec[i], so s_vec doubles once per challenge from the last round
         d = 2**k
-        g_vec = self.crs.G_elts[:d]
-        b_vec = [self.field_class.one()]
-        for _ in range(d - 1):
-            b_vec.append(b_vec[-1] * z)
-        s_vec: List[FElt] = []
-        for i in range(d):
-            ind = i
-            prod = self.field_class.one()
-            for j in range(k):
-                if ind % 2 == 0:
-                    prod *= u_js_inv[j]
-                else:
-                    prod *= u_js[j]
-                ind //= 2
-            s_vec.append(prod)
-        g = multi_scalar_multiplication(scalars=s_vec, groupElts=g_vec)
-        b = scalar_dot_product(aa=s_vec, bb=b_vec)
+        s_vec = [self.field_class.one()]
+        for j in reversed(range(k)):
+            s_vec = [x * u_js_inv[j] for x in s_vec] + [x * u_js[j] for x in s_vec]
+        # <s_vec, (1, z, ..., z^(d-1))> factors as prod_j (u_j^-1 + u_j z^(2^(k-1-j)))
+        b = self.field_class.one()
+        z_pow = z
+        for j in reversed(range(k)):
+            b *= u_js_inv[j] + u_js[j] * z_pow
+            z_pow *= z_pow
 
         # ---------- Verify Schnorr proof using randomness from transcript ----------
 
-        c = transcript.get_hash()
-        LHS = (Q * c) + R
-        H = self.crs.H
-        z_1 = op.value.z_1
-        z_2 = op.value.z_2
-        RHS = (g + (U * b)) * z_1 + H * z_2
-
-        return LHS == RHS
-
+        # c * Q + R == g * z_1 + U * (b * z_1) + H * z_2, where
+        # Q = cm + U * s + sum u_j^2 * L_j + u_j^-2 * R_j and g = <s_vec, G_elts>,
+        # is checked as a single multi-scalar multiplication equal to the identity
+        scalars = [x * z_1 for x in s_vec] + [
+            u_randomness * (b * z_1 - c * s),
+            z_2,
+            -c,
+            -self.field_class.one(),
+        ]
+        scalars += [-c * u_j * u_j for u_j in u_js]
+        scalars += [-c * u_j_inv * u_j_inv for u_j_inv in u_js_inv]
+        group_elts = self.crs.G_elts[:d] + [
+            self.crs.H.generator(),
+            self.crs.H,
+            cm.value,
+            R,
+        ]
+        group_elts += L_js + R_js
+        res = multi_scalar_multiplication(scalars=scalars, groupElts=group_elts)
+
+        return res == res.identity()
+
+    @traced("bulletproofs.verify_batch_at_point")
     def verify_batch_at_point(
         self, op: Opening, cms: List[Commitment], z: FElt, ss: List[FElt], op_info: Any
     ) -> bool:
-        if not isinstance(op, BulletproofsBatchOpening):
+        if not isinstance(op, (BulletproofsOpening, BulletproofsBatchOpening)):
             raise ValueError(
                 "Wrong opening used. Must provide a Bulletproofs Batch opening."
             )
@@ -306,6 +437,25 @@ class BulletproofsVerifier(PCSVerifier, Generic[FElt, CyclicGroupElt]):
                     "Wrong commitment used. Must provide a Bulletproofs commitment."
                 )
 
+        # ---------- Verify a single opening of the combined polynomial ----------
+        if isinstance(op, BulletproofsOpening):
+            if not isinstance(op_info, self.field_class):
+                raise ValueError("op_info must be of type FElt!")
+            s = self.field_class.zero()
+            scalar = self.field_class.one()
+            for i in range(batch_size):
+                s += ss[i] * scalar
+                scalar *= op_info
+            return self.verify_opening(
+                op=op,
+                cm=combine_commitments(cms=cms, op_info=op_info),
+                z=z,
+                s=s,
+                op_info=op_info,
+            )
+
+        # ---------- Verify one opening per polynomial, as in older proofs ----------
+        for i in range(batch_size):
             op_i = BulletproofsOpening(value=op.value[i])
             valid_op = self.verify_opening(
                 op=op_i, cm=cms[i], z=z, s=ss[i], op_info=op_info
@@ -1,12 +1,34 @@
 from __future__ import absolute_import
 
+import functools
+import mmap
 import random
-from typing import Generic, Any, List, Type
-from dataclasses import dataclass
-from py_ecc.typing import Point2D
+import secrets
+from multiprocessing.context import BaseContext
+from typing import Generic, Any, Dict, List, Optional, Sequence, Type
+from dataclasses import dataclass, field
 from algebra.field import FElt
 from algebra.polynomial import Polynomial
-from algebra.pairing import Pairing, BaseField, G2Field, GtField
+from algebra.algorithms import FixedBaseTable, ParallelMSM
+from algebra.pairing import (
+    Pairing,
+    BaseField,
+    G2Field,
+    GtField,
+    Point3D,
+    to_affine,
+    points_equal,
+)
+from algebra.encoding import (
+    get_width,
+    encode_G_1,
+    decode_G_1,
+    encode_G_1_compressed,
+    decode_G_1_compressed,
+    encode_G_2,
+    decode_G_2,
+    LazyPoints,
+)
 from polynomial_commitment_schemes.pcs import (
     Commitment,
     Opening,
@@ -14,12 +36,21 @@ from polynomial_commitment_schemes.pcs import (
     PCSVerifier,
 )
 from utils import unsigned_int_to_bytes
+from metrics import traced
+
+
+SRS_MAGIC = b"ZKSRS\x01"
 
 
+# G_1_elts is a list, or LazyPoints backed by a memory-mapped file from load
 @dataclass
 class KZGSRS(Generic[FElt, BaseField, G2Field, GtField]):
-    G_1_elts: List[Point2D[BaseField]]
-    G_2_elts: List[Point2D[G2Field]]
+    G_1_elts: Sequence[Point3D[BaseField]]
+    G_2_elts: Sequence[Point3D[G2Field]]
+    # Fixed-base table for G_1_elts[0], built on first use
+    tables: Dict[str, FixedBaseTable] = field(
+        default_factory=dict, repr=False, compare=False
+    )
 
     @staticmethod
     # This is not secure since we are generating deterministically
@@ -29,32 +60,184 @@ class KZGSRS(Generic[FElt, BaseField, G2Field, GtField]):
         field_class: Type[FElt],
     ) -> "KZGSRS":
         s: FElt = field_class(random.randint(1, field_class.field_modulus - 1))
-        G_1_elts = [pairing.g_1]
+        G_1_elts: List[Point3D[BaseField]] = [pairing.g_1]
+        G_2_elts: List[Point3D[G2Field]] = [pairing.g_2]
+        srs: KZGSRS[FElt, BaseField, G2Field, GtField] = KZGSRS(
+            G_1_elts=G_1_elts, G_2_elts=G_2_elts
+        )
+        s_pow = field_class.one()
         for _ in range(d - 1):
-            G_1_elts.append(pairing.multiply_G_1(G_1_elts[-1], s))
-        G_2_elts = [pairing.g_2, pairing.multiply_G_2(pairing.g_2, s)]
+            s_pow *= s
+            G_1_elts.append(srs.multiply_G_1_generator(pairing, s_pow))
+        # A single G_2 multiplication is cheaper than building its table
+        G_2_elts.append(pairing.multiply_G_2(pairing.g_2, s))
+
+        return srs
+
+    # Tables are rebuilt on first use rather than sent to other processes
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["tables"] = {}
+        return state
+
+    # Same points, whichever projective coordinates they are kept in
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, KZGSRS):
+            return NotImplemented
+        return all(
+            len(elts) == len(other_elts)
+            and all(points_equal(p, q) for p, q in zip(elts, other_elts))
+            for elts, other_elts in [
+                (self.G_1_elts, other.G_1_elts),
+                (self.G_2_elts, other.G_2_elts),
+            ]
+        )
+
+    # ---------- Binary format ----------
+    # Header of magic, base field modulus, compression flag and number of G_1 and
+    # G_2 elements, followed by the G_2 and then G_1 elements at a fixed width
+    def save(
+        self,
+        path: str,
+        pairing: Pairing[FElt, BaseField, G2Field, GtField],
+        compressed: bool = False,
+    ) -> None:
+        base_field_class = type(pairing.g_1[0])
+        g2_field_class = type(pairing.g_2[0])
+        encode = encode_G_1_compressed if compressed else encode_G_1
+        modulus_bytes = unsigned_int_to_bytes(base_field_class.field_modulus)
+
+        with open(path, "wb") as f:
+            f.write(SRS_MAGIC)
+            f.write(len(modulus_bytes).to_bytes(2, "big") + modulus_bytes)
+            f.write(bytes([1 if compressed else 0]))
+            f.write(len(self.G_1_elts).to_bytes(8, "big"))
+            f.write(len(self.G_2_elts).to_bytes(8, "big"))
+            for q in self.G_2_elts:
+                f.write(encode_G_2(q, g2_field_class))
+            for p in self.G_1_elts:
+                f.write(encode(p, base_field_class))
+
+    # Memory-maps the file so worker processes share it through the page cache
+    # G_1 elements are decoded on access, and only the first d are exposed
+    # The map stays open until close, or the end of a with block on the SRS
+    # Checking that each G_1 element is in the prime order subgroup costs a
+    # scalar multiplication on BLS12-381, so trusted files may skip it
+    @staticmethod
+    def load(
+        path: str,
+        pairing: Pairing[FElt, BaseField, G2Field, GtField],
+        d: Optional[int] = None,
+        trusted: bool = False,
+    ) -> "KZGSRS":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return KZGSRS._load_from_buffer(buffer, path, pairing, d, trusted)
+        except Exception:
+            buffer.close()
+            raise
+
+    @staticmethod
+    def _load_from_buffer(
+        buffer: mmap.mmap,
+        path: str,
+        pairing: Pairing[FElt, BaseField, G2Field, GtField],
+        d: Optional[int],
+        trusted: bool,
+    ) -> "KZGSRS":
+        base_field_class = type(pairing.g_1[0])
+        g2_field_class = type(pairing.g_2[0])
+        offset = len(SRS_MAGIC)
+        if buffer[:offset] != SRS_MAGIC:
+            raise ValueError("File is not a KZG SRS!")
+        modulus_len = int.from_bytes(buffer[offset : offset + 2], "big")
+        offset += 2
+        modulus = int.from_bytes(buffer[offset : offset + modulus_len], "big")
+        offset += modulus_len
+        if modulus != base_field_class.field_modulus:
+            raise ValueError("SRS was generated over a different curve!")
+        compressed = buffer[offset] == 1
+        num_G_1 = int.from_bytes(buffer[offset + 1 : offset + 9], "big")
+        num_G_2 = int.from_bytes(buffer[offset + 9 : offset + 17], "big")
+        offset += 17
+
+        G_2_width = 4 * get_width(g2_field_class.field_modulus)
+        G_2_elts = [
+            decode_G_2(
+                buffer[offset + i * G_2_width : offset + (i + 1) * G_2_width],
+                g2_field_class,
+            )
+            for i in range(num_G_2)
+        ]
+        offset += num_G_2 * G_2_width
+
+        width = get_width(base_field_class.field_modulus)
+        G_1_width = width if compressed else 2 * width
+        decode = decode_G_1_compressed if compressed else decode_G_1
+        if offset + num_G_1 * G_1_width != len(buffer):
+            raise ValueError("SRS file has the wrong length!")
+        G_1_elts = LazyPoints(
+            buffer=buffer,
+            offset=offset,
+            count=num_G_1 if d is None else min(d, num_G_1),
+            width=G_1_width,
+            # A partial rather than a lambda, so that the points can be pickled
+            decode=functools.partial(
+                decode, base_field_class=base_field_class, check_subgroup=not trusted
+            ),
+            path=path,
+        )
 
         return KZGSRS(G_1_elts=G_1_elts, G_2_elts=G_2_elts)
 
+    def close(self) -> None:
+        if isinstance(self.G_1_elts, LazyPoints):
+            self.G_1_elts.close()
+
+    def __enter__(self) -> "KZGSRS":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def multiply_G_1_generator(
+        self, pairing: Pairing[FElt, BaseField, G2Field, GtField], n: FElt
+    ) -> Point3D[BaseField]:
+        if "G_1" not in self.tables:
+            self.tables["G_1"] = pairing.fixed_base_table_G_1(self.G_1_elts[0])
+        return self.tables["G_1"].multiply(n.n)
+
 
 @dataclass
 class KZGCommitment(Commitment, Generic[BaseField]):
-    value: Point2D[BaseField]
+    value: Point3D[BaseField]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, KZGCommitment):
+            return NotImplemented
+        return points_equal(self.value, other.value)
 
     # TODO: Attach these methods to the field elements instead
     def to_bytes(self) -> bytes:
-        if self.value is None:
+        affine = to_affine(self.value)
+        if affine is None:
             return bytes(0)
         else:
             res = bytearray()
-            res.extend(unsigned_int_to_bytes(self.value[0].n))
-            res.extend(unsigned_int_to_bytes(self.value[1].n))
+            res.extend(unsigned_int_to_bytes(affine[0].n))
+            res.extend(unsigned_int_to_bytes(affine[1].n))
             return bytes(res)
 
 
 @dataclass
 class KZGOpening(Opening, Generic[BaseField]):
-    value: Point2D[BaseField]
+    value: Point3D[BaseField]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, KZGOpening):
+            return NotImplemented
+        return points_equal(self.value, other.value)
 
 
 class KZGProver(PCSProver, Generic[FElt, BaseField, G2Field, GtField]):
@@ -67,15 +250,41 @@ class KZGProver(PCSProver, Generic[FElt, BaseField, G2Field, GtField]):
         self.srs: KZGSRS = srs
         self.pairing: Pairing[FElt, BaseField, G2Field, GtField] = pairing
         self.field_class: Type[FElt] = field_class
+        # Splits large MSMs with the SRS across processes while running
+        self.msm: Optional[ParallelMSM] = None
 
-    def __eval_poly_with_srs(self, f: Polynomial[FElt]) -> Point2D[BaseField]:
-        res = self.pairing.identity()
-        for i in range(len(f.coeffs)):
-            eval = self.pairing.multiply_G_1(self.srs.G_1_elts[i], f.coeffs[i])
-            res = self.pairing.add_G_1(res, eval)
+    def start_pool(
+        self,
+        num_workers: int = 0,
+        chunk_size: int = 1 << 10,
+        serial_threshold: int = 1 << 12,
+        mp_context: Optional[BaseContext] = None,
+    ) -> None:
+        if self.msm is not None:
+            raise ValueError("Pool is already running!")
+        self.msm = ParallelMSM(
+            points=self.srs.G_1_elts,
+            add=self.pairing.add_G_1,
+            identity=self.pairing.identity(),
+            num_workers=num_workers,
+            chunk_size=chunk_size,
+            serial_threshold=serial_threshold,
+            mp_context=mp_context,
+        )
 
-        return res
+    def close_pool(self) -> None:
+        if self.msm is not None:
+            self.msm.close()
+            self.msm = None
 
+    def __eval_poly_with_srs(self, f: Polynomial[FElt]) -> Point3D[BaseField]:
+        if self.msm is not None:
+            return self.msm([coeff.n for coeff in f.coeffs])
+        return self.pairing.multi_scalar_multiply_G_1(
+            self.srs.G_1_elts[: len(f.coeffs)], f.coeffs
+        )
+
+    @traced("kzg.commit")
     def commit(self, f: Polynomial[FElt]) -> KZGCommitment:
         if len(f.coeffs) > len(self.srs.G_1_elts):
             raise ValueError("Polynomial degree is greater than size of SRS!")
@@ -84,6 +293,7 @@ class KZGProver(PCSProver, Generic[FElt, BaseField, G2Field, GtField]):
 
         return KZGCommitment(value=cm)
 
+    @traced("kzg.open")
     def open(
         self, f: Polynomial[FElt], cm: Commitment, z: FElt, s: FElt, op_info: Any
     ) -> KZGOpening:
@@ -97,6 +307,7 @@ class KZGProver(PCSProver, Generic[FElt, BaseField, G2Field, GtField]):
 
         return KZGOpening(value=op)
 
+    @traced("kzg.batch_open_at_point")
     def batch_open_at_point(
         self,
         fs: List[Polynomial[FElt]],
@@ -145,6 +356,7 @@ class KZGVerifier(PCSVerifier, Generic[FElt, BaseField, G2Field, GtField]):
         self.pairing: Pairing[FElt, BaseField, G2Field, GtField] = pairing
         self.field_class: Type[FElt] = field_class
 
+    @traced("kzg.verify_opening")
     def verify_opening(
         self, op: Opening, cm: Commitment, z: FElt, s: FElt, op_info: Any
     ) -> bool:
@@ -153,24 +365,91 @@ class KZGVerifier(PCSVerifier, Generic[FElt, BaseField, G2Field, GtField]):
         if not isinstance(cm, KZGCommitment):
             raise ValueError("Wrong commitment used. Must provide a KZG commitment.")
 
-        lhs = self.pairing.pairing(
-            op.value,
-            self.pairing.add_G_2(
-                self.srs.G_2_elts[1],
-                self.pairing.multiply_G_2(self.srs.G_2_elts[0], -z),
-            ),
-        )
-        rhs = self.pairing.pairing(
-            self.pairing.add_G_1(
-                cm.value, self.pairing.multiply_G_1(self.srs.G_1_elts[0], -s)
-            ),
-            self.srs.G_2_elts[0],
-        )
-        return lhs == rhs
+        return self._check_opening(op=op.value, cm=cm.value, z=z, s=s)
 
+    @traced("kzg.verify_batch_at_point")
     def verify_batch_at_point(
         self, op: Opening, cms: List[Commitment], z: FElt, ss: List[FElt], op_info: Any
     ) -> bool:
+        self._check_batch_types(op=op, cms=cms, ss=ss, op_info=op_info)
+        batch_size = len(cms)
+
+        scalars = []
+        scalar = self.field_class.one()
+        for _ in range(batch_size):
+            scalars.append(scalar)
+            scalar *= op_info
+        cm_sum = self.pairing.multi_scalar_multiply_G_1(
+            [cm.value for cm in cms], scalars
+        )
+        v_sum = self.field_class.zero()
+        for i in range(batch_size):
+            v_sum += ss[i] * scalars[i]
+
+        return self._check_opening(op=op.value, cm=cm_sum, z=z, s=v_sum)
+
+    # Folds every batch opening into one pairing check using random weights r_j:
+    # e(sum r_j op_j, [tau]_2) == e(sum r_j (cm_j - [s_j]_1 + z_j op_j), [1]_2)
+    @traced("kzg.verify_many_batches_at_points")
+    def verify_many_batches_at_points(
+        self,
+        ops: List[Opening],
+        cms_list: List[List[Commitment]],
+        zs: List[FElt],
+        ss_list: List[List[FElt]],
+        op_infos: List[Any],
+    ) -> bool:
+        num_batches = len(ops)
+        if (
+            len(cms_list) != num_batches
+            or len(zs) != num_batches
+            or len(ss_list) != num_batches
+            or len(op_infos) != num_batches
+        ):
+            raise ValueError(
+                "All parameters must have length equal to number of batches!"
+            )
+        if num_batches == 0:
+            return True
+
+        op_points = []
+        op_scalars = []
+        rhs_points = []
+        rhs_scalars = []
+        s_sum = self.field_class.zero()
+        for j in range(num_batches):
+            self._check_batch_types(
+                op=ops[j], cms=cms_list[j], ss=ss_list[j], op_info=op_infos[j]
+            )
+            r = self.field_class(
+                secrets.randbelow(self.field_class.field_modulus - 1) + 1
+            )
+            scalar = r
+            for cm, s in zip(cms_list[j], ss_list[j]):
+                rhs_points.append(cm.value)
+                rhs_scalars.append(scalar)
+                s_sum += s * scalar
+                scalar *= op_infos[j]
+            rhs_points.append(ops[j].value)
+            rhs_scalars.append(r * zs[j])
+            op_points.append(ops[j].value)
+            op_scalars.append(r)
+
+        lhs_G_1 = self.pairing.multi_scalar_multiply_G_1(op_points, op_scalars)
+        rhs_G_1 = self.pairing.add_G_1(
+            self.pairing.multi_scalar_multiply_G_1(rhs_points, rhs_scalars),
+            self.srs.multiply_G_1_generator(self.pairing, -s_sum),
+        )
+        return self.pairing.pairing_check(
+            [
+                (lhs_G_1, self.srs.G_2_elts[1]),
+                (self.pairing.neg_G_1(rhs_G_1), self.srs.G_2_elts[0]),
+            ]
+        )
+
+    def _check_batch_types(
+        self, op: Opening, cms: List[Commitment], ss: List[FElt], op_info: Any
+    ) -> None:
         if not isinstance(op, KZGOpening):
             raise ValueError("Wrong opening used. Must provide a KZG opening.")
 
@@ -187,27 +466,19 @@ class KZGVerifier(PCSVerifier, Generic[FElt, BaseField, G2Field, GtField]):
                     "Wrong commitment used. Must provide a KZG commitment."
                 )
 
-        cm_sum = None  # Pairing identity point
-        v_sum = self.field_class.zero()
-        scalar = self.field_class.one()
-        for i in range(batch_size):
-            cm_sum = self.pairing.add_G_1(
-                cm_sum, self.pairing.multiply_G_1(cms[i].value, scalar)
-            )
-            v_sum += ss[i] * scalar
-            scalar *= op_info
-
-        lhs = self.pairing.pairing(
-            op.value,
-            self.pairing.add_G_2(
-                self.srs.G_2_elts[1],
-                self.pairing.multiply_G_2(self.srs.G_2_elts[0], -z),
-            ),
+    # Checks e(op, [tau - z]_2) == e(cm - [s]_1, [1]_2), rearranged as
+    # e(op, [tau]_2) * e(-(cm - [s]_1 + z * op), [1]_2) == 1 so both G_2 points are
+    # fixed and the two Miller loops share a single final exponentiation
+    def _check_opening(
+        self, op: Point3D[BaseField], cm: Point3D[BaseField], z: FElt, s: FElt
+    ) -> bool:
+        rhs_G_1 = self.pairing.add_G_1(
+            self.pairing.add_G_1(cm, self.srs.multiply_G_1_generator(self.pairing, -s)),
+            self.pairing.multiply_G_1(op, z),
         )
-        rhs = self.pairing.pairing(
-            self.pairing.add_G_1(
-                cm_sum, self.pairing.multiply_G_1(self.srs.G_1_elts[0], -v_sum)
-            ),
-            self.srs.G_2_elts[0],
+        return self.pairing.pairing_check(
+            [
+                (op, self.srs.G_2_elts[1]),
+                (self.pairing.neg_G_1(rhs_G_1), self.srs.G_2_elts[0]),
+            ]
         )
-        return lhs == rhs
@@ -51,3 +51,32 @@ class PCSVerifier(ABC, Generic[FElt]):
         self, op: Opening, cms: List[Commitment], z: FElt, ss: List[FElt], op_info: Any
     ) -> bool:
         pass
+
+    # Verifies several batch openings, each at its own point, returning whether all
+    # of them are valid. Schemes can override this to check them all at once
+    def verify_many_batches_at_points(
+        self,
+        ops: List[Opening],
+        cms_list: List[List[Commitment]],
+        zs: List[FElt],
+        ss_list: List[List[FElt]],
+        op_infos: List[Any],
+    ) -> bool:
+        num_batches = len(ops)
+        if (
+            len(cms_list) != num_batches
+            or len(zs) != num_batches
+            or len(ss_list) != num_batches
+            or len(op_infos) != num_batches
+        ):
+            raise ValueError(
+                "All parameters must have length equal to number of batches!"
+            )
+
+        for i in range(num_batches):
+            if not self.verify_batch_at_point(
+                op=ops[i], cms=cms_list[i], z=zs[i], ss=ss_list[i], op_info=op_infos[i]
+            ):
+                return False
+
+        return True
@@ -35,7 +35,7 @@ class TrivialOpening(Opening):
 
 class TrivialProver(PCSProver, Generic[FElt]):
     def commit(self, f: Polynomial[FElt]) -> TrivialCommitment[FElt]:
-        return TrivialCommitment[FElt](value=f.coeffs)
+        return TrivialCommitment[FElt](value=f.to_elts())
 
     def open(
         self, f: Polynomial[FElt], cm: Commitment, z: FElt, s: FElt, op_info: Any
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import tempfile
+from typing import Generic, List, Optional, Tuple, Type
+from algebra.field import FElt
+from algebra.polynomial import Polynomial
+from algebra.encoding import get_width, encode_ints, decode_ints
+from algebra.encoding import encode_G_1, decode_G_1
+from constraints import PlonkConstraints
+from preprocessor import Preprocessor, PlonkPreprocessedInput
+from polynomial_commitment_schemes.kzg import KZGProver, KZGCommitment
+
+PREPROCESSED_MAGIC = b"ZKPP\x01"
+COMMITMENTS_MAGIC = b"ZKVK\x01"
+
+
+# Content-addressed cache of preprocessed circuits, and optionally of the KZG
+# commitments to their polynomials, stored as one binary file per entry
+# Entries are evicted least recently used first once the cache exceeds max_bytes
+class PreprocessingCache(Generic[FElt]):
+    def __init__(self, cache_dir: str, max_bytes: int = 1 << 30) -> None:
+        if max_bytes <= 0:
+            raise ValueError("Cache size must be positive!")
+        self.cache_dir: str = cache_dir
+        self.max_bytes: int = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Hash of everything preprocessing depends on: the constraints, the field
+    # and the domain they are interpolated over
+    @staticmethod
+    def get_key(
+        constraints: PlonkConstraints[FElt],
+        mult_subgroup: List[FElt],
+        field_class: Type[FElt],
+    ) -> str:
+        width = get_width(field_class.field_modulus)
+        h = hashlib.sha3_256()
+        h.update(field_class.__name__.encode())
+        h.update(encode_ints([field_class.field_modulus, len(mult_subgroup)], width))
+        h.update(encode_ints([constraints.l, constraints.m, constraints.n], width))
+        for values in [
+            constraints.a,
+            constraints.b,
+            constraints.c,
+            constraints.qL,
+            constraints.qR,
+            constraints.qO,
+            constraints.qM,
+            constraints.qC,
+            mult_subgroup,
+        ]:
+            h.update(encode_ints([len(values)], width))
+            h.update(encode_ints([x.n for x in values], width))
+        return h.hexdigest()
+
+    def load_or_preprocess(
+        self,
+        constraints: PlonkConstraints[FElt],
+        mult_subgroup: List[FElt],
+        field_class: Type[FElt],
+    ) -> PlonkPreprocessedInput[FElt]:
+        path = self._get_path(self.get_key(constraints, mult_subgroup, field_class))
+        data = self._read(path)
+        if data is not None and data.startswith(PREPROCESSED_MAGIC):
+            return self._decode_preprocessed_input(
+                data[len(PREPROCESSED_MAGIC) :], field_class
+            )
+
+        preprocessed_input = Preprocessor.preprocess_plonk_constraints(
+            constraints=constraints,
+            mult_subgroup=mult_subgroup,
+            field_class=field_class,
+        )
+        self._write(
+            path,
+            PREPROCESSED_MAGIC
+            + self._encode_preprocessed_input(preprocessed_input, field_class),
+        )
+        return preprocessed_input
+
+    # Commitments to the preprocessed polynomials in the order of poly_names
+    # Keyed additionally by the SRS, identified by its last G_1 element
+    def load_or_commit(
+        self,
+        constraints: PlonkConstraints[FElt],
+        mult_subgroup: List[FElt],
+        field_class: Type[FElt],
+        pcs_prover: KZGProver,
+    ) -> Tuple[PlonkPreprocessedInput[FElt], List[KZGCommitment]]:
+        preprocessed_input = self.load_or_preprocess(
+            constraints=constraints,
+            mult_subgroup=mult_subgroup,
+            field_class=field_class,
+        )
+        base_field_class = type(pcs_prover.pairing.g_1[0])
+        h = hashlib.sha3_256(
+            self.get_key(constraints, mult_subgroup, field_class).encode()
+        )
+        h.update(encode_G_1(pcs_prover.srs.G_1_elts[-1], base_field_class))
+        path = self._get_path(h.hexdigest())
+
+        data = self._read(path)
+        if data is not None and data.startswith(COMMITMENTS_MAGIC):
+            width = 2 * get_width(base_field_class.field_modulus)
+            data = data[len(COMMITMENTS_MAGIC) :]
+            return (
+                preprocessed_input,
+                [
+                    KZGCommitment(
+                        value=decode_G_1(data[i : i + width], base_field_class)
+                    )
+                    for i in range(0, len(data), width)
+                ],
+            )
+
+        cms = [
+            pcs_prover.commit(getattr(preprocessed_input, name))
+            for name in PlonkPreprocessedInput.poly_names()
+        ]
+        self._write(
+            path,
+            COMMITMENTS_MAGIC
+            + b"".join([encode_G_1(cm.value, base_field_class) for cm in cms]),
+        )
+        return (preprocessed_input, cms)
+
+    # ---------- Binary format ----------
+    # For each polynomial in order of poly_names, its number of coefficients as a
+    # 4-byte integer followed by the coefficients at the width of the field
+    @staticmethod
+    def _encode_preprocessed_input(
+        preprocessed_input: PlonkPreprocessedInput[FElt], field_class: Type[FElt]
+    ) -> bytes:
+        width = get_width(field_class.field_modulus)
+        res = bytearray()
+        for name in PlonkPreprocessedInput.poly_names():
+            coeffs = getattr(preprocessed_input, name).coeffs
+            res.extend(len(coeffs).to_bytes(4, "big"))
+            res.extend(encode_ints([coeff.n for coeff in coeffs], width))
+        return bytes(res)
+
+    @staticmethod
+    def _decode_preprocessed_input(
+        data: bytes, field_class: Type[FElt]
+    ) -> PlonkPreprocessedInput[FElt]:
+        width = get_width(field_class.field_modulus)
+        polys = {}
+        offset = 0
+        for name in PlonkPreprocessedInput.poly_names():
+            length = int.from_bytes(data[offset : offset + 4], "big")
+            offset += 4
+            coeffs = decode_ints(data[offset : offset + length * width], width)
+            offset += length * width
+            polys[name] = Polynomial[FElt]([field_class(x) for x in coeffs])
+        if offset != len(data):
+            raise ValueError("Preprocessed input has trailing data!")
+        return PlonkPreprocessedInput[FElt](**polys)
+
+    # ---------- Files and eviction ----------
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".bin")
+
+    # Reading an entry marks it as most recently used
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    # Written to a temporary file first so that concurrent readers never see a
+    # partial entry
+    def _write(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".bin"):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum([size for _, size, _ in entries])
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -1,8 +1,14 @@
-from dataclasses import dataclass
-from typing import Generic, List, Type
-from algebra.field import FElt
+from dataclasses import dataclass, field
+from typing import Dict, Generic, List, Tuple, Type
+from algebra.field import FElt, FieldVector
 from algebra.polynomial import Polynomial
+from algebra.evaluation_polynomial import EvaluationPolynomial
+from algebra.ntt import get_ntt_domain, get_coset_shift, is_ntt_domain
 from constraints import PlonkConstraints
+from permutation import PermutationArgument
+from metrics import traced
+
+DomainKey = Tuple[int, ...]
 
 
 @dataclass
@@ -18,38 +24,97 @@ class PlonkPreprocessedInput(Generic[FElt]):
     S1: Polynomial[FElt]
     S2: Polynomial[FElt]
     S3: Polynomial[FElt]
+    # Values of the polynomials above on the domain and on the coset of size 4n
+    # used for the quotient, filled on first use. Domain values are keyed by
+    # field name and domain, coset values by field name since the coset only
+    # depends on the size of the domain
+    domain_evals: Dict[Tuple[str, DomainKey], FieldVector[FElt]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    coset_evals: Dict[str, EvaluationPolynomial[FElt]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    @staticmethod
+    def poly_names() -> List[str]:
+        return [
+            "PqL",
+            "PqR",
+            "PqO",
+            "PqM",
+            "PqC",
+            "Sid1",
+            "Sid2",
+            "Sid3",
+            "S1",
+            "S2",
+            "S3",
+        ]
+
+    # A subgroup is determined by its size and generator, but other domains are
+    # also accepted, so the key holds every point
+    @staticmethod
+    def get_domain_key(mult_subgroup: List[FElt]) -> DomainKey:
+        return tuple(x.n for x in mult_subgroup)
+
+    def get_domain_evals(
+        self, name: str, mult_subgroup: List[FElt]
+    ) -> FieldVector[FElt]:
+        key = (name, self.get_domain_key(mult_subgroup))
+        cached = self.domain_evals.get(key)
+        if cached is not None:
+            return cached
+        evals = FieldVector.from_elts(
+            type(mult_subgroup[0]),
+            getattr(self, name).eval_on_mult_subgroup(mult_subgroup),
+        )
+        self.domain_evals[key] = evals
+        return evals
+
+    # Requires mult_subgroup to be a power-of-2 subgroup of roots of unity
+    def get_coset_evals(
+        self, name: str, mult_subgroup: List[FElt]
+    ) -> EvaluationPolynomial[FElt]:
+        field_class = type(mult_subgroup[0])
+        ext_domain = get_ntt_domain(field_class, 4 * len(mult_subgroup))
+        cached = self.coset_evals.get(name)
+        if cached is not None and len(cached.values) == len(ext_domain):
+            return cached
+        evals = EvaluationPolynomial.from_poly(
+            getattr(self, name), ext_domain, get_coset_shift(field_class)
+        )
+        self.coset_evals[name] = evals
+        return evals
 
 
 class Preprocessor(Generic[FElt]):
     @staticmethod
+    @traced("preprocess")
     def preprocess_plonk_constraints(
         constraints: PlonkConstraints,
         mult_subgroup: List[FElt],
         field_class: Type[FElt],
+        precompute_coset_evals: bool = False,
     ) -> "PlonkPreprocessedInput":
-        permutation = constraints.get_permutation()
-        s_id_polys = []
-        s_sigma_polys = []
-        for j in range(3):  # Follow index notation from paper
-            s_id_values = []
-            s_sigma_values = []
-            for i in range(constraints.n):
-                index = j * constraints.n + i
-                # We add 1 to each of the below values to match the paper...
-                # Identity and permutation polynomials should be defined on [1..3n]
-                s_id_values.append(field_class(index + 1))
-                s_sigma_values.append(field_class(permutation[index] + 1))
-
-            s_id_polys.append(
-                Polynomial.interpolate_poly(
-                    domain=mult_subgroup, values=s_id_values, field_class=field_class
-                )
+        if precompute_coset_evals and not is_ntt_domain(mult_subgroup):
+            raise ValueError(
+                "Coset evaluations require a power-of-2 subgroup of roots of unity!"
+            )
+        s_id_values, s_sigma_values = PermutationArgument.get_permutation_values(
+            constraints=constraints, field_class=field_class
+        )
+        s_id_polys = [
+            Polynomial.interpolate_poly(
+                domain=mult_subgroup, values=values, field_class=field_class
             )
-            s_sigma_polys.append(
-                Polynomial.interpolate_poly(
-                    domain=mult_subgroup, values=s_sigma_values, field_class=field_class
-                )
+            for values in s_id_values
+        ]
+        s_sigma_polys = [
+            Polynomial.interpolate_poly(
+                domain=mult_subgroup, values=values, field_class=field_class
             )
+            for values in s_sigma_values
+        ]
 
         PqL = Polynomial.interpolate_poly(
             domain=mult_subgroup, values=constraints.qL, field_class=field_class
@@ -67,7 +132,7 @@ class Preprocessor(Generic[FElt]):
             domain=mult_subgroup, values=constraints.qC, field_class=field_class
         )
 
-        return PlonkPreprocessedInput(
+        preprocessed_input = PlonkPreprocessedInput(
             PqL=PqL,
             PqR=PqR,
             PqO=PqO,
@@ -80,3 +145,23 @@ class Preprocessor(Generic[FElt]):
             S2=s_sigma_polys[1],
             S3=s_sigma_polys[2],
         )
+
+        # Domain values are the interpolated values, so keep them
+        domain_values = [
+            constraints.qL,
+            constraints.qR,
+            constraints.qO,
+            constraints.qM,
+            constraints.qC,
+        ]
+        domain_values += s_id_values + s_sigma_values
+        domain_key = PlonkPreprocessedInput.get_domain_key(mult_subgroup)
+        for name, values in zip(PlonkPreprocessedInput.poly_names(), domain_values):
+            preprocessed_input.domain_evals[(name, domain_key)] = FieldVector.from_elts(
+                field_class, values
+            )
+        if precompute_coset_evals:
+            for name in PlonkPreprocessedInput.poly_names():
+                preprocessed_input.get_coset_evals(name, mult_subgroup)
+
+        return preprocessed_input
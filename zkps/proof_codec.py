@@ -0,0 +1,269 @@
+from typing import Any, BinaryIO, Generic, Iterator, List, Optional, Type, Union
+from algebra.field import FElt
+from algebra.cyclic_group import CyclicGroup
+from algebra.pairing import Pairing
+from algebra.encoding import (
+    get_width,
+    encode_G_1,
+    decode_G_1,
+    encode_G_1_compressed,
+    decode_G_1_compressed,
+)
+from plonk import PlonkProof
+from polynomial_commitment_schemes.pcs import Commitment, Opening
+from polynomial_commitment_schemes.trivial import TrivialCommitment, TrivialOpening
+from polynomial_commitment_schemes.kzg import KZGCommitment, KZGOpening
+from polynomial_commitment_schemes.bulletproofs import (
+    BulletproofsCommitment,
+    BulletproofsOpening,
+    BulletproofsBatchOpening,
+    BulletproofsOpeningProof,
+)
+
+PROOF_VERSION = 1
+
+# Identifies the polynomial commitment scheme a proof was made with
+TRIVIAL_TAG = 0
+KZG_TAG = 1
+BULLETPROOFS_TAG = 2
+
+# Bulletproofs openings are a single proof or a list of them
+SINGLE_OPENING_TAG = 0
+BATCH_OPENING_TAG = 1
+
+
+# Reads fixed-width values from a buffer without copying it
+class _Reader:
+    def __init__(self, data: Union[bytes, memoryview]) -> None:
+        self.data: memoryview = memoryview(data)
+        self.offset: int = 0
+
+    def read(self, length: int) -> memoryview:
+        if self.offset + length > len(self.data):
+            raise ValueError("Unexpected end of proof data!")
+        res = self.data[self.offset : self.offset + length]
+        self.offset += length
+        return res
+
+    def read_int(self, length: int) -> int:
+        return int.from_bytes(self.read(length), "big")
+
+
+# Versioned fixed-width binary format for PlonkProof
+# Header of version, scheme tag and compression flag, which is only set for KZG,
+# then the six commitments, the six evaluations and the batch opening. Field
+# elements and group elements are big-endian at the width of their modulus,
+# curve points as in encoding.py
+class PlonkProofCodec(Generic[FElt]):
+    def __init__(
+        self,
+        field_class: Type[FElt],
+        pairing: Optional[Pairing] = None,
+        cyclic_group_class: Optional[Type[CyclicGroup]] = None,
+        compressed: bool = False,
+    ) -> None:
+        self.field_class: Type[FElt] = field_class
+        self.pairing: Optional[Pairing] = pairing
+        self.cyclic_group_class: Optional[Type[CyclicGroup]] = cyclic_group_class
+        # Whether encoded KZG points keep only their x coordinate
+        self.compressed: bool = compressed
+        self.width: int = get_width(field_class.field_modulus)
+
+    def encode(self, proof: PlonkProof[FElt]) -> bytes:
+        tag = self._get_tag(proof.f_L_cm)
+        compressed = self.compressed and tag == KZG_TAG
+        res = bytearray([PROOF_VERSION, tag, 1 if compressed else 0])
+        for cm in [
+            proof.f_L_cm,
+            proof.f_R_cm,
+            proof.f_O_cm,
+            proof.Z_cm,
+            proof.Z_shift_cm,
+            proof.T_cm,
+        ]:
+            if self._get_tag(cm) != tag:
+                raise ValueError("All commitments must use the same scheme!")
+            res.extend(self._encode_commitment(cm))
+        for s in [
+            proof.f_L_eval,
+            proof.f_R_eval,
+            proof.f_O_eval,
+            proof.Z_eval,
+            proof.Z_shift_eval,
+            proof.T_eval,
+        ]:
+            res.extend(self._encode_int(s.n))
+        res.extend(self._encode_opening(proof.batch_op, tag))
+
+        return bytes(res)
+
+    def decode(self, data: Union[bytes, memoryview]) -> PlonkProof[FElt]:
+        reader = _Reader(data)
+        version = reader.read_int(1)
+        if version != PROOF_VERSION:
+            raise ValueError("Unsupported proof version!")
+        tag = reader.read_int(1)
+        # Only KZG proofs have compressed points, and any other flag would give
+        # the same proof a second encoding
+        flag = reader.read_int(1)
+        if flag not in [0, 1] or (flag == 1 and tag != KZG_TAG):
+            raise ValueError("Invalid compression flag!")
+        compressed = flag == 1
+        cms = [self._decode_commitment(reader, tag, compressed) for _ in range(6)]
+        evals = [self._decode_field_elt(reader) for _ in range(6)]
+        batch_op = self._decode_opening(reader, tag, compressed)
+        if reader.offset != len(reader.data):
+            raise ValueError("Proof has trailing data!")
+
+        return PlonkProof[FElt](
+            f_L_cm=cms[0],
+            f_R_cm=cms[1],
+            f_O_cm=cms[2],
+            Z_cm=cms[3],
+            Z_shift_cm=cms[4],
+            T_cm=cms[5],
+            f_L_eval=evals[0],
+            f_R_eval=evals[1],
+            f_O_eval=evals[2],
+            Z_eval=evals[3],
+            Z_shift_eval=evals[4],
+            T_eval=evals[5],
+            batch_op=batch_op,
+        )
+
+    # ---------- Length-prefixed batches of proofs ----------
+    def write_proofs(self, stream: BinaryIO, proofs: List[PlonkProof[FElt]]) -> None:
+        for proof in proofs:
+            data = self.encode(proof)
+            stream.write(len(data).to_bytes(4, "big"))
+            stream.write(data)
+
+    def read_proofs(self, stream: BinaryIO) -> Iterator[PlonkProof[FElt]]:
+        while True:
+            length_bytes = stream.read(4)
+            if len(length_bytes) == 0:
+                return
+            if len(length_bytes) != 4:
+                raise ValueError("Unexpected end of proof stream!")
+            length = int.from_bytes(length_bytes, "big")
+            data = stream.read(length)
+            if len(data) != length:
+                raise ValueError("Unexpected end of proof stream!")
+            yield self.decode(data)
+
+    # ---------- Commitments and openings ----------
+    @staticmethod
+    def _get_tag(cm: Commitment) -> int:
+        if isinstance(cm, TrivialCommitment):
+            return TRIVIAL_TAG
+        if isinstance(cm, KZGCommitment):
+            return KZG_TAG
+        if isinstance(cm, BulletproofsCommitment):
+            return BULLETPROOFS_TAG
+        raise ValueError("Unsupported commitment type!")
+
+    def _encode_int(self, x: int) -> bytes:
+        return x.to_bytes(self.width, "big")
+
+    def _encode_point(self, p: Any) -> bytes:
+        if self.pairing is None:
+            raise ValueError("Must provide a pairing to encode KZG proofs!")
+        base_field_class = type(self.pairing.g_1[0])
+        if self.compressed:
+            return encode_G_1_compressed(p, base_field_class)
+        return encode_G_1(p, base_field_class)
+
+    def _decode_point(self, reader: _Reader, compressed: bool) -> Any:
+        if self.pairing is None:
+            raise ValueError("Must provide a pairing to decode KZG proofs!")
+        base_field_class = type(self.pairing.g_1[0])
+        width = get_width(base_field_class.field_modulus)
+        if compressed:
+            return decode_G_1_compressed(reader.read(width), base_field_class)
+        return decode_G_1(reader.read(2 * width), base_field_class)
+
+    # Values at or above the modulus would decode to the same element as their
+    # reduction, so rejecting them keeps every proof to a single encoding
+    def _decode_field_elt(self, reader: _Reader) -> FElt:
+        x = reader.read_int(self.width)
+        if x >= self.field_class.field_modulus:
+            raise ValueError("Field element is not reduced mod the field modulus!")
+        return self.field_class(x)
+
+    # Group elements are encoded by their value, their multiple of the generator
+    def _decode_group_elt(self, reader: _Reader) -> CyclicGroup:
+        if self.cyclic_group_class is None:
+            raise ValueError("Must provide a cyclic group to decode Bulletproofs!")
+        x = reader.read_int(self.width)
+        if x >= self.cyclic_group_class.order:
+            raise ValueError("Group element is not reduced mod the group order!")
+        return self.cyclic_group_class.generator() * x
+
+    def _encode_commitment(self, cm: Commitment) -> bytes:
+        if isinstance(cm, TrivialCommitment):
+            return len(cm.value).to_bytes(4, "big") + b"".join(
+                [self._encode_int(x.n) for x in cm.value]
+            )
+        if isinstance(cm, KZGCommitment):
+            return self._encode_point(cm.value)
+        return self._encode_int(cm.value.value)
+
+    def _decode_commitment(
+        self, reader: _Reader, tag: int, compressed: bool
+    ) -> Commitment:
+        if tag == TRIVIAL_TAG:
+            length = reader.read_int(4)
+            return TrivialCommitment[FElt](
+                value=[self._decode_field_elt(reader) for _ in range(length)]
+            )
+        if tag == KZG_TAG:
+            return KZGCommitment(value=self._decode_point(reader, compressed))
+        if tag == BULLETPROOFS_TAG:
+            return BulletproofsCommitment[Any](value=self._decode_group_elt(reader))
+        raise ValueError("Unsupported commitment scheme!")
+
+    def _encode_opening_proof(self, proof: BulletproofsOpeningProof) -> bytes:
+        res = bytearray([len(proof.L_js)])
+        for elt in proof.L_js + proof.R_js + [proof.R]:
+            res.extend(self._encode_int(elt.value))
+        res.extend(self._encode_int(proof.z_1.n))
+        res.extend(self._encode_int(proof.z_2.n))
+        return bytes(res)
+
+    def _decode_opening_proof(self, reader: _Reader) -> BulletproofsOpeningProof:
+        k = reader.read_int(1)
+        L_js = [self._decode_group_elt(reader) for _ in range(k)]
+        R_js = [self._decode_group_elt(reader) for _ in range(k)]
+        R = self._decode_group_elt(reader)
+        z_1 = self._decode_field_elt(reader)
+        z_2 = self._decode_field_elt(reader)
+        return BulletproofsOpeningProof(L_js=L_js, R_js=R_js, R=R, z_1=z_1, z_2=z_2)
+
+    def _encode_opening(self, op: Opening, tag: int) -> bytes:
+        if tag == TRIVIAL_TAG and isinstance(op, TrivialOpening):
+            return bytes(0)
+        if tag == KZG_TAG and isinstance(op, KZGOpening):
+            return self._encode_point(op.value)
+        if tag == BULLETPROOFS_TAG and isinstance(op, BulletproofsOpening):
+            return bytes([SINGLE_OPENING_TAG]) + self._encode_opening_proof(op.value)
+        if tag == BULLETPROOFS_TAG and isinstance(op, BulletproofsBatchOpening):
+            res = bytearray([BATCH_OPENING_TAG, len(op.value)])
+            for proof in op.value:
+                res.extend(self._encode_opening_proof(proof))
+            return bytes(res)
+        raise ValueError("Opening does not match the commitment scheme!")
+
+    def _decode_opening(self, reader: _Reader, tag: int, compressed: bool) -> Opening:
+        if tag == TRIVIAL_TAG:
+            return TrivialOpening(value=None)
+        if tag == KZG_TAG:
+            return KZGOpening(value=self._decode_point(reader, compressed))
+        opening_tag = reader.read_int(1)
+        if opening_tag == SINGLE_OPENING_TAG:
+            return BulletproofsOpening(value=self._decode_opening_proof(reader))
+        if opening_tag == BATCH_OPENING_TAG:
+            count = reader.read_int(1)
+            return BulletproofsBatchOpening(
+                value=[self._decode_opening_proof(reader) for _ in range(count)]
+            )
+        raise ValueError("Unsupported Bulletproofs opening!")
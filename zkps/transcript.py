@@ -1,3 +1,4 @@
+import hashlib
 from typing import Generic, Optional, Type
 from algebra.field import FElt
 from Crypto.Hash import keccak
@@ -5,21 +6,36 @@ from utils import Byteable
 
 
 class Transcript(Generic[FElt]):
-    def __init__(self, field_class: Type[FElt]) -> None:
+    def __init__(self, field_class: Type[FElt], legacy: bool = False) -> None:
         self.field_class: Type[FElt] = field_class
+        # Legacy mode rehashes the full record with Keccak-256 for every challenge,
+        # reproducing the challenges of proofs made before the running hash state
+        self.legacy: bool = legacy
         self.record: bytearray = bytearray()
+        # Running SHA3-256 sponge that absorbs each entry exactly once
+        self.state = hashlib.sha3_256()
 
     def append(self, entry: Byteable) -> None:
-        self.record.extend(entry.to_bytes())
+        if self.legacy:
+            self.record.extend(entry.to_bytes())
+        else:
+            self.state.update(entry.to_bytes())
         # print("Appending {s} to transcript...".format(s=str(entry)))
 
     def get_hash(self, salt: Optional[bytes] = None) -> FElt:
-        bytes_copy = self.record[:]
-        if salt:
-            bytes_copy.extend(salt)
-        k = keccak.new(digest_bits=256)
-        k.update(bytes_copy)
+        if self.legacy:
+            bytes_copy = self.record[:]
+            if salt:
+                bytes_copy.extend(salt)
+            k = keccak.new(digest_bits=256)
+            k.update(bytes_copy)
+            hash_int = int(k.hexdigest(), 16)
+        else:
+            # Fork the running state so the salt is not absorbed into the transcript
+            state = self.state.copy()
+            if salt:
+                state.update(salt)
+            hash_int = int.from_bytes(state.digest(), "big")
 
-        hash_int = int(k.hexdigest(), 16)
         # print("Produced hash {s} from transcript...".format(s=str(hash_int)))
         return self.field_class(hash_int)